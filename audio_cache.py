@@ -0,0 +1,225 @@
+import argparse
+import collections
+import concurrent.futures
+import datetime
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+
+# 디스크 캐시 사용 여부와 위치 (기본 꺼짐 - 디스크 여유가 있는 서버에서만 MUSIC_DISK_CACHE=1로 켬)
+DISK_CACHE_ENABLED = os.getenv("MUSIC_DISK_CACHE", "0") == "1"
+DISK_CACHE_DIR = os.getenv("MUSIC_DISK_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "music_cache"))
+# 캐시 전체 크기 상한 (MB, 넘으면 가장 오래 재생되지 않은 곡부터 삭제)
+DISK_CACHE_MAX_MB = int(os.getenv("MUSIC_DISK_CACHE_MAX_MB", "2048"))
+# 이 횟수 이상 재생된 곡만 내려받음
+DISK_CACHE_MIN_PLAYS = int(os.getenv("MUSIC_DISK_CACHE_MIN_PLAYS", "3"))
+# 이보다 긴 곡(믹스, 라이브 다시보기 등)은 내려받지 않음 (초)
+DISK_CACHE_MAX_DURATION = 20 * 60
+
+DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rp_server_data.db")
+
+
+def download_audio(url: str, options: dict, tmp_dir: str) -> str:
+    """yt-dlp로 오디오를 tmp_dir에 내려받고 파일 경로를 반환합니다. (outtmpl 파일 이름 형식은 options의 것을 그대로 사용)"""
+    import yt_dlp # 다운로드 스레드에서만 사용
+    download_options = {**options, "outtmpl": os.path.join(tmp_dir, options["outtmpl"]), "noplaylist": True}
+    with yt_dlp.YoutubeDL(download_options) as ytdl:
+        data = ytdl.extract_info(url, download=True)
+        if "entries" in data:
+            data = next(iter(data["entries"]))
+        return ytdl.prepare_filename(data)
+
+
+class AudioDiskCache:
+    """자주 재생되는 곡의 오디오 파일을 디스크에 보관합니다. 캐시된 곡은 yt-dlp 추출과 네트워크 스트리밍 없이 바로 재생됩니다.
+
+    다운로드는 전용 스레드 하나에서 백그라운드로 진행하고(재생을 기다리게 하지 않음), 임시 폴더에 받은 뒤 같은 파일 시스템 안에서
+    os.replace로 옮겨 반쯤 받은 파일이 재생되는 일이 없게 합니다. 크기 상한을 넘으면 마지막 재생 시각이 가장 오래된 곡부터 지웁니다.
+    """
+
+    def __init__(self, get_db_connection, ytdl_options: dict, cache_dir: str = DISK_CACHE_DIR, max_bytes: int = DISK_CACHE_MAX_MB * 1024 * 1024,
+                 min_plays: int = DISK_CACHE_MIN_PLAYS, downloader=download_audio):
+        self.get_db_connection = get_db_connection
+        self.ytdl_options = ytdl_options
+        self.cache_dir = cache_dir
+        self.tmp_dir = os.path.join(cache_dir, "tmp")
+        self.max_bytes = max_bytes
+        self.min_plays = min_plays
+        self.downloader = downloader
+        self.lock = threading.Lock() # entries는 이벤트 루프(조회)와 다운로드 스레드(추가/삭제)가 함께 씀
+        self.entries = collections.OrderedDict() # key -> (path, size), 앞쪽이 가장 오래 재생되지 않은 곡
+        self.downloading = set()
+        self.executor = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="audio-cache")
+        self.counters = collections.Counter() # hits, downloads, download_errors, evictions
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        """DB에 기록된 캐시 파일을 불러오고, 파일이 없어진 기록과 남은 임시 파일을 정리합니다."""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        conn = self.get_db_connection()
+        try:
+            rows = conn.execute("""
+                SELECT video_id, audio_path, audio_size FROM music_tracks
+                WHERE audio_path IS NOT NULL ORDER BY last_played_at
+            """).fetchall()
+            missing = []
+            for row in rows:
+                if os.path.exists(row["audio_path"]):
+                    self.entries[row["video_id"]] = (row["audio_path"], row["audio_size"] or 0)
+                else:
+                    missing.append((row["video_id"],))
+            if missing:
+                conn.executemany("UPDATE music_tracks SET audio_path = NULL, audio_size = NULL WHERE video_id = ?", missing)
+                conn.commit()
+        finally:
+            conn.close()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def total_bytes(self) -> int:
+        with self.lock:
+            return sum(size for _, size in self.entries.values())
+
+    def lookup(self, key: str):
+        """캐시된 오디오 파일 경로 (없으면 None)"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if not os.path.exists(entry[0]):
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+        self.counters["hits"] += 1
+        return entry[0]
+
+    def record_play(self, key: str, url: str, duration) -> bool:
+        """재생 횟수를 올리고, 캐시할 만큼 자주 재생된 곡이면 백그라운드 다운로드를 시작합니다. (DB 접근이 있으므로 스레드에서 호출)
+
+        반환값: 다운로드를 새로 시작했으면 True
+        """
+        conn = self.get_db_connection()
+        try:
+            row = conn.execute("""
+                UPDATE music_tracks SET play_count = play_count + 1, last_played_at = ? WHERE video_id = ?
+                RETURNING play_count
+            """, (datetime.datetime.now().isoformat(), key)).fetchone()
+            conn.commit()
+        finally:
+            conn.close()
+        if row is None or row["play_count"] < self.min_plays or (duration and duration > DISK_CACHE_MAX_DURATION):
+            return False
+        with self.lock:
+            if key in self.entries or key in self.downloading:
+                return False
+            self.downloading.add(key)
+        self.executor.submit(self._download, key, url)
+        return True
+
+    def _download(self, key: str, url: str):
+        try:
+            with tempfile.TemporaryDirectory(dir=self.tmp_dir) as work_dir:
+                downloaded = self.downloader(url, self.ytdl_options, work_dir)
+                final_path = os.path.join(self.cache_dir, os.path.basename(downloaded))
+                os.replace(downloaded, final_path) # 같은 파일 시스템 안에서 원자적으로 이동
+            size = os.path.getsize(final_path)
+            conn = self.get_db_connection()
+            try:
+                conn.execute("UPDATE music_tracks SET audio_path = ?, audio_size = ? WHERE video_id = ?", (final_path, size, key))
+                conn.commit()
+            finally:
+                conn.close()
+            with self.lock:
+                self.entries[key] = (final_path, size)
+            self.counters["downloads"] += 1
+            self._evict()
+        except Exception as e:
+            self.counters["download_errors"] += 1
+            print(f"곡 오디오 캐시 다운로드 실패 ({url}): {e}")
+        finally:
+            with self.lock:
+                self.downloading.discard(key)
+
+    def _evict(self):
+        """크기 상한을 넘으면 가장 오래 재생되지 않은 곡부터 지웁니다. (방금 받은 곡은 맨 뒤라 지워지지 않음)"""
+        removed = []
+        with self.lock:
+            total = sum(size for _, size in self.entries.values())
+            while total > self.max_bytes and len(self.entries) > 1:
+                key, (path, size) = self.entries.popitem(last=False)
+                total -= size
+                removed.append((key, path))
+        if not removed:
+            return
+        for _, path in removed:
+            try:
+                os.remove(path) # 재생 중인 파일이어도 리눅스에서는 열린 핸들로 끝까지 읽힘
+            except OSError:
+                pass
+        conn = self.get_db_connection()
+        try:
+            conn.executemany("UPDATE music_tracks SET audio_path = NULL, audio_size = NULL WHERE video_id = ?", [(key,) for key, _ in removed])
+            conn.commit()
+        finally:
+            conn.close()
+        self.counters["evictions"] += len(removed)
+
+    def metrics(self) -> dict:
+        with self.lock:
+            entries = len(self.entries)
+            total = sum(size for _, size in self.entries.values())
+            downloading = len(self.downloading)
+        return {
+            "music_disk_cache_hits": self.counters["hits"],
+            "music_disk_cache_entries": entries,
+            "music_disk_cache_mb": round(total / 1024 / 1024, 1),
+            "music_disk_cache_downloads": self.counters["downloads"],
+            "music_disk_cache_downloading": downloading,
+            "music_disk_cache_download_errors": self.counters["download_errors"],
+            "music_disk_cache_evictions": self.counters["evictions"],
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="저스트봇 음악 디스크 캐시 도구")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("status", help="캐시된 곡 목록과 전체 크기를 보여줍니다.")
+    clear_parser = subparsers.add_parser("clear", help="캐시된 오디오 파일을 모두 지웁니다.")
+    clear_parser.add_argument("--yes", action="store_true", help="확인 없이 삭제")
+
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(DB_FILE)
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = conn.execute("""
+            SELECT video_id, title, play_count, last_played_at, audio_path, audio_size FROM music_tracks
+            WHERE audio_path IS NOT NULL ORDER BY last_played_at DESC
+        """).fetchall()
+        if args.command == "status":
+            for row in rows:
+                print(f"{row['video_id']:<24} {row['play_count']:>5}회 {(row['audio_size'] or 0) / 1024 / 1024:7.1f}MB  {row['title']}")
+            print(f"캐시된 곡 {len(rows)}개, 전체 {sum(row['audio_size'] or 0 for row in rows) / 1024 / 1024:.1f}MB (상한 {DISK_CACHE_MAX_MB}MB)")
+            return
+        if not args.yes:
+            print(f"⚠️ 캐시된 곡 {len(rows)}개를 지우려면 --yes를 붙여 다시 실행하세요.")
+            return
+        for row in rows:
+            try:
+                os.remove(row["audio_path"])
+            except OSError:
+                pass
+        conn.execute("UPDATE music_tracks SET audio_path = NULL, audio_size = NULL WHERE audio_path IS NOT NULL")
+        conn.commit()
+        print(f"✅ 캐시된 곡 {len(rows)}개를 지웠습니다. (봇이 실행 중이면 다시 시작해야 메모리 목록도 비워집니다)")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
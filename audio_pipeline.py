@@ -0,0 +1,186 @@
+import argparse
+import os
+import shlex
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+# 스트림 연결이 끊기면 다시 연결 (유튜브 스트림 URL은 재생 중에 연결이 끊기는 경우가 있음)
+FFMPEG_BEFORE_OPTIONS = "-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5"
+# 재생 음량 (1.0이면 원본 그대로 - 원본이 Opus면 디코딩 없이 패킷을 그대로 전달)
+# 1.0이 아니면 ffmpeg가 libopus로 다시 인코딩하므로 CPU 사용량은 PCM 경로와 비슷하거나 더 큼 (ffmpeg에 링크된 libopus에 따라 다름,
+# python audio_pipeline.py benchmark로 확인) - CPU를 아끼려면 MUSIC_VOLUME=1.0으로 두고 사용자가 디스코드에서 음량을 조절
+MUSIC_VOLUME = float(os.getenv("MUSIC_VOLUME", "0.5"))
+# Opus 패스스루 재생 사용 여부 (0이면 기존 방식: PCM으로 디코딩 후 파이썬에서 음량 조절/인코딩)
+OPUS_PASSTHROUGH = os.getenv("MUSIC_OPUS_PASSTHROUGH", "1") == "1"
+# ffmpeg가 다시 인코딩할 때의 Opus 비트레이트 (kbps, 디스코드 음성 채널 최대값)
+OPUS_BITRATE = 128
+
+# PCM 경로의 프레임 크기: 48kHz 스테레오 16비트 20ms (discord.py의 FFmpegPCMAudio와 같음)
+PCM_FRAME_SIZE = 3840
+
+
+def opus_source_options(codec: str, volume: float = MUSIC_VOLUME, local: bool = False) -> dict:
+    """discord.FFmpegOpusAudio에 넘길 인자. (local: 디스크에 캐시된 파일 - 재연결 옵션 없음)
+
+    discord.py는 codec이 'opus'/'libopus'면 -c:a copy로, 그 외(None 포함)면 libopus로 인코딩합니다.
+    원본이 Opus이고 음량을 바꾸지 않을 때만 패킷을 그대로 넘기고(copy - 필터를 걸 수 없음),
+    그 외에는 ffmpeg 안에서 음량 필터를 적용해 Opus로 인코딩합니다. 어느 쪽이든 파이썬에서는 PCM을 다루지 않습니다.
+    """
+    before_options = None if local else FFMPEG_BEFORE_OPTIONS
+    if codec == "opus" and volume == 1.0:
+        return {"codec": "opus", "before_options": before_options, "options": "-vn"}
+    return {"codec": None, "bitrate": OPUS_BITRATE, "before_options": before_options,
+            "options": f"-vn -filter:a volume={volume}"}
+
+
+def pcm_source_options(local: bool = False) -> dict:
+    """기존 방식(discord.FFmpegPCMAudio + PCMVolumeTransformer)에 넘길 인자"""
+    return {"before_options": None if local else FFMPEG_BEFORE_OPTIONS, "options": "-vn"}
+
+
+def ffmpeg_opus_command(source: str, codec: str = None, bitrate: int = None, before_options: str = None, options: str = None) -> list:
+    """discord.FFmpegOpusAudio(discord.py 2.3.2)가 실행하는 ffmpeg 명령을 같은 규칙으로 만듭니다. (벤치마크/점검용)"""
+    args = ["ffmpeg", "-nostdin"] + (shlex.split(before_options) if before_options else []) + ["-i", source]
+    args += ["-map_metadata", "-1", "-f", "opus", "-c:a", "copy" if codec in ("opus", "libopus") else "libopus",
+             "-ar", "48000", "-ac", "2", "-b:a", f"{bitrate if bitrate is not None else 128}k", "-loglevel", "warning"]
+    return args + (shlex.split(options) if options else []) + ["pipe:1"]
+
+
+def ffmpeg_pcm_command(source: str, before_options: str = None, options: str = None) -> list:
+    """discord.FFmpegPCMAudio가 실행하는 ffmpeg 명령 (ffmpeg_opus_command와 같은 용도)"""
+    args = ["ffmpeg", "-nostdin"] + (shlex.split(before_options) if before_options else []) + ["-i", source]
+    args += ["-f", "s16le", "-ar", "48000", "-ac", "2", "-loglevel", "warning"]
+    return args + (shlex.split(options) if options else []) + ["pipe:1"]
+
+
+def benchmark_commands(input_path: str, codec: str, volume: float) -> dict:
+    """재생 방식별로 봇이 실제로 실행할 ffmpeg 명령 (opus_source_options/pcm_source_options를 그대로 사용)"""
+    return {
+        "pcm": ffmpeg_pcm_command(input_path, **pcm_source_options(local=True)),
+        "opus": ffmpeg_opus_command(input_path, **opus_source_options(codec, volume, local=True)),
+        "copy": ffmpeg_opus_command(input_path, **opus_source_options(codec, 1.0, local=True)),
+    }
+
+
+def _run_session(mode: str, command: list, volume: float, encoder):
+    """세션 하나: ffmpeg 출력을 끝까지 읽습니다. pcm 모드는 discord.py처럼 20ms 프레임마다 음량 조절과 Opus 인코딩을 파이썬에서 합니다."""
+    process = subprocess.Popen(command, stdout=subprocess.PIPE)
+    received = 0
+    if mode == "pcm":
+        import audioop # discord.PCMVolumeTransformer와 같은 방식
+        while True:
+            frame = process.stdout.read(PCM_FRAME_SIZE)
+            if len(frame) < PCM_FRAME_SIZE:
+                break
+            received += len(frame)
+            frame = audioop.mul(frame, 2, volume)
+            if encoder:
+                encoder.encode(frame, 960)
+    else:
+        while chunk := process.stdout.read(4096):
+            received += len(chunk)
+    if process.wait() != 0 or not received:
+        raise RuntimeError(f"ffmpeg가 오디오를 내보내지 못했습니다 (종료 코드 {process.returncode}): {' '.join(command)}")
+
+
+# 벤치마크 테스트 오디오: 원본 코덱 -> (ffmpeg 인코더, 확장자) - 유튜브 bestaudio는 보통 webm/opus 또는 m4a/aac
+TEST_INPUT_FORMATS = {"opus": ("libopus", "webm"), "aac": ("aac", "m4a")}
+
+
+def _make_test_input(tmp_dir: str, seconds: int, codec: str) -> str:
+    encoder, extension = TEST_INPUT_FORMATS[codec]
+    path = os.path.join(tmp_dir, f"bench.{extension}")
+    subprocess.run(["ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+                    "-ac", "2", "-ar", "48000", "-c:a", encoder, "-b:a", "128k", path], check=True)
+    return path
+
+
+def _probe(path: str):
+    """(코덱, 길이) - ffprobe가 없으면 (None, None)"""
+    if not shutil.which("ffprobe"):
+        return None, None
+    probe = subprocess.run(["ffprobe", "-v", "error", "-select_streams", "a:0", "-show_entries", "stream=codec_name:format=duration",
+                            "-of", "default=nw=1", path], capture_output=True, text=True)
+    values = dict(line.split("=", 1) for line in probe.stdout.splitlines() if "=" in line)
+    return values.get("codec_name"), float(values["duration"]) if values.get("duration") else None
+
+
+def _cpu_seconds() -> float:
+    import resource # 유닉스 전용 (벤치마크에서만 사용)
+    self_usage = resource.getrusage(resource.RUSAGE_SELF)
+    child_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return self_usage.ru_utime + self_usage.ru_stime + child_usage.ru_utime + child_usage.ru_stime
+
+
+def run_benchmark(sessions: int, seconds: int, input_path: str = None, volume: float = MUSIC_VOLUME, source_codec: str = "opus"):
+    """세션 sessions개를 동시에 최대 속도로 처리하고, 오디오 1초당 CPU 시간으로 코어 하나가 감당할 수 있는 세션 수를 계산합니다.
+
+    ffmpeg 명령은 봇과 똑같이 opus_source_options/pcm_source_options로 만들고, 출력이 없거나 ffmpeg가 실패하면 오류로 표시합니다.
+    """
+    if not shutil.which("ffmpeg"):
+        print("❌ ffmpeg를 찾을 수 없습니다.")
+        return
+    encoder = None
+    try:
+        import discord.opus # PCM 경로의 Opus 인코딩 비용까지 재려면 libopus가 필요
+        if not discord.opus.is_loaded():
+            discord.opus._load_default()
+        encoder = discord.opus.Encoder()
+    except Exception as e:
+        print(f"⚠️ libopus를 불러올 수 없어 PCM 경로의 파이썬 측 Opus 인코딩은 빼고 측정합니다. ({e})")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = input_path or _make_test_input(tmp_dir, seconds, source_codec)
+        codec, duration = _probe(path)
+        codec = codec or source_codec
+        audio_seconds = duration or seconds
+        print(f"입력: {os.path.basename(path)} ({codec}, {audio_seconds:.0f}초), 음량 {volume}")
+        for mode, command in benchmark_commands(path, codec, volume).items():
+            print(f"  {mode}: {' '.join(command)}")
+            # 인코더는 스레드 안전하지 않으므로 세션마다 따로 (PCM 경로에서만 사용)
+            encoders = [discord.opus.Encoder() if encoder else None for _ in range(sessions)] if mode == "pcm" else [None] * sessions
+            errors = []
+
+            def session(index, mode=mode, command=command, errors=errors):
+                try:
+                    _run_session(mode, command, volume, encoders[index])
+                except Exception as e:
+                    errors.append(e)
+
+            cpu_started, started = _cpu_seconds(), time.perf_counter()
+            threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            cpu = _cpu_seconds() - cpu_started
+            elapsed = time.perf_counter() - started
+            if errors:
+                print(f"{mode:<5} ❌ 세션 {len(errors)}/{sessions}개 실패: {errors[0]}")
+                continue
+            per_audio_second = cpu / (audio_seconds * sessions)
+            print(f"{mode:<5} 세션 {sessions}개 x {audio_seconds:.0f}초: 경과 {elapsed:.2f}초, CPU {cpu:.2f}초 "
+                  f"(오디오 1초당 {per_audio_second * 1000:.1f}ms) -> 코어당 실시간 세션 약 {1 / per_audio_second:.0f}개")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="저스트봇 음성 재생 경로 도구")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    bench_parser = subparsers.add_parser("benchmark", help="PCM 경로 / Opus 인코딩(ffmpeg) / Opus 패스스루의 세션당 CPU 사용량을 비교합니다.")
+    bench_parser.add_argument("--sessions", type=int, default=8, help="동시 세션 수 (기본 8)")
+    bench_parser.add_argument("--seconds", type=int, default=60, help="테스트 오디오 길이 (기본 60초)")
+    bench_parser.add_argument("--input", help="테스트에 쓸 오디오 파일 (생략 시 Opus 사인파 생성)")
+    bench_parser.add_argument("--volume", type=float, default=MUSIC_VOLUME, help="음량 (pcm/opus 모드)")
+    bench_parser.add_argument("--source-codec", choices=sorted(TEST_INPUT_FORMATS), default="opus",
+                              help="생성할 테스트 오디오의 코덱 (--input이 없을 때, 기본 opus)")
+
+    args = parser.parse_args(argv)
+    run_benchmark(args.sessions, args.seconds, args.input, args.volume, args.source_codec)
+
+
+if __name__ == "__main__":
+    main()
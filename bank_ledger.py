@@ -0,0 +1,901 @@
+import argparse
+import bisect
+import contextlib
+import csv
+import datetime
+import gzip
+import io
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+
+import search_index
+
+# 은행 DB 작업 모음 (discord 의존성 없음 - 봇 코그, 대시보드, 벤치마크에서 공통 사용)
+# 모든 함수는 transaction() 안에서 호출되어야 하며, 잔액 차감은 항상 "WHERE balance >= ?" 조건부 UPDATE로 처리합니다.
+
+# 봇과 같은 DB 파일을 사용 (이 스크립트가 있는 프로젝트 루트 기준)
+DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rp_server_data.db")
+
+# 압축(아카이브)된 원장 파일 저장 위치와 보관 기간
+LEDGER_ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ledger_archive")
+LEDGER_RETENTION_DAYS = 90
+
+# 복식부기 시스템 계정 (디스코드 ID와 겹치지 않는 작은 정수)
+SYSTEM_CASH = 1  # 입금/출금의 상대 계정 (은행 밖의 현금)
+SYSTEM_LOANS = 2 # 대출 실행/상환의 상대 계정
+SYSTEM_FEES = 3  # 수수료/세금 수입 계정
+SYSTEM_INTEREST = 4 # 예금 이자 지급 계정
+SYSTEM_PAYROLL = 5  # 급여/일괄 지급 계정
+
+# ledger_entries.kind 코드 (bank_transactions.type 문자열 대신 정수로 저장)
+ENTRY_KINDS = {
+    'deposit': 1,
+    'withdrawal': 2,
+    'transfer': 3,
+    'loan_taken': 4,
+    'loan_repaid': 5,
+    'fee': 6,
+    'interest': 7,
+    'payroll': 8,
+    'refund': 9,
+}
+
+# 처리한 interaction 기록 보관 기간 (디스코드 재전송/중복 클릭은 몇 초~몇 분 안에 일어남)
+IDEMPOTENCY_TTL_SECONDS = 24 * 60 * 60
+
+# 상환이 끝나지 않은 대출 상태 (만기가 지나면 active -> overdue)
+OPEN_LOAN_STATUSES = ('active', 'overdue')
+
+# 경제 작업(run_economy_job) 이율 - 하루 한 번 적용, 원 단위 내림
+SAVINGS_INTEREST_RATE = 0.0001  # 예금 일 이자율 (연 약 3.7%)
+OVERDUE_PENALTY_RATE = 0.05     # 연체로 바뀔 때 남은 상환액에 한 번 붙는 연체료
+OVERDUE_INTEREST_RATE = 0.001   # 연체 중인 대출의 남은 상환액에 매일 붙는 연체 이자
+
+class BankError(Exception):
+    """사용자에게 그대로 보여줄 수 있는 은행 처리 오류"""
+
+class AccountNotFound(BankError):
+    pass
+
+class InsufficientFunds(BankError):
+    def __init__(self, balance: int):
+        super().__init__("잔액이 부족합니다.")
+        self.balance = balance
+
+
+def now_iso() -> str:
+    return datetime.datetime.now(datetime.UTC).isoformat()
+
+
+@contextlib.contextmanager
+def transaction(conn):
+    """BEGIN IMMEDIATE로 쓰기 잠금을 먼저 잡고, 블록이 끝나면 한 번만 커밋합니다. 예외가 나면 전부 롤백합니다."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+
+
+def ensure_ledger_tables(conn):
+    """원장/스냅샷 테이블을 만듭니다 (봇의 initialize_db와 같은 정의 - CLI/벤치마크용)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ledger_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            txn_id INTEGER NOT NULL,
+            account_id INTEGER NOT NULL,
+            amount INTEGER NOT NULL,
+            kind INTEGER NOT NULL,
+            created_at INTEGER NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_ledger_entries_account ON ledger_entries (account_id, id)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS balance_snapshots (
+            account_id INTEGER PRIMARY KEY,
+            ledger_id INTEGER NOT NULL,
+            balance INTEGER NOT NULL,
+            taken_at INTEGER NOT NULL
+        )
+    """)
+
+
+def ensure_idempotency_table(conn):
+    """처리한 interaction 기록 테이블 (봇의 initialize_db와 같은 정의 - CLI/벤치마크용)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS processed_interactions (
+            interaction_id TEXT PRIMARY KEY,
+            operation TEXT NOT NULL,
+            result TEXT NOT NULL,
+            created_at INTEGER NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_processed_interactions_created ON processed_interactions (created_at)")
+
+
+def run_idempotent(conn, key: str, func, *args):
+    """transaction() 안에서 호출합니다. key로 이미 처리한 작업이면 저장된 결과를 그대로 돌려주고 아무것도 바꾸지 않습니다.
+
+    결과 기록이 같은 트랜잭션에 들어가므로 "잔액은 바뀌었는데 기록은 없는" 상태가 생기지 않습니다. 반환값: (결과, 재전송 여부)
+    """
+    row = conn.execute("SELECT result FROM processed_interactions WHERE interaction_id = ?", (key,)).fetchone()
+    if row:
+        return json.loads(row[0]), True
+    result = func(conn, *args)
+    conn.execute("INSERT INTO processed_interactions (interaction_id, operation, result, created_at) VALUES (?, ?, ?, ?)",
+                 (key, func.__name__, json.dumps(result), int(time.time())))
+    return result, False
+
+
+def purge_processed_interactions(conn, ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS) -> int:
+    cursor = conn.execute("DELETE FROM processed_interactions WHERE created_at < ?", (int(time.time()) - ttl_seconds,))
+    return cursor.rowcount
+
+
+def create_opening_snapshots(conn) -> int:
+    """원장 도입 전부터 있던 계좌(원장 기록이 하나도 없는 계좌)의 현재 잔액을 시작 스냅샷으로 기록합니다."""
+    cursor = conn.execute("""
+        INSERT OR IGNORE INTO balance_snapshots (account_id, ledger_id, balance, taken_at)
+        SELECT CAST(a.user_id AS INTEGER), 0, a.balance, ? FROM bank_accounts a
+        WHERE NOT EXISTS (SELECT 1 FROM ledger_entries e WHERE e.account_id = CAST(a.user_id AS INTEGER))
+    """, (int(time.time()),))
+    return cursor.rowcount
+
+
+def _next_txn_id(conn) -> int:
+    """거래 번호 = 이번 거래의 첫 번째 항목 id (AUTOINCREMENT 시퀀스라 압축으로 행을 지워도 재사용되지 않음)"""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'ledger_entries'").fetchone()
+    return (row[0] if row else 0) + 1
+
+
+def _post(conn, kind: str, legs):
+    """복식부기 분개를 기록합니다. legs: (account_id, amount) 목록이며 합계가 0이어야 합니다."""
+    if sum(amount for _, amount in legs) != 0:
+        raise ValueError(f"분개 합계가 0이 아닙니다: {legs}")
+    txn_id = _next_txn_id(conn)
+    created_at = int(time.time())
+    conn.executemany(
+        "INSERT INTO ledger_entries (txn_id, account_id, amount, kind, created_at) VALUES (?, ?, ?, ?, ?)",
+        [(txn_id, int(account_id), amount, ENTRY_KINDS[kind], created_at) for account_id, amount in legs]
+    )
+
+
+def get_balance(conn, user_id: str):
+    row = conn.execute("SELECT balance FROM bank_accounts WHERE user_id = ?", (user_id,)).fetchone()
+    return row[0] if row else None
+
+
+def _require_account(conn, user_id: str) -> int:
+    balance = get_balance(conn, user_id)
+    if balance is None:
+        raise AccountNotFound("통장이 개설되어 있지 않습니다.")
+    return balance
+
+
+def _credit(conn, user_id: str, username: str, amount: int):
+    conn.execute("""
+        INSERT INTO bank_accounts (user_id, username, balance) VALUES (?, ?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET balance = balance + excluded.balance
+    """, (user_id, username, amount))
+
+
+def _debit(conn, user_id: str, amount: int):
+    """잔액이 충분할 때만 차감합니다. 검사와 차감이 한 문장이라 동시에 실행되어도 마이너스 잔액이 생기지 않습니다."""
+    cursor = conn.execute("UPDATE bank_accounts SET balance = balance - ? WHERE user_id = ? AND balance >= ?", (amount, user_id, amount))
+    if cursor.rowcount != 1:
+        balance = _require_account(conn, user_id)
+        raise InsufficientFunds(balance)
+
+
+def _record(conn, rows):
+    """거래 내역을 한 번에 기록합니다. rows: (user_id, username, type, amount, timestamp, related_user_id, related_username, description)"""
+    conn.executemany("""
+        INSERT INTO bank_transactions (user_id, username, type, amount, timestamp, related_user_id, related_username, description)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+
+
+def open_account(conn, user_id: str, username: str) -> bool:
+    """통장을 개설합니다. 이미 있으면 False를 반환합니다."""
+    cursor = conn.execute("INSERT OR IGNORE INTO bank_accounts (user_id, username, balance) VALUES (?, ?, 0)", (user_id, username))
+    return cursor.rowcount == 1
+
+
+def deposit(conn, user_id: str, username: str, amount: int) -> int:
+    _require_account(conn, user_id)
+    _credit(conn, user_id, username, amount)
+    _post(conn, 'deposit', [(user_id, amount), (SYSTEM_CASH, -amount)])
+    _record(conn, [(user_id, username, 'deposit', amount, now_iso(), None, None, f"{amount} 원 입금")])
+    return get_balance(conn, user_id)
+
+
+def withdraw(conn, user_id: str, username: str, amount: int) -> int:
+    _require_account(conn, user_id)
+    _debit(conn, user_id, amount)
+    _post(conn, 'withdrawal', [(user_id, -amount), (SYSTEM_CASH, amount)])
+    _record(conn, [(user_id, username, 'withdrawal', amount, now_iso(), None, None, f"{amount} 원 출금")])
+    return get_balance(conn, user_id)
+
+
+def transfer(conn, sender_id: str, sender_name: str, receiver_id: str, receiver_name: str, amount: int):
+    """송금 후 (보낸 사람 잔액, 받는 사람 잔액)을 반환합니다. 받는 사람 통장이 없으면 새로 만듭니다."""
+    _require_account(conn, sender_id)
+    _debit(conn, sender_id, amount)
+    _credit(conn, receiver_id, receiver_name, amount)
+    _post(conn, 'transfer', [(sender_id, -amount), (receiver_id, amount)])
+    timestamp = now_iso()
+    _record(conn, [
+        (sender_id, sender_name, 'transfer_out', amount, timestamp, receiver_id, receiver_name, f"{receiver_name}님에게 {amount} 원 송금"),
+        (receiver_id, receiver_name, 'transfer_in', amount, timestamp, sender_id, sender_name, f"{sender_name}님으로부터 {amount} 원 입금"),
+    ])
+    return get_balance(conn, sender_id), get_balance(conn, receiver_id)
+
+
+def take_loan(conn, user_id: str, username: str, amount: int, interest_rate: float):
+    """대출을 실행하고 (총 상환 금액, 대출 후 잔액)을 반환합니다. 활성 대출이 있으면 BankError."""
+    _require_account(conn, user_id)
+    if conn.execute("SELECT 1 FROM loans WHERE user_id = ? AND status IN ('active', 'overdue')", (user_id,)).fetchone():
+        raise BankError("이미 활성화된 대출이 있습니다. 기존 대출을 상환해주세요.")
+
+    total_repay_amount = int(amount * (1 + interest_rate)) # 이자 포함 상환 금액 (단순화: 1년 기준)
+    loan_date = datetime.datetime.now(datetime.UTC)
+    _credit(conn, user_id, username, amount)
+    _post(conn, 'loan_taken', [(user_id, amount), (SYSTEM_LOANS, -amount)])
+    conn.execute("""
+        INSERT INTO loans (user_id, username, loan_amount, interest_rate, total_repay_amount, paid_amount, status, loan_date, due_date)
+        VALUES (?, ?, ?, ?, ?, 0, 'active', ?, ?)
+    """, (user_id, username, amount, interest_rate, total_repay_amount, loan_date.isoformat(), (loan_date + datetime.timedelta(days=365)).isoformat()))
+    _record(conn, [(user_id, username, 'loan_taken', amount, loan_date.isoformat(), None, None, f"대출 {amount} 원 받음 (총 상환 {total_repay_amount} 원)")])
+    return total_repay_amount, get_balance(conn, user_id)
+
+
+def repay_loan(conn, user_id: str, username: str, amount: int):
+    """대출을 상환하고 (남은 상환 금액, 상태, 상환 후 잔액)을 반환합니다."""
+    _require_account(conn, user_id)
+    loan = conn.execute("SELECT id, total_repay_amount, paid_amount, status FROM loans WHERE user_id = ? AND status IN ('active', 'overdue')", (user_id,)).fetchone()
+    if not loan:
+        raise BankError("현재 활성화된 대출이 없습니다.")
+    remaining_repay = loan[1] - loan[2]
+    if amount > remaining_repay:
+        raise BankError(f"상환할 금액이 남은 상환 금액({remaining_repay} 원)보다 많습니다. 정확한 금액을 입력해주세요.")
+
+    _debit(conn, user_id, amount)
+    _post(conn, 'loan_repaid', [(user_id, -amount), (SYSTEM_LOANS, amount)])
+    new_status = "paid" if amount >= remaining_repay else loan[3]
+    conn.execute("UPDATE loans SET paid_amount = paid_amount + ?, status = ? WHERE id = ?", (amount, new_status, loan[0]))
+    timestamp = now_iso()
+    conn.execute("INSERT INTO loan_payments (loan_id, user_id, payment_amount, payment_date) VALUES (?, ?, ?, ?)", (loan[0], user_id, amount, timestamp))
+    _record(conn, [(user_id, username, 'loan_repaid', amount, timestamp, None, None, f"대출 {amount} 원 상환")])
+    return remaining_repay - amount, new_status, get_balance(conn, user_id)
+
+
+def pay_fee(conn, user_id: str, username: str, amount: int, description: str):
+    """수수료/세금 등을 차감합니다 (예: 차량 등록세). 차감 후 잔액을 반환합니다."""
+    _debit(conn, user_id, amount)
+    _post(conn, 'fee', [(user_id, -amount), (SYSTEM_FEES, amount)])
+    _record(conn, [(user_id, username, 'fee', amount, now_iso(), None, None, description)])
+    return get_balance(conn, user_id)
+
+
+def refund_fees(conn, refunds) -> dict:
+    """수수료/세금을 여러 명에게 한 번에 돌려줍니다 (예: 검토 시간이 지난 차량 등록세).
+
+    refunds: (user_id, username, amount, description) 목록. 수수료 계정에서 나가는 분개 한 건으로 기록하고 환불 후 잔액 {user_id: balance}를 반환합니다.
+    """
+    refunds = [refund for refund in refunds if refund[2] > 0]
+    if not refunds:
+        return {}
+    conn.executemany("""
+        INSERT INTO bank_accounts (user_id, username, balance) VALUES (?, ?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET balance = balance + excluded.balance
+    """, [(user_id, username, amount) for user_id, username, amount, _ in refunds])
+    legs = [(user_id, amount) for user_id, _, amount, _ in refunds]
+    _post(conn, 'refund', legs + [(SYSTEM_FEES, -sum(amount for _, amount in legs))])
+    timestamp = now_iso()
+    _record(conn, [(user_id, username, 'refund', amount, timestamp, None, None, description) for user_id, username, amount, description in refunds])
+    return load_balances(conn, [user_id for user_id, _, _, _ in refunds])
+
+
+# --- 거래 내역 조회 (bank_transactions, (user_id, timestamp, id) 인덱스 기준 키셋 페이지네이션) ---
+# 표시용 필터 이름 -> bank_transactions.type 값들
+HISTORY_TYPE_FILTERS = {
+    "입금": ("deposit",),
+    "출금": ("withdrawal",),
+    "송금": ("transfer_out", "transfer_in"),
+    "대출": ("loan_taken",),
+    "상환": ("loan_repaid",),
+    "수수료": ("fee",),
+    "이자": ("interest",),
+    "급여": ("payroll",),
+    "환불": ("refund",),
+}
+
+
+def _history_where(user_id: str, types=(), since: str = None, until: str = None):
+    clauses = ["user_id = ?"]
+    params = [user_id]
+    if types:
+        clauses.append(f"type IN ({', '.join('?' * len(types))})")
+        params.extend(types)
+    if since:
+        clauses.append("timestamp >= ?")
+        params.append(since)
+    if until:
+        clauses.append("timestamp < ?")
+        params.append(until)
+    return clauses, params
+
+
+def fetch_history_page(conn, user_id: str, types=(), since: str = None, until: str = None, after=None, before=None, limit: int = 10):
+    """거래 내역 한 페이지를 최신순으로 반환합니다: (rows, 더 있는지).
+
+    after=(timestamp, id)이면 그보다 오래된 페이지, before=(timestamp, id)이면 그보다 최근 페이지를 가져옵니다.
+    OFFSET 대신 마지막으로 본 행의 키로 이어서 읽기 때문에 몇 번째 페이지든 비용이 같습니다.
+    """
+    clauses, params = _history_where(user_id, types, since, until)
+    order = "DESC"
+    if after:
+        clauses.append("(timestamp, id) < (?, ?)")
+        params.extend(after)
+    elif before:
+        clauses.append("(timestamp, id) > (?, ?)")
+        params.extend(before)
+        order = "ASC"
+    rows = conn.execute(f"""
+        SELECT id, type, amount, timestamp, related_username, description FROM bank_transactions
+        WHERE {' AND '.join(clauses)}
+        ORDER BY timestamp {order}, id {order} LIMIT ?
+    """, (*params, limit + 1)).fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if order == "ASC":
+        rows.reverse()
+    return rows, has_more
+
+
+def pay_many(conn, recipients, amount: int, description: str, dry_run: bool = False) -> dict:
+    """여러 명에게 같은 금액을 한 번에 지급합니다 (급여/에어드랍). 통장이 없으면 새로 만듭니다.
+
+    recipients: (user_id, username) 목록. 잔액/원장/거래 내역을 각각 executemany 한 번씩으로 기록하며,
+    반환값의 balances는 지급 후 잔액 {user_id: balance}입니다 (dry_run이면 비어 있음).
+    """
+    started = time.perf_counter()
+    recipients = list(dict(recipients).items()) # 중복 제거
+    existing = load_balances(conn, [user_id for user_id, _ in recipients])
+    summary = {
+        "recipients": len(recipients),
+        "new_accounts": len(recipients) - len(existing),
+        "total": amount * len(recipients),
+        "dry_run": dry_run,
+        "balances": {},
+    }
+    if dry_run or not recipients:
+        summary["elapsed"] = time.perf_counter() - started
+        return summary
+
+    conn.executemany("""
+        INSERT INTO bank_accounts (user_id, username, balance) VALUES (?, ?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET balance = balance + excluded.balance
+    """, [(user_id, username, amount) for user_id, username in recipients])
+
+    # 수령인별 입금 항목 + 지급 계정의 출금 항목 하나 = 합계 0인 분개 한 건
+    txn_id = _next_txn_id(conn)
+    created_at = int(time.time())
+    kind = ENTRY_KINDS['payroll']
+    conn.executemany("INSERT INTO ledger_entries (txn_id, account_id, amount, kind, created_at) VALUES (?, ?, ?, ?, ?)",
+                     [(txn_id, int(user_id), amount, kind, created_at) for user_id, _ in recipients])
+    conn.execute("INSERT INTO ledger_entries (txn_id, account_id, amount, kind, created_at) VALUES (?, ?, ?, ?, ?)",
+                 (txn_id, SYSTEM_PAYROLL, -summary["total"], kind, created_at))
+
+    timestamp = now_iso()
+    _record(conn, [(user_id, username, 'payroll', amount, timestamp, None, None, description) for user_id, username in recipients])
+
+    summary["balances"] = {user_id: existing.get(user_id, 0) + amount for user_id, _ in recipients}
+    summary["elapsed"] = time.perf_counter() - started
+    return summary
+
+
+# --- 경제 작업 (예금 이자 / 대출 연체) ---
+def run_economy_job(conn, now: datetime.datetime = None, force: bool = False) -> dict:
+    """하루 한 번: 연체 이자 부과, 만기 지난 대출 연체 전환(+연체료), 예금 이자 지급.
+
+    모두 집합 연산 SQL로 하나의 트랜잭션에서 처리하며 행마다 파이썬을 거치지 않습니다.
+    같은 날(UTC) 이미 실행했으면 건너뜁니다 (data_versions의 'economy_job' = 마지막 실행일).
+    """
+    started = time.perf_counter()
+    now = now or datetime.datetime.now(datetime.UTC)
+    today = now.date().toordinal()
+    with transaction(conn):
+        last_run = conn.execute("SELECT version FROM data_versions WHERE name = 'economy_job'").fetchone()
+        if last_run and last_run[0] >= today and not force:
+            return {"skipped": True}
+
+        # 1. 이미 연체 중인 대출에 연체 이자 (오늘 새로 연체된 대출은 아래에서 연체료만 붙음)
+        overdue_interest = conn.execute("""
+            UPDATE loans SET total_repay_amount = total_repay_amount + CAST((total_repay_amount - paid_amount) * ? AS INTEGER)
+            WHERE status = 'overdue'
+        """, (OVERDUE_INTEREST_RATE,)).rowcount
+
+        # 2. 만기가 지난 대출을 연체로 전환하고 연체료 부과
+        newly_overdue = conn.execute("""
+            UPDATE loans SET status = 'overdue', total_repay_amount = total_repay_amount + CAST((total_repay_amount - paid_amount) * ? AS INTEGER)
+            WHERE status = 'active' AND due_date < ?
+        """, (OVERDUE_PENALTY_RATE, now.isoformat())).rowcount
+
+        # 3. 예금 이자: 지급액을 임시 테이블에 한 번 계산해두고 잔액/원장/거래 내역에 같은 값을 반영
+        conn.execute("CREATE TEMP TABLE interest_accruals (user_id TEXT PRIMARY KEY, amount INTEGER NOT NULL)")
+        try:
+            conn.execute("""
+                INSERT INTO interest_accruals (user_id, amount)
+                SELECT user_id, CAST(balance * ? AS INTEGER) FROM bank_accounts WHERE CAST(balance * ? AS INTEGER) > 0
+            """, (SAVINGS_INTEREST_RATE, SAVINGS_INTEREST_RATE))
+            credited, interest_total = conn.execute("SELECT COUNT(*), COALESCE(SUM(amount), 0) FROM interest_accruals").fetchone()
+            if credited:
+                conn.execute("""
+                    UPDATE bank_accounts SET balance = balance + a.amount
+                    FROM interest_accruals a WHERE a.user_id = bank_accounts.user_id
+                """)
+                # 계좌별 입금 항목 + 이자 지급 계정의 출금 항목 하나 = 합계 0인 분개 한 건
+                txn_id = _next_txn_id(conn)
+                created_at = int(now.timestamp())
+                conn.execute("""
+                    INSERT INTO ledger_entries (txn_id, account_id, amount, kind, created_at)
+                    SELECT ?, CAST(user_id AS INTEGER), amount, ?, ? FROM interest_accruals
+                """, (txn_id, ENTRY_KINDS['interest'], created_at))
+                conn.execute("INSERT INTO ledger_entries (txn_id, account_id, amount, kind, created_at) VALUES (?, ?, ?, ?, ?)",
+                             (txn_id, SYSTEM_INTEREST, -interest_total, ENTRY_KINDS['interest'], created_at))
+                conn.execute("""
+                    INSERT INTO bank_transactions (user_id, username, type, amount, timestamp, description)
+                    SELECT a.user_id, b.username, 'interest', a.amount, ?, '예금 이자 ' || a.amount || ' 원'
+                    FROM interest_accruals a JOIN bank_accounts b ON b.user_id = a.user_id
+                """, (now.isoformat(),))
+        finally:
+            conn.execute("DROP TABLE temp.interest_accruals")
+
+        conn.execute("""
+            INSERT INTO data_versions (name, version) VALUES ('economy_job', ?)
+            ON CONFLICT(name) DO UPDATE SET version = excluded.version
+        """, (today,))
+
+    return {
+        "skipped": False,
+        "overdue_interest": overdue_interest,
+        "newly_overdue": newly_overdue,
+        "interest_credited": credited,
+        "interest_total": interest_total,
+        "elapsed": time.perf_counter() - started,
+    }
+
+
+# --- 부자 순위 ---
+class WealthLeaderboard:
+    """잔액 순위를 정렬된 리스트로 유지합니다. 잔액이 바뀐 계좌만 이분 탐색으로 제자리 갱신하고, 순위 조회도 O(log n)입니다."""
+    def __init__(self, balances=None):
+        self._balances = dict(balances or {}) # user_id -> balance
+        self._keys = sorted((-balance, user_id) for user_id, balance in self._balances.items()) # 잔액 내림차순
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, user_id):
+        return user_id in self._balances
+
+    def update(self, user_id: str, balance: int) -> bool:
+        """계좌 잔액을 반영합니다. 순위가 바뀔 수 있으면 True를 반환합니다."""
+        old_balance = self._balances.get(user_id)
+        if old_balance == balance:
+            return False
+        if old_balance is not None:
+            del self._keys[bisect.bisect_left(self._keys, (-old_balance, user_id))]
+        self._balances[user_id] = balance
+        bisect.insort(self._keys, (-balance, user_id))
+        return True
+
+    def remove(self, user_id: str) -> bool:
+        old_balance = self._balances.pop(user_id, None)
+        if old_balance is None:
+            return False
+        del self._keys[bisect.bisect_left(self._keys, (-old_balance, user_id))]
+        return True
+
+    def rank(self, user_id: str):
+        """1부터 시작하는 순위 (잔액이 같으면 같은 순위). 계좌가 없으면 None."""
+        balance = self._balances.get(user_id)
+        if balance is None:
+            return None
+        return bisect.bisect_left(self._keys, (-balance,)) + 1
+
+    def balance(self, user_id: str):
+        return self._balances.get(user_id)
+
+    def top(self, count: int):
+        """상위 count명을 [(순위, user_id, balance)]로 반환합니다."""
+        result = []
+        for index, (negative_balance, user_id) in enumerate(self._keys[:count]):
+            rank = result[-1][0] if result and result[-1][2] == -negative_balance else index + 1
+            result.append((rank, user_id, -negative_balance))
+        return result
+
+
+def load_balances(conn, user_ids, chunk_size: int = 500) -> dict:
+    """주어진 유저들 중 통장이 있는 유저의 잔액을 {user_id: balance}로 불러옵니다."""
+    user_ids = list(user_ids)
+    balances = {}
+    for start in range(0, len(user_ids), chunk_size):
+        chunk = user_ids[start:start + chunk_size]
+        rows = conn.execute(f"SELECT user_id, balance FROM bank_accounts WHERE user_id IN ({', '.join('?' * len(chunk))})", chunk)
+        balances.update((row[0], row[1]) for row in rows)
+    return balances
+
+
+# --- 거래 명세서 내보내기 (커서를 돌며 한 줄씩 만들어 gzip으로 압축 - 메모리 사용량 일정) ---
+STATEMENT_FORMATS = ("csv", "ndjson")
+STATEMENT_COLUMNS = ["id", "timestamp", "type", "amount", "related_user_id", "related_username", "description"]
+# 잔액이 줄어드는 거래 유형 (명세서에는 부호 있는 금액으로 기록)
+OUTGOING_TYPES = {"withdrawal", "transfer_out", "loan_repaid", "fee"}
+
+
+def iter_statement_lines(conn, user_id: str, statement_format: str, types=(), since: str = None, until: str = None):
+    """거래 내역을 오래된 순으로 한 줄씩 내보냅니다."""
+    if statement_format not in STATEMENT_FORMATS:
+        raise ValueError(f"지원하지 않는 명세서 형식입니다: {statement_format}")
+    clauses, params = _history_where(user_id, types, since, until)
+    cursor = conn.execute(f"""
+        SELECT id, timestamp, type, amount, related_user_id, related_username, description FROM bank_transactions
+        WHERE {' AND '.join(clauses)} ORDER BY timestamp, id
+    """, params)
+    if statement_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(STATEMENT_COLUMNS)
+        yield buffer.getvalue()
+        for row in cursor:
+            buffer.seek(0)
+            buffer.truncate(0)
+            writer.writerow([row[0], row[1], row[2], -row[3] if row[2] in OUTGOING_TYPES else row[3], row[4] or "", row[5] or "", row[6] or ""])
+            yield buffer.getvalue()
+    else:
+        for row in cursor:
+            item = dict(zip(STATEMENT_COLUMNS, tuple(row)))
+            if row[2] in OUTGOING_TYPES:
+                item["amount"] = -item["amount"]
+            yield json.dumps(item, ensure_ascii=False) + "\n"
+
+
+def iter_gzip_chunks(lines):
+    """문자열 줄들을 gzip 바이트 조각으로 압축해 내보냅니다 (Flask 스트리밍 응답용)."""
+    compressor = zlib.compressobj(wbits=31) # wbits=31: gzip 헤더/트레일러 포함
+    for line in lines:
+        chunk = compressor.compress(line.encode("utf-8"))
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+
+def write_statement(conn, out, user_id: str, statement_format: str, types=(), since: str = None, until: str = None) -> int:
+    """명세서를 gzip으로 압축해 바이너리 파일 객체에 쓰고 거래 건수를 반환합니다."""
+    count = 0
+    lines = iter_statement_lines(conn, user_id, statement_format, types, since, until)
+    if statement_format == "csv":
+        count -= 1 # 헤더 줄 제외
+    with gzip.GzipFile(fileobj=out, mode="wb") as gzip_file:
+        for line in lines:
+            gzip_file.write(line.encode("utf-8"))
+            count += 1
+    return max(count, 0)
+
+
+# --- 스냅샷 / 검증 / 압축 ---
+def take_snapshots(conn) -> int:
+    """모든 계정의 잔액을 현재 원장 끝(최대 id) 기준으로 스냅샷합니다. 직전 스냅샷 이후의 기록만 더합니다."""
+    last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM ledger_entries").fetchone()[0]
+    taken_at = int(time.time())
+    cursor = conn.execute("""
+        INSERT INTO balance_snapshots (account_id, ledger_id, balance, taken_at)
+        SELECT e.account_id, ?, SUM(e.amount), ? FROM ledger_entries e
+        LEFT JOIN balance_snapshots s ON s.account_id = e.account_id
+        WHERE e.id > COALESCE(s.ledger_id, 0) AND e.id <= ?
+        GROUP BY e.account_id
+        ON CONFLICT(account_id) DO UPDATE SET balance = balance + excluded.balance, ledger_id = excluded.ledger_id, taken_at = excluded.taken_at
+    """, (last_id, taken_at, last_id))
+    updated = cursor.rowcount
+    # 새 기록이 없던 계정도 스냅샷 위치를 끝으로 옮겨 압축 기준점이 앞으로 나아가게 함
+    conn.execute("UPDATE balance_snapshots SET ledger_id = ?, taken_at = ? WHERE ledger_id < ?", (last_id, taken_at, last_id))
+    return updated
+
+
+def verify_balances(conn) -> dict:
+    """bank_accounts.balance가 '스냅샷 + 이후 원장 합계'와 같은지 확인합니다. 계정마다 스냅샷 이후 기록만 읽습니다."""
+    rows = conn.execute("""
+        SELECT a.user_id, a.balance,
+               COALESCE(s.balance, 0) + COALESCE((
+                   SELECT SUM(e.amount) FROM ledger_entries e
+                   WHERE e.account_id = CAST(a.user_id AS INTEGER) AND e.id > COALESCE(s.ledger_id, 0)
+               ), 0) AS ledger_balance
+        FROM bank_accounts a
+        LEFT JOIN balance_snapshots s ON s.account_id = CAST(a.user_id AS INTEGER)
+    """).fetchall()
+    mismatches = [(row[0], row[1], row[2]) for row in rows if row[1] != row[2]]
+
+    # 압축되지 않은 구간에서 합계가 0이 아닌 분개(한쪽만 기록된 거래)가 있는지 확인
+    unbalanced = conn.execute("""
+        SELECT COUNT(*) FROM (
+            SELECT txn_id FROM ledger_entries
+            WHERE id > (SELECT COALESCE(MIN(ledger_id), 0) FROM balance_snapshots)
+            GROUP BY txn_id HAVING SUM(amount) != 0
+        )
+    """).fetchone()[0]
+    return {"checked": len(rows), "mismatches": mismatches, "unbalanced_txns": unbalanced}
+
+
+def compact_ledger(conn, retention_days: int = LEDGER_RETENTION_DAYS, archive_dir: str = LEDGER_ARCHIVE_DIR) -> dict:
+    """스냅샷을 새로 찍은 뒤, 보관 기간이 지났고 모든 스냅샷에 포함된 원장 기록을 gzip CSV로 옮기고 삭제합니다."""
+    with transaction(conn):
+        take_snapshots(conn)
+        cutoff_time = int(time.time()) - retention_days * 86400
+        upto_id = conn.execute("""
+            SELECT MIN(
+                (SELECT COALESCE(MIN(ledger_id), 0) FROM balance_snapshots),
+                (SELECT COALESCE(MAX(id), 0) FROM ledger_entries WHERE created_at < ?)
+            )
+        """, (cutoff_time,)).fetchone()[0]
+        first_id = conn.execute("SELECT MIN(id) FROM ledger_entries").fetchone()[0]
+        if not first_id or upto_id < first_id:
+            return {"archived": 0, "file": None}
+
+        os.makedirs(archive_dir, exist_ok=True)
+        archive_path = os.path.join(archive_dir, f"ledger_{first_id:012d}_{upto_id:012d}.csv.gz")
+        archived = 0
+        with gzip.open(archive_path, "wt", encoding="utf-8", newline="") as archive_file:
+            writer = csv.writer(archive_file)
+            writer.writerow(["id", "txn_id", "account_id", "amount", "kind", "created_at"])
+            for row in conn.execute("SELECT id, txn_id, account_id, amount, kind, created_at FROM ledger_entries WHERE id <= ? ORDER BY id", (upto_id,)):
+                writer.writerow(tuple(row))
+                archived += 1
+        conn.execute("DELETE FROM ledger_entries WHERE id <= ?", (upto_id,))
+    return {"archived": archived, "file": archive_path}
+
+
+# --- 벤치마크 (python bank_ledger.py benchmark) ---
+def _create_bench_schema(conn):
+    conn.executescript("""
+        PRAGMA journal_mode=WAL;
+        CREATE TABLE bank_accounts (user_id TEXT PRIMARY KEY, username TEXT NOT NULL, balance INTEGER NOT NULL DEFAULT 0);
+        CREATE TABLE bank_transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, username TEXT NOT NULL, type TEXT NOT NULL,
+            amount INTEGER NOT NULL, timestamp TEXT NOT NULL, related_user_id TEXT, related_username TEXT, description TEXT
+        );
+        CREATE INDEX idx_bank_transactions_user_time ON bank_transactions (user_id, timestamp, id);
+        CREATE TABLE loans (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, username TEXT NOT NULL, loan_amount INTEGER NOT NULL,
+            interest_rate REAL NOT NULL, total_repay_amount INTEGER NOT NULL, paid_amount INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL, loan_date TEXT NOT NULL, due_date TEXT NOT NULL
+        );
+        CREATE INDEX idx_loans_status_due ON loans (status, due_date);
+        CREATE TABLE data_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0);
+        CREATE TABLE car_registrations (id INTEGER PRIMARY KEY AUTOINCREMENT, car_name TEXT, guild_id TEXT, requested_at TEXT);
+        CREATE TABLE user_warnings (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT, reason TEXT, timestamp TEXT);
+        CREATE TABLE tickets (id INTEGER PRIMARY KEY AUTOINCREMENT, reason TEXT, guild_id TEXT, opened_at TEXT);
+    """)
+    ensure_ledger_tables(conn)
+    ensure_idempotency_table(conn)
+    search_index.ensure_search_tables(conn) # 봇과 같은 검색 색인 구성 (거래 내역에 트리거가 붙으면 여기서 측정됨)
+
+
+def _legacy_transfer(conn, sender_id, receiver_id, amount):
+    """기존 Bank._transfer_money 방식: 잔액 확인 후 차감/입금 커밋, 거래 내역을 각각 따로 커밋."""
+    balance = conn.execute("SELECT balance FROM bank_accounts WHERE user_id = ?", (sender_id,)).fetchone()[0]
+    if balance < amount:
+        return False
+    conn.execute("UPDATE bank_accounts SET balance = balance - ? WHERE user_id = ?", (amount, sender_id))
+    conn.execute("INSERT INTO bank_accounts (user_id, username, balance) VALUES (?, ?, ?) ON CONFLICT(user_id) DO UPDATE SET balance = balance + ?", (receiver_id, receiver_id, amount, amount))
+    conn.commit()
+    for row in [(sender_id, sender_id, 'transfer_out', amount, now_iso(), receiver_id, receiver_id, "bench"),
+                (receiver_id, receiver_id, 'transfer_in', amount, now_iso(), sender_id, sender_id, "bench")]:
+        conn.execute("INSERT INTO bank_transactions (user_id, username, type, amount, timestamp, related_user_id, related_username, description) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row)
+        conn.commit()
+    return True
+
+
+def _ledger_transfer(conn, sender_id, receiver_id, amount):
+    try:
+        with transaction(conn):
+            transfer(conn, sender_id, sender_id, receiver_id, receiver_id, amount)
+        return True
+    except InsufficientFunds:
+        return False
+
+
+def _run_bench(mode: str, accounts: int, transfers: int, workers: int, initial_balance: int):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_file = os.path.join(tmp_dir, "bench.db")
+        setup_conn = sqlite3.connect(db_file)
+        _create_bench_schema(setup_conn)
+        setup_conn.executemany("INSERT INTO bank_accounts (user_id, username, balance) VALUES (?, ?, ?)",
+                               [(str(i + 1000), str(i + 1000), initial_balance) for i in range(accounts)])
+        create_opening_snapshots(setup_conn)
+        setup_conn.commit()
+        setup_conn.close()
+
+        transfer_fn = _legacy_transfer if mode == "legacy" else _ledger_transfer
+        per_worker = transfers // workers
+        succeeded = [0] * workers
+
+        def worker(index):
+            rng = random.Random(index)
+            conn = sqlite3.connect(db_file, timeout=30)
+            for _ in range(per_worker):
+                sender, receiver = rng.sample(range(1000, 1000 + accounts), 2) # 시스템 계정(1~3)과 겹치지 않게
+                while True:
+                    try:
+                        if transfer_fn(conn, str(sender), str(receiver), rng.randint(1, initial_balance // 2)):
+                            succeeded[index] += 1
+                        break
+                    except sqlite3.OperationalError: # database is locked - 재시도
+                        conn.rollback()
+            conn.close()
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+        elapsed = time.perf_counter() - started
+
+        check_conn = sqlite3.connect(db_file)
+        total, negatives = check_conn.execute("SELECT SUM(balance), SUM(balance < 0) FROM bank_accounts").fetchone()
+        tx_rows = check_conn.execute("SELECT COUNT(*) FROM bank_transactions").fetchone()[0]
+        ledger_check = verify_balances(check_conn) if mode == "ledger" else None
+        check_conn.close()
+
+        expected_total = accounts * initial_balance
+        print(f"[{mode:>6}] {per_worker * workers:,}건 / {elapsed:.2f}초 = {per_worker * workers / elapsed:,.0f} transfers/sec | "
+              f"성공 {sum(succeeded):,}건 | 총액 {'일치' if total == expected_total else f'불일치 ({total:,} != {expected_total:,})'} | "
+              f"마이너스 잔액 계좌 {negatives}개 | 거래 내역 {tx_rows:,}행 (기대값 {sum(succeeded) * 2:,})"
+              + (f" | 원장 불일치 {len(ledger_check['mismatches'])}개" if ledger_check else ""))
+
+
+def _run_economy_bench(loans: int, accounts: int):
+    """가짜 대출/계좌를 만든 임시 DB에서 경제 작업 한 번의 시간을 잽니다 (준비 시간 제외)."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        conn = sqlite3.connect(os.path.join(tmp_dir, "bench.db"))
+        _create_bench_schema(conn)
+        now = datetime.datetime.now(datetime.UTC)
+        past_due, future_due = (now - datetime.timedelta(days=1)).isoformat(), (now + datetime.timedelta(days=30)).isoformat()
+        conn.executemany("INSERT INTO bank_accounts (user_id, username, balance) VALUES (?, ?, ?)",
+                         ((str(1000 + i), f"user{i}", 10000 + i) for i in range(accounts)))
+        # 3분의 1은 만기가 지났고, 10분의 1은 이미 연체 중
+        conn.executemany("""
+            INSERT INTO loans (user_id, username, loan_amount, interest_rate, total_repay_amount, paid_amount, status, loan_date, due_date)
+            VALUES (?, ?, 100000, 0.032, 103200, 0, ?, ?, ?)
+        """, ((str(1000 + i), f"user{i}", "overdue" if i % 10 == 0 else "active", now.isoformat(), past_due if i % 3 == 0 else future_due) for i in range(loans)))
+        create_opening_snapshots(conn)
+        conn.commit()
+
+        result = run_economy_job(conn, now=now)
+        print(f"경제 작업: 연체 이자 {result['overdue_interest']:,}건, 신규 연체 {result['newly_overdue']:,}건, "
+              f"예금 이자 {result['interest_credited']:,}계좌 / {result['interest_total']:,} 원 | {result['elapsed']:.2f}초")
+        verification = verify_balances(conn)
+        print(f"원장 검증: 불일치 {len(verification['mismatches'])}개, 합계가 맞지 않는 분개 {verification['unbalanced_txns']}개")
+        conn.close()
+
+
+def _run_payroll_bench(recipients: int, existing_accounts: int):
+    """계좌가 있는 임시 DB에서 recipients명에게 한 번에 지급하는 시간을 잽니다 (절반은 기존 계좌, 절반은 신규)."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        conn = sqlite3.connect(os.path.join(tmp_dir, "bench.db"))
+        _create_bench_schema(conn)
+        conn.executemany("INSERT INTO bank_accounts (user_id, username, balance) VALUES (?, ?, ?)",
+                         ((str(1000 + i), f"user{i}", 5000) for i in range(existing_accounts)))
+        create_opening_snapshots(conn)
+        conn.commit()
+
+        start_id = 1000 + existing_accounts - recipients // 2
+        targets = [(str(start_id + i), f"user{start_id + i}") for i in range(recipients)]
+        with transaction(conn):
+            result = pay_many(conn, targets, 1000, "벤치마크 급여")
+        print(f"급여 지급: {result['recipients']:,}명 (신규 통장 {result['new_accounts']:,}개), 총 {result['total']:,} 원 | DB 시간 {result['elapsed'] * 1000:.0f}ms")
+        verification = verify_balances(conn)
+        print(f"원장 검증: 불일치 {len(verification['mismatches'])}개, 합계가 맞지 않는 분개 {verification['unbalanced_txns']}개")
+        conn.close()
+
+
+def _run_idempotency_bench(operations: int):
+    """입금 operations건을 키 없이 / 키와 함께 처리한 속도와, 같은 키를 다시 보냈을 때(재전송)의 속도를 비교합니다."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        conn = sqlite3.connect(os.path.join(tmp_dir, "bench.db"))
+        _create_bench_schema(conn)
+        conn.executemany("INSERT INTO bank_accounts (user_id, username, balance) VALUES (?, ?, 0)", ((str(1000 + i), str(i)) for i in range(100)))
+        conn.commit()
+
+        def timed(label, func):
+            started = time.perf_counter()
+            for i in range(operations):
+                with transaction(conn):
+                    func(i)
+            elapsed = time.perf_counter() - started
+            print(f"{label:<22} {operations:,}건 / {elapsed:.2f}초 = {operations / elapsed:,.0f} ops/sec ({elapsed / operations * 1e6:.0f}µs/건)")
+
+        timed("키 없음", lambda i: deposit(conn, str(1000 + i % 100), "bench", 10))
+        timed("interaction 키", lambda i: run_idempotent(conn, f"i:{i}", deposit, str(1000 + i % 100), "bench", 10))
+        total_before = conn.execute("SELECT SUM(balance) FROM bank_accounts").fetchone()[0]
+        timed("재전송 (DB 조회)", lambda i: run_idempotent(conn, f"i:{i}", deposit, str(1000 + i % 100), "bench", 10))
+        total_after = conn.execute("SELECT SUM(balance) FROM bank_accounts").fetchone()[0]
+        print(f"재전송 후 잔액 합계 변화: {total_after - total_before} (0이어야 함)")
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="저스트봇 은행 원장 도구")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    bench_parser = subparsers.add_parser("benchmark", help="동시 송금 부하 테스트 (기존 방식과 단일 트랜잭션 방식 비교)")
+    bench_parser.add_argument("--accounts", type=int, default=20, help="계좌 수 (적을수록 경합이 심함)")
+    bench_parser.add_argument("--transfers", type=int, default=4000, help="총 송금 횟수")
+    bench_parser.add_argument("--workers", type=int, default=8, help="동시 실행 스레드 수")
+    bench_parser.add_argument("--initial-balance", type=int, default=1000, help="계좌별 초기 잔액")
+    economy_bench_parser = subparsers.add_parser("economy-benchmark", help="대량 대출/계좌로 경제 작업(이자/연체) 성능을 측정합니다.")
+    economy_bench_parser.add_argument("--loans", type=int, default=1000000, help="가짜 대출 수 (기본 1,000,000)")
+    economy_bench_parser.add_argument("--accounts", type=int, default=1000000, help="가짜 계좌 수 (기본 1,000,000)")
+    payroll_bench_parser = subparsers.add_parser("payroll-benchmark", help="대량 급여 지급 성능을 측정합니다.")
+    payroll_bench_parser.add_argument("--recipients", type=int, default=10000, help="수령인 수 (기본 10,000)")
+    payroll_bench_parser.add_argument("--accounts", type=int, default=100000, help="미리 만들어 둘 계좌 수")
+    idempotency_bench_parser = subparsers.add_parser("idempotency-benchmark", help="interaction 중복 처리 방지 계층의 오버헤드를 측정합니다.")
+    idempotency_bench_parser.add_argument("--operations", type=int, default=5000, help="입금 횟수")
+    subparsers.add_parser("economy", help="오늘의 경제 작업(예금 이자, 대출 연체 처리)을 실행합니다.")
+    subparsers.add_parser("snapshot", help="모든 계정의 잔액 스냅샷을 찍습니다.")
+    subparsers.add_parser("verify", help="스냅샷 + 원장 합계가 bank_accounts 잔액과 같은지 검사합니다.")
+    compact_parser = subparsers.add_parser("compact", help="오래된 원장 기록을 압축 파일로 옮기고 삭제합니다.")
+    compact_parser.add_argument("--retention-days", type=int, default=LEDGER_RETENTION_DAYS, help="DB에 남겨둘 기간 (일)")
+    args = parser.parse_args(argv)
+
+    if args.command == "benchmark":
+        for mode in ("legacy", "ledger"):
+            _run_bench(mode, args.accounts, args.transfers, args.workers, args.initial_balance)
+        return
+    if args.command == "idempotency-benchmark":
+        _run_idempotency_bench(args.operations)
+        return
+    if args.command == "payroll-benchmark":
+        _run_payroll_bench(args.recipients, args.accounts)
+        return
+    if args.command == "economy-benchmark":
+        _run_economy_bench(args.loans, args.accounts)
+        return
+
+    conn = sqlite3.connect(DB_FILE, timeout=30)
+    try:
+        ensure_ledger_tables(conn)
+        if args.command == "economy":
+            result = run_economy_job(conn)
+            if result["skipped"]:
+                print("ℹ️ 오늘은 이미 경제 작업을 실행했습니다.")
+            else:
+                print(f"✅ 경제 작업: 연체 이자 {result['overdue_interest']:,}건, 신규 연체 {result['newly_overdue']:,}건, "
+                      f"예금 이자 {result['interest_credited']:,}계좌 / {result['interest_total']:,} 원 ({result['elapsed']:.2f}초)")
+        elif args.command == "snapshot":
+            with transaction(conn):
+                updated = take_snapshots(conn)
+            print(f"✅ 스냅샷 완료: {updated:,}개 계정 갱신")
+        elif args.command == "verify":
+            result = verify_balances(conn)
+            for user_id, balance, ledger_balance in result["mismatches"]:
+                print(f"❌ {user_id}: 잔액 {balance:,} != 원장 {ledger_balance:,}")
+            print(f"{'✅' if not result['mismatches'] and not result['unbalanced_txns'] else '❌'} 검사 {result['checked']:,}개 계좌, "
+                  f"불일치 {len(result['mismatches']):,}개, 합계가 맞지 않는 분개 {result['unbalanced_txns']:,}개")
+        elif args.command == "compact":
+            result = compact_ledger(conn, retention_days=args.retention_days)
+            print(f"✅ 원장 압축: {result['archived']:,}행 보관" + (f" -> {result['file']}" if result['file'] else ""))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+import argparse
+import csv
+import datetime
+import io
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+# 봇과 같은 DB 파일을 사용 (이 스크립트가 있는 프로젝트 루트 기준)
+DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rp_server_data.db")
+
+# 지원하는 피드 형식: csv(user_id,username,reason), ndjson(한 줄에 JSON 객체 하나), ids(한 줄에 ID 하나)
+FEED_FORMATS = ("csv", "ndjson", "ids")
+
+# executemany 한 번에 넘길 행 수 (메모리 사용량 제한)
+BATCH_SIZE = 10000
+
+# 피드에 사용자 이름이 없는 새 항목에 넣는 이름
+UNKNOWN_USERNAME = "알 수 없음"
+
+
+def get_db_connection(db_file=DB_FILE):
+    conn = sqlite3.connect(db_file)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def ensure_tables(conn):
+    """CLI가 봇보다 먼저 실행되어도 동작하도록 필요한 테이블을 만들어 둡니다."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS global_blacklist (
+            user_id TEXT PRIMARY KEY,
+            username TEXT NOT NULL,
+            reason TEXT,
+            added_by TEXT,
+            added_at TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS data_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+
+
+def detect_format(filename: str) -> str:
+    """파일 확장자로 피드 형식을 추측합니다."""
+    lowered = filename.lower()
+    if lowered.endswith(".csv"):
+        return "csv"
+    if lowered.endswith(".ndjson") or lowered.endswith(".jsonl"):
+        return "ndjson"
+    return "ids"
+
+
+def parse_feed(lines, feed_format: str):
+    """피드 줄들을 (user_id, username, reason) 튜플로 하나씩 내보냅니다. 잘못된 줄은 건너뜁니다.
+
+    피드에 없는 값(ids 형식의 이름/사유, 빈 칸)은 None - 가져올 때 기존 값을 그대로 둡니다.
+    """
+    if feed_format == "csv":
+        reader = csv.reader(lines)
+        for row in reader:
+            if not row or not row[0].strip().isdigit(): # 헤더 또는 빈 줄
+                continue
+            user_id = row[0].strip()
+            username = row[1].strip() if len(row) > 1 and row[1].strip() else None
+            reason = row[2].strip() if len(row) > 2 and row[2].strip() else None
+            yield user_id, username, reason
+    elif feed_format == "ndjson":
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            user_id = str(item.get("user_id", "")).strip()
+            if not user_id.isdigit():
+                continue
+            yield user_id, item.get("username") or None, item.get("reason")
+    elif feed_format == "ids":
+        for line in lines:
+            user_id = line.strip()
+            if user_id.isdigit():
+                yield user_id, None, None
+    else:
+        raise ValueError(f"지원하지 않는 피드 형식입니다: {feed_format}")
+
+
+def _chunks(items, size=BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def import_blacklist(conn, entries, replace=False, added_by="import", dry_run=False) -> dict:
+    """들어온 목록을 현재 테이블과 비교해서 바뀐 부분만 하나의 트랜잭션으로 반영합니다.
+
+    이미 있는 항목은 피드의 이름/사유가 다를 때만 갱신하고(피드에 없는 값은 유지), added_by/added_at은 바꾸지 않습니다.
+    replace=True이면 피드에 없는 기존 항목은 삭제합니다 (피드를 원본으로 동기화).
+    """
+    started = time.perf_counter()
+    ensure_tables(conn)
+
+    incoming = {}
+    for user_id, username, reason in entries:
+        incoming[user_id] = (username, reason)
+
+    current = {row[0]: (row[1], row[2]) for row in conn.execute("SELECT user_id, username, reason FROM global_blacklist")}
+    to_add = sorted(incoming.keys() - current.keys())
+    to_update = []
+    for user_id in sorted(incoming.keys() & current.keys()):
+        username, reason = incoming[user_id]
+        old_username, old_reason = current[user_id]
+        merged = (username if username is not None else old_username, reason if reason is not None else old_reason)
+        if merged != (old_username, old_reason):
+            to_update.append((merged[0], merged[1], user_id))
+    to_remove = sorted(current.keys() - incoming.keys()) if replace else []
+
+    if not dry_run and (to_add or to_update or to_remove):
+        now = datetime.datetime.now(datetime.UTC).isoformat()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for batch in _chunks(to_add):
+                conn.executemany(
+                    "INSERT OR IGNORE INTO global_blacklist (user_id, username, reason, added_by, added_at) VALUES (?, ?, ?, ?, ?)",
+                    [(user_id, incoming[user_id][0] or UNKNOWN_USERNAME, incoming[user_id][1], added_by, now) for user_id in batch]
+                )
+            for batch in _chunks(to_update):
+                conn.executemany("UPDATE global_blacklist SET username = ?, reason = ? WHERE user_id = ?", batch)
+            for batch in _chunks(to_remove):
+                conn.executemany("DELETE FROM global_blacklist WHERE user_id = ?", [(user_id,) for user_id in batch])
+            # 봇이 메모리 사본을 다시 불러오도록 버전 증가
+            conn.execute("""
+                INSERT INTO data_versions (name, version) VALUES ('global_blacklist', 1)
+                ON CONFLICT(name) DO UPDATE SET version = version + 1
+            """)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    return {
+        "received": len(incoming),
+        "added": len(to_add),
+        "updated": len(to_update),
+        "removed": len(to_remove),
+        "unchanged": len(incoming) - len(to_add) - len(to_update),
+        "dry_run": dry_run,
+        "elapsed": time.perf_counter() - started,
+    }
+
+
+def iter_export_lines(conn, feed_format: str):
+    """블랙리스트를 지정한 형식의 줄 단위로 내보냅니다. 커서를 돌며 한 줄씩 만들기 때문에 메모리 사용량이 일정합니다."""
+    if feed_format not in FEED_FORMATS:
+        raise ValueError(f"지원하지 않는 피드 형식입니다: {feed_format}")
+    ensure_tables(conn)
+    cursor = conn.execute("SELECT user_id, username, reason FROM global_blacklist ORDER BY user_id")
+    if feed_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["user_id", "username", "reason"])
+        yield buffer.getvalue() # 빈 테이블이어도 헤더는 내보냄
+        buffer.seek(0)
+        buffer.truncate(0)
+        for row in cursor:
+            writer.writerow([row[0], row[1], row[2] or ""])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    elif feed_format == "ndjson":
+        for row in cursor:
+            yield json.dumps({"user_id": row[0], "username": row[1], "reason": row[2]}, ensure_ascii=False) + "\n"
+    else:
+        for row in cursor:
+            yield row[0] + "\n"
+
+
+def export_blacklist(conn, out, feed_format: str) -> int:
+    """블랙리스트 전체를 파일 객체에 쓰고 내보낸 항목 수(CSV 헤더 제외)를 반환합니다."""
+    lines = iter_export_lines(conn, feed_format)
+    if feed_format == "csv":
+        out.write(next(lines))
+    count = 0
+    for line in lines:
+        out.write(line)
+        count += 1
+    return count
+
+
+def run_benchmark(count: int):
+    """임시 DB에 가짜 ID count개를 가져오고(신규), 같은 피드를 다시 가져와(변경 없음) 시간을 잽니다."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        conn = get_db_connection(os.path.join(tmp_dir, "bench.db"))
+        feed = "\n".join(str(100000000000000000 + i) for i in range(count))
+
+        first = import_blacklist(conn, parse_feed(io.StringIO(feed), "ids"), added_by="benchmark")
+        print(f"최초 가져오기: {first['added']:,}개 추가, {first['elapsed']:.2f}초")
+
+        second = import_blacklist(conn, parse_feed(io.StringIO(feed), "ids"), added_by="benchmark")
+        print(f"재가져오기(변경 없음): {second['added']:,}개 추가, {second['elapsed']:.2f}초")
+
+        # 10%를 빼고 새 ID 10%를 넣은 피드로 동기화
+        shifted = "\n".join(str(100000000000000000 + i) for i in range(count // 10, count + count // 10))
+        third = import_blacklist(conn, parse_feed(io.StringIO(shifted), "ids"), replace=True, added_by="benchmark")
+        print(f"동기화(replace): {third['added']:,}개 추가, {third['removed']:,}개 삭제, {third['elapsed']:.2f}초")
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="저스트봇 글로벌 블랙리스트 일괄 가져오기/내보내기 도구")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="피드 파일에서 블랙리스트를 가져옵니다.")
+    import_parser.add_argument("file", help="가져올 파일 경로 (- 이면 표준 입력)")
+    import_parser.add_argument("--format", choices=FEED_FORMATS, help="피드 형식 (생략 시 확장자로 추측)")
+    import_parser.add_argument("--replace", action="store_true", help="피드에 없는 기존 항목은 삭제합니다.")
+    import_parser.add_argument("--dry-run", action="store_true", help="변경 사항만 계산하고 DB에 반영하지 않습니다.")
+    import_parser.add_argument("--added-by", default="cli", help="added_by 컬럼에 기록할 값")
+
+    export_parser = subparsers.add_parser("export", help="블랙리스트를 파일로 내보냅니다.")
+    export_parser.add_argument("file", help="내보낼 파일 경로 (- 이면 표준 출력)")
+    export_parser.add_argument("--format", choices=FEED_FORMATS, help="피드 형식 (생략 시 확장자로 추측)")
+
+    bench_parser = subparsers.add_parser("benchmark", help="임시 DB로 대량 가져오기 성능을 측정합니다.")
+    bench_parser.add_argument("--count", type=int, default=1000000, help="생성할 가짜 ID 개수 (기본 1,000,000)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "benchmark":
+        run_benchmark(args.count)
+        return
+
+    feed_format = args.format or detect_format(args.file)
+    conn = get_db_connection()
+    try:
+        if args.command == "import":
+            source = sys.stdin if args.file == "-" else open(args.file, encoding="utf-8", newline="")
+            try:
+                result = import_blacklist(conn, parse_feed(source, feed_format), replace=args.replace, added_by=args.added_by, dry_run=args.dry_run)
+            finally:
+                if source is not sys.stdin: source.close()
+            prefix = "🔍 (dry-run) " if result["dry_run"] else "✅ "
+            print(f"{prefix}블랙리스트 가져오기: 수신 {result['received']:,}개, 추가 {result['added']:,}개, 갱신 {result['updated']:,}개, 삭제 {result['removed']:,}개 ({result['elapsed']:.2f}초)")
+        elif args.command == "export":
+            out = sys.stdout if args.file == "-" else open(args.file, "w", encoding="utf-8", newline="")
+            try:
+                count = export_blacklist(conn, out, feed_format)
+            finally:
+                if out is not sys.stdout: out.close()
+            if out is not sys.stdout:
+                print(f"✅ 블랙리스트 {count:,}개를 '{args.file}'(으)로 내보냈습니다.")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
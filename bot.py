@@ -6,6 +6,9 @@ import sqlite3
 import datetime
 import google.generativeai as genai # Gemini AI 라이브러리 임포트
 
+import bank_ledger
+import search_index
+
 from discord import app_commands 
 
 load_dotenv()
@@ -23,6 +26,9 @@ def initialize_db():
     conn = get_db_connection()
     cursor = conn.cursor()
 
+    # WAL 모드: 쓰기(BEGIN IMMEDIATE 트랜잭션) 중에도 대시보드/다른 연결의 읽기가 막히지 않도록 설정 (DB 파일에 영구 저장됨)
+    cursor.execute("PRAGMA journal_mode=WAL")
+
     # 공통 테이블: 봇 상태
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS bot_status (
@@ -72,7 +78,15 @@ def initialize_db():
             invite_filter_enabled INTEGER DEFAULT 0, -- 초대 링크 필터링 활성화 (0: 비활성화, 1: 활성화)
             spam_filter_enabled INTEGER DEFAULT 0,   -- 도배 감지 필터링 활성화 (0: 비활성화, 1: 활성화)
             spam_threshold INTEGER DEFAULT 5,        -- 도배로 간주할 메시지 개수
-            spam_time_window INTEGER DEFAULT 10      -- 도배 감지 시간 범위 (초)
+            spam_time_window INTEGER DEFAULT 10,     -- 도배 감지 시간 범위 (초)
+
+            -- 레이드 감지 설정 --
+            raid_protection_enabled INTEGER DEFAULT 0, -- 입장 급증 시 자동 잠금 모드 (0: 비활성화, 1: 활성화)
+            raid_join_threshold INTEGER DEFAULT 10,    -- 레이드로 간주할 입장 인원
+            raid_join_window INTEGER DEFAULT 10,       -- 입장 인원을 세는 시간 범위 (초)
+            raid_lockdown_duration INTEGER DEFAULT 300, -- 마지막 급증 이후 잠금 모드 유지 시간 (초)
+            quarantine_role_id TEXT,                   -- 잠금 모드 중 입장한 멤버에게 부여할 격리 역할
+            car_timeout_refund_enabled INTEGER DEFAULT 0 -- 검토 시간이 지난 차량 신청의 등록세 환불 여부
         )
     """)
     # 만약 guild_name 컬럼이 없는 경우 추가 (기존 DB 파일 호환성)
@@ -89,6 +103,21 @@ def initialize_db():
     cursor.execute("ALTER TABLE server_configs ADD COLUMN IF NOT EXISTS spam_time_window INTEGER DEFAULT 10")
     cursor.execute("ALTER TABLE server_configs ADD COLUMN IF NOT EXISTS bank_channel_id TEXT") # <--- 추가: 은행 채널 ID
 
+    # 레이드 감지 등 나중에 추가된 컬럼들이 없는 경우 추가 (SQLite는 ADD COLUMN IF NOT EXISTS를 지원하지 않으므로 하나씩 확인)
+    for column_name, column_def in [
+        ("raid_protection_enabled", "INTEGER DEFAULT 0"),
+        ("raid_join_threshold", "INTEGER DEFAULT 10"),
+        ("raid_join_window", "INTEGER DEFAULT 10"),
+        ("raid_lockdown_duration", "INTEGER DEFAULT 300"),
+        ("quarantine_role_id", "TEXT"),
+        ("car_timeout_refund_enabled", "INTEGER DEFAULT 0"), # 검토 시간이 지난 차량 신청의 등록세 환불 여부
+    ]:
+        try:
+            cursor.execute(f"SELECT {column_name} FROM server_configs LIMIT 1")
+        except sqlite3.OperationalError:
+            cursor.execute(f"ALTER TABLE server_configs ADD COLUMN {column_name} {column_def}")
+            print(f"✅ server_configs 테이블에 '{column_name}' 컬럼을 추가했습니다.")
+
     # 새로운 공통 테이블: 서버별 커맨드 활성화/비활성화 상태
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS server_command_states (
@@ -124,7 +153,7 @@ def initialize_db():
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             user_id TEXT NOT NULL,
             username TEXT NOT NULL,
-            type TEXT NOT NULL, -- 'deposit', 'withdrawal', 'transfer_out', 'transfer_in', 'loan_taken', 'loan_repaid'
+            type TEXT NOT NULL, -- 'deposit', 'withdrawal', 'transfer_out', 'transfer_in', 'loan_taken', 'loan_repaid', 'fee', 'interest'
             amount INTEGER NOT NULL,
             timestamp TEXT NOT NULL,
             related_user_id TEXT,
@@ -132,6 +161,8 @@ def initialize_db():
             description TEXT
         )
     """)
+    # 거래 내역 키셋 페이지네이션용 인덱스 (유저별 최신순 조회)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_bank_transactions_user_time ON bank_transactions (user_id, timestamp, id)")
     # 차량 등록 테이블
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS car_registrations (
@@ -152,6 +183,24 @@ def initialize_db():
             timed_out_at TEXT
         )
     """)
+    # 검토 요청 메시지 위치 (재시작 후에도 만료된 신청의 버튼을 비활성화할 수 있도록 저장)
+    for column_name in ("admin_channel_id", "admin_message_id"):
+        try:
+            cursor.execute(f"SELECT {column_name} FROM car_registrations LIMIT 1")
+        except sqlite3.OperationalError:
+            cursor.execute(f"ALTER TABLE car_registrations ADD COLUMN {column_name} TEXT")
+            print(f"✅ car_registrations 테이블에 '{column_name}' 컬럼을 추가했습니다.")
+    # 검토 시간 초과 일괄 처리용 인덱스 (status = '검토중' AND requested_at < ?)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_car_registrations_status_requested ON car_registrations (status, requested_at)")
+    # 대시보드에서 일괄 승인/거부한 신청 - 봇이 등록증 게시/DM/버튼 비활성화를 마치면 삭제
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS car_review_notifications (
+            registration_id INTEGER PRIMARY KEY,
+            action TEXT NOT NULL,              -- approve / reject
+            refunded INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL
+        )
+    """)
     # 사용자 경고 테이블
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS user_warnings (
@@ -230,6 +279,96 @@ def initialize_db():
             FOREIGN KEY (loan_id) REFERENCES loans(id)
         )
     """)
+    # 경제 작업(연체 전환)과 유저별 대출 조회용 인덱스
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_loans_status_due ON loans (status, due_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_loans_user_status ON loans (user_id, status)")
+
+    # 봇 백그라운드 작업 지표 (DM 큐 전송 수/지연 시간 등, 대시보드에서 조회)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS bot_metrics (
+            name TEXT PRIMARY KEY,
+            value REAL NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+    """)
+
+    # 음악 곡 정보 캐시: 영상 ID별 제목/길이 (스트림 URL은 만료되므로 메모리에만 보관)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS music_tracks (
+            video_id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            duration INTEGER,
+            webpage_url TEXT,
+            updated_at TEXT NOT NULL
+        )
+    """)
+    # 자주 재생되는 곡의 디스크 캐시 (재생 횟수, 마지막 재생 시각, 저장된 오디오 파일)
+    for column_name, column_def in (
+        ("play_count", "INTEGER NOT NULL DEFAULT 0"),
+        ("last_played_at", "TEXT"),
+        ("audio_path", "TEXT"),
+        ("audio_size", "INTEGER"),
+    ):
+        try:
+            cursor.execute(f"SELECT {column_name} FROM music_tracks LIMIT 1")
+        except sqlite3.OperationalError:
+            cursor.execute(f"ALTER TABLE music_tracks ADD COLUMN {column_name} {column_def}")
+
+    # 중복 처리 방지: 처리한 interaction(또는 메시지) ID와 결과 (보관 기간이 지나면 은행 정리 작업에서 삭제)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS processed_interactions (
+            interaction_id TEXT PRIMARY KEY,
+            operation TEXT NOT NULL,
+            result TEXT NOT NULL,
+            created_at INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_processed_interactions_created ON processed_interactions (created_at)")
+
+    # 복식부기 원장: 거래마다 계정별 항목(leg) 한 줄씩, 정수 컬럼만 저장 (한 거래의 amount 합계는 0)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ledger_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            txn_id INTEGER NOT NULL,
+            account_id INTEGER NOT NULL,
+            amount INTEGER NOT NULL,
+            kind INTEGER NOT NULL,
+            created_at INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ledger_entries_account ON ledger_entries (account_id, id)")
+    # 계정별 최신 잔액 스냅샷: 잔액 검증은 ledger_id 이후의 원장 항목만 더하면 됨
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS balance_snapshots (
+            account_id INTEGER PRIMARY KEY,
+            ledger_id INTEGER NOT NULL,
+            balance INTEGER NOT NULL,
+            taken_at INTEGER NOT NULL
+        )
+    """)
+    # 길드별 부자 순위 상위 N명 (봇이 메모리 순위에서 바뀐 길드만 저장, 대시보드가 읽음)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS guild_leaderboards (
+            guild_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            rank INTEGER NOT NULL,
+            user_id TEXT NOT NULL,
+            username TEXT NOT NULL,
+            balance INTEGER NOT NULL,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (guild_id, position)
+        )
+    """)
+    # 길드별 멤버 목록 (서버 구분 없이 저장되는 경고/거래 기록을 검색할 때 이 서버 멤버의 기록으로 범위를 좁히는 데 사용)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS guild_members (
+            guild_id TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            PRIMARY KEY (guild_id, user_id)
+        ) WITHOUT ROWID
+    """)
+    # 원장 도입 전부터 있던 계좌 잔액을 시작 스냅샷으로 기록
+    bank_ledger.create_opening_snapshots(conn)
 
     # 악성 사용자 블랙리스트 테이블 (개념적인 구현)
     cursor.execute("""
@@ -241,9 +380,21 @@ def initialize_db():
             added_at TEXT
         )
     """)
+    # 데이터 버전 테이블: 대시보드/CLI가 데이터를 일괄 변경하면 버전을 올리고, 봇은 버전이 바뀌었을 때만 메모리 사본을 다시 불러옴
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS data_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
     # 테스트용 블랙리스트 사용자 추가 (예시)
     cursor.execute("INSERT OR IGNORE INTO global_blacklist (user_id, username, reason, added_by, added_at) VALUES ('123456789012345678', '테스트악성유저', '자동화 도배 봇', 'system', datetime('now'))")
     cursor.execute("INSERT OR IGNORE INTO global_blacklist (user_id, username, reason, added_by, added_at) VALUES ('987654321098765432', '광고용계정', '스팸 광고', 'system', datetime('now'))")
+    conn.commit()
+
+    # 차량/경고/티켓/거래 전문 검색 색인 (FTS5) - 처음 만들 때 기존 기록으로 채움
+    for fts in search_index.ensure_search_tables(conn):
+        print(f"🔎 검색 색인 '{fts}' 생성 완료")
 
 
     conn.commit()
@@ -318,6 +469,26 @@ def set_bot_presence_settings(status, activity_type, activity_name):
     conn.commit()
     conn.close()
 
+# 데이터 버전 불러오기 (메모리 캐시 무효화 확인용)
+def get_data_version(name: str) -> int:
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT version FROM data_versions WHERE name = ?", (name,))
+    result = cursor.fetchone()
+    conn.close()
+    return result['version'] if result else 0
+
+# 백그라운드 작업 지표 기록 (대시보드 개요 페이지에서 조회)
+def record_metrics(metrics: dict):
+    now = datetime.datetime.now(datetime.UTC).isoformat()
+    conn = get_db_connection()
+    conn.executemany("""
+        INSERT INTO bot_metrics (name, value, updated_at) VALUES (?, ?, ?)
+        ON CONFLICT(name) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+    """, [(name, value, now) for name, value in metrics.items()])
+    conn.commit()
+    conn.close()
+
 initialize_db()
 
 # Gemini AI 초기화
@@ -403,6 +574,8 @@ async def on_ready():
     bot.set_command_enabled_state = set_command_enabled_state
     bot.get_bot_presence_settings = get_bot_presence_settings # 대시보드에서 불러올 함수
     bot.set_bot_presence_settings = set_bot_presence_settings # 대시보드에서 업데이트할 함수
+    bot.get_data_version = get_data_version
+    bot.record_metrics = record_metrics
 
     # Gemini AI 모델도 bot 객체에 저장 (Gemini AI 키가 있다면)
     if GEMINI_API_KEY:
@@ -421,6 +594,8 @@ async def on_ready():
         "cogs.moderation", 
         "cogs.music", 
         "cogs.game", 
+        "cogs.welcome", 
+        "cogs.dm", 
     ]
     for cog in cogs_to_load:
         try:
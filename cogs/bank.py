@@ -1,15 +1,293 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 import datetime
 import sqlite3 
 import json # JSON 처리 임포트
+import asyncio
+import collections
+import contextlib
+import tempfile
+import re
+
+import bank_ledger
+
+NO_ACCOUNT_MESSAGE = "❌ 통장이 개설되어 있지 않습니다. `/통장개설`을 먼저 이용해주세요."
+
+# 거래 내역 한 페이지에 보여줄 건수
+HISTORY_PAGE_SIZE = 10
+# 명세서 파일을 이 크기까지는 메모리에, 넘으면 임시 파일에 씀
+STATEMENT_SPOOL_SIZE = 1024 * 1024
+# /부자순위에 보여주고 대시보드용으로 저장할 인원, 저장 주기(초)
+LEADERBOARD_SIZE = 10
+LEADERBOARD_FLUSH_INTERVAL = 60
+# 최근 처리한 interaction 결과를 메모리에 보관할 개수 (넘치면 DB 기록으로 확인)
+IDEMPOTENCY_CACHE_SIZE = 2048
 
 class Bank(commands.Cog):
+    class TransactionHistoryPages(discord.ui.View):
+        """거래 내역을 페이지 단위로 넘겨보는 버튼 뷰 (페이지를 넘길 때마다 해당 페이지 행만 DB에서 읽음)"""
+        def __init__(self, cog, user: discord.User, filters: dict, rows: list, has_older: bool):
+            super().__init__(timeout=300)
+            self.cog = cog
+            self.user = user
+            self.filters = filters
+            self.rows = rows
+            self.page = 1
+            self.has_older = has_older
+            self.has_newer = False
+            self._update_buttons()
+
+        def _update_buttons(self):
+            self.prev_button.disabled = not self.has_newer
+            self.next_button.disabled = not self.has_older
+
+        def build_embed(self) -> discord.Embed:
+            embed = discord.Embed(
+                title=f"💰 {self.user.display_name}님의 거래 내역",
+                description="\n".join(_format_transaction(tx) for tx in self.rows) or "이 페이지에 거래 내역이 없습니다.",
+                color=discord.Color.gold()
+            )
+            embed.set_footer(text=f"{self.page} 페이지 | {self.filters['label']}")
+            return embed
+
+        async def interaction_check(self, interaction: discord.Interaction) -> bool:
+            if interaction.user.id != self.user.id:
+                await interaction.response.send_message("❌ 본인의 거래 내역만 넘겨볼 수 있습니다.", ephemeral=True)
+                return False
+            return True
+
+        async def _move(self, interaction: discord.Interaction, older: bool):
+            edge = self.rows[-1] if older else self.rows[0]
+            key = (edge['timestamp'], edge['id'])
+            rows, has_more = await asyncio.to_thread(
+                self.cog._load_history_page, str(self.user.id), self.filters,
+                after=key if older else None, before=None if older else key
+            )
+            if older:
+                self.has_older = has_more
+                if rows:
+                    self.rows, self.page, self.has_newer = rows, self.page + 1, True
+            else:
+                self.has_newer = has_more
+                if rows:
+                    self.rows, self.page, self.has_older = rows, max(1, self.page - 1), True
+            self._update_buttons()
+            await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+        @discord.ui.button(label="◀ 이전", style=discord.ButtonStyle.secondary)
+        async def prev_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+            await self._move(interaction, older=False)
+
+        @discord.ui.button(label="다음 ▶", style=discord.ButtonStyle.secondary)
+        async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+            await self._move(interaction, older=True)
+
+        async def on_timeout(self):
+            for item in self.children:
+                item.disabled = True
+            if getattr(self, 'message', None):
+                try: await self.message.edit(view=self)
+                except discord.HTTPException: pass
+
     def __init__(self, bot):
         self.bot = bot
         self.get_db_connection = bot.get_db_connection
         self.get_server_config = bot.get_server_config # 서버 설정 함수 주입
+        self.account_locks = collections.defaultdict(asyncio.Lock) # user_id -> 계좌 잠금 (같은 계좌 작업을 순서대로 처리)
+        self.account_lock_users = collections.Counter() # user_id -> 잠금을 잡고 있거나 기다리는 작업 수 (0이 되면 잠금 삭제)
+        # 길드별 부자 순위 {guild_id: WealthLeaderboard} - 은행 작업마다 바뀐 계좌만 갱신
+        self.leaderboards = {}
+        self.building_leaderboards = {} # 불러오는 중인 순위 (그 사이의 변경분을 먼저 반영)
+        self.leaderboard_tasks = {}
+        self.dirty_leaderboards = set()
+        self.saved_leaderboard_tops = {} # 마지막으로 DB에 저장한 상위 N명 (바뀐 길드만 다시 저장)
+        self.processed_interactions = collections.OrderedDict() # 중복 처리 방지 키 -> 결과 (LRU)
+        self.ledger_maintenance.start()
+        self.economy_job.start()
+        self.build_leaderboards.start()
+        self.flush_leaderboards.start()
+
+    def cog_unload(self):
+        self.ledger_maintenance.cancel()
+        self.economy_job.cancel()
+        self.build_leaderboards.cancel()
+        self.flush_leaderboards.cancel()
+
+    def _maintain_ledger(self):
+        conn = self.get_db_connection()
+        try:
+            compacted = bank_ledger.compact_ledger(conn)
+            verification = bank_ledger.verify_balances(conn)
+            with bank_ledger.transaction(conn):
+                bank_ledger.purge_processed_interactions(conn)
+        finally:
+            conn.close()
+        return compacted, verification
+
+    # 하루에 한 번 잔액 스냅샷을 찍고 보관 기간이 지난 원장 기록을 압축 파일로 옮긴 뒤 잔액을 검증
+    @tasks.loop(hours=24)
+    async def ledger_maintenance(self):
+        try:
+            compacted, verification = await asyncio.to_thread(self._maintain_ledger)
+        except Exception as e:
+            print(f"원장 정리 중 오류 발생: {e}")
+            return
+        if compacted['archived']:
+            print(f"원장 압축: {compacted['archived']}행 -> {compacted['file']}")
+        if verification['mismatches'] or verification['unbalanced_txns']:
+            print(f"⚠️ 원장 검증 실패: 잔액 불일치 {len(verification['mismatches'])}개, 합계가 맞지 않는 분개 {verification['unbalanced_txns']}개")
+
+    def _run_economy_job(self):
+        conn = self.get_db_connection()
+        try:
+            return bank_ledger.run_economy_job(conn)
+        finally:
+            conn.close()
+
+    # 매시간 확인해서 UTC 기준 하루에 한 번만 예금 이자 지급 / 대출 연체 처리 (재시작해도 중복 실행되지 않음)
+    @tasks.loop(hours=1)
+    async def economy_job(self):
+        try:
+            result = await asyncio.to_thread(self._run_economy_job)
+        except Exception as e:
+            print(f"경제 작업 중 오류 발생: {e}")
+            return
+        if result['skipped']:
+            return
+        print(f"경제 작업 완료: 연체 이자 {result['overdue_interest']}건, 신규 연체 {result['newly_overdue']}건, "
+              f"예금 이자 {result['interest_credited']}계좌 / {result['interest_total']} 원 ({result['elapsed']:.2f}초)")
+        if result['interest_credited']:
+            # 대부분의 잔액이 한꺼번에 바뀌었으므로 계좌별로 갱신하는 대신 순위를 다시 만듦
+            self.leaderboards.clear()
+            self.saved_leaderboard_tops.clear()
+            if not self.build_leaderboards.is_running():
+                self.build_leaderboards.start()
+
+    @economy_job.before_loop
+    async def before_economy_job(self):
+        await self.bot.wait_until_ready()
+
+    # --- 부자 순위 ---
+    def _load_balances(self, user_ids):
+        conn = self.get_db_connection()
+        try:
+            return bank_ledger.load_balances(conn, user_ids)
+        finally:
+            conn.close()
+
+    async def _build_leaderboard(self, guild: discord.Guild):
+        leaderboard = bank_ledger.WealthLeaderboard()
+        self.building_leaderboards[guild.id] = leaderboard
+        try:
+            if guild.chunked:
+                member_ids = [str(member.id) for member in guild.members if not member.bot]
+            else:
+                member_ids = [str(member.id) async for member in guild.fetch_members(limit=None) if not member.bot]
+            balances = await asyncio.to_thread(self._load_balances, member_ids)
+        finally:
+            del self.building_leaderboards[guild.id]
+        for user_id, balance in balances.items():
+            if user_id not in leaderboard: # 불러오는 동안 바뀐 계좌는 더 최신 값이 이미 들어 있음
+                leaderboard.update(user_id, balance)
+        self.leaderboards[guild.id] = leaderboard
+        self.dirty_leaderboards.add(guild.id)
+        return leaderboard
+
+    async def _get_leaderboard(self, guild: discord.Guild):
+        if guild.id in self.leaderboards:
+            return self.leaderboards[guild.id]
+        task = self.leaderboard_tasks.get(guild.id)
+        if task is None:
+            task = self.leaderboard_tasks[guild.id] = asyncio.create_task(self._build_leaderboard(guild))
+            task.add_done_callback(lambda _: self.leaderboard_tasks.pop(guild.id, None))
+        return await task
+
+    def update_leaderboards(self, user_id: str, balance: int):
+        """잔액이 바뀐 계좌를 그 유저가 속한 길드 순위에 반영합니다. (다른 코그에서 잔액을 바꾼 뒤에도 호출)"""
+        for guild_id, leaderboard in [*self.leaderboards.items(), *self.building_leaderboards.items()]:
+            if user_id not in leaderboard:
+                guild = self.bot.get_guild(guild_id)
+                if not guild or not guild.get_member(int(user_id)):
+                    continue
+            if leaderboard.update(user_id, balance):
+                self.dirty_leaderboards.add(guild_id)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        leaderboard = self.leaderboards.get(member.guild.id)
+        if leaderboard is None or member.bot:
+            return
+        balance = (await asyncio.to_thread(self._load_balances, [str(member.id)])).get(str(member.id))
+        if balance is not None and leaderboard.update(str(member.id), balance):
+            self.dirty_leaderboards.add(member.guild.id)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        leaderboard = self.leaderboards.get(member.guild.id)
+        if leaderboard is not None and leaderboard.remove(str(member.id)):
+            self.dirty_leaderboards.add(member.guild.id)
+
+    # 봇이 준비되면 모든 길드의 순위를 한 번 만들어 둠 (이후로는 은행 작업마다 증분 갱신)
+    @tasks.loop(count=1)
+    async def build_leaderboards(self):
+        for guild in self.bot.guilds:
+            try:
+                await self._get_leaderboard(guild)
+            except discord.HTTPException as e:
+                print(f"부자 순위 생성 실패 (서버 {guild.id}): {e}")
+
+    @build_leaderboards.before_loop
+    async def before_build_leaderboards(self):
+        await self.bot.wait_until_ready()
+
+    def _save_leaderboards(self, rows_by_guild: dict):
+        conn = self.get_db_connection()
+        try:
+            with bank_ledger.transaction(conn):
+                for guild_id, rows in rows_by_guild.items():
+                    conn.execute("DELETE FROM guild_leaderboards WHERE guild_id = ?", (guild_id,))
+                    conn.executemany("""
+                        INSERT INTO guild_leaderboards (guild_id, position, rank, user_id, username, balance, updated_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """, rows)
+        finally:
+            conn.close()
+
+    # 상위 N명이 바뀐 길드만 guild_leaderboards 테이블에 저장 (대시보드가 이 테이블을 읽음)
+    @tasks.loop(seconds=LEADERBOARD_FLUSH_INTERVAL)
+    async def flush_leaderboards(self):
+        dirty, self.dirty_leaderboards = self.dirty_leaderboards, set()
+        changed_tops = {}
+        for guild_id in dirty:
+            leaderboard = self.leaderboards.get(guild_id)
+            if leaderboard is None:
+                continue
+            top = leaderboard.top(LEADERBOARD_SIZE)
+            if top != self.saved_leaderboard_tops.get(guild_id):
+                changed_tops[guild_id] = top
+        if not changed_tops:
+            return
+
+        updated_at = datetime.datetime.now(datetime.UTC).isoformat()
+        rows_by_guild = {}
+        for guild_id, top in changed_tops.items():
+            guild = self.bot.get_guild(guild_id)
+            rows_by_guild[str(guild_id)] = [
+                (str(guild_id), position, rank, user_id, self._leaderboard_name(guild, user_id), balance, updated_at)
+                for position, (rank, user_id, balance) in enumerate(top, start=1)
+            ]
+        try:
+            await asyncio.to_thread(self._save_leaderboards, rows_by_guild)
+        except Exception as e:
+            print(f"부자 순위 저장 중 오류 발생: {e}")
+            self.dirty_leaderboards.update(changed_tops)
+            return
+        self.saved_leaderboard_tops.update(changed_tops)
+
+    def _leaderboard_name(self, guild: discord.Guild, user_id: str) -> str:
+        member = guild.get_member(int(user_id)) if guild else None
+        return member.display_name if member else "알 수 없음"
 
     # --- 메시지 리스너 (모든 메시지 처리의 시작점) ---
     @commands.Cog.listener()
@@ -37,7 +315,7 @@ class Bank(commands.Cog):
 
         # 은행 채널 검사
         server_config = self.bot.get_server_config(guild_id)
-        bank_channel_id = server_config.get('bank_channel_id')
+        bank_channel_id = server_config['bank_channel_id'] if server_config else None
         current_channel_id = interaction.channel_id if interaction else ctx.channel.id
 
         if bank_channel_id and str(current_channel_id) != bank_channel_id:
@@ -102,10 +380,34 @@ class Bank(commands.Cog):
     async def repay_loan_slash(self, interaction: discord.Interaction, 금액: int): # 이름 변경하여 메시지 기반과 구분
         await self._repay_loan(interaction.user, 금액, interaction=interaction)
 
-    @app_commands.command(name="거래내역", description="모든 은행 거래 내역을 조회합니다.")
+    @app_commands.command(name="거래내역", description="은행 거래 내역을 페이지별로 조회합니다.")
+    @app_commands.describe(유형="이 유형의 거래만 보기", 시작일="이 날짜부터 (YYYY-MM-DD)", 종료일="이 날짜까지 (YYYY-MM-DD)")
+    @app_commands.choices(유형=[app_commands.Choice(name=name, value=name) for name in bank_ledger.HISTORY_TYPE_FILTERS])
+    @app_commands.guild_only()
+    async def transaction_history_slash(self, interaction: discord.Interaction, 유형: app_commands.Choice[str] = None, 시작일: str = None, 종료일: str = None): # 이름 변경하여 메시지 기반과 구분
+        await self._transaction_history(interaction.user, 유형.value if 유형 else None, 시작일, 종료일, interaction=interaction)
+
+    @app_commands.command(name="부자순위", description="이 서버의 잔액 순위와 내 순위를 확인합니다.")
+    @app_commands.guild_only()
+    async def wealth_leaderboard_slash(self, interaction: discord.Interaction):
+        await self._wealth_leaderboard(interaction.user, interaction=interaction)
+
+    @app_commands.command(name="급여지급", description="[관리자] 역할 멤버 전체 또는 지정한 유저들에게 같은 금액을 한 번에 지급합니다.")
+    @app_commands.describe(금액="1인당 지급할 금액", 역할="이 역할을 가진 모든 멤버에게 지급", 유저목록="멘션 또는 유저 ID 목록 (공백으로 구분)", 메모="거래 내역에 남길 설명", 미리보기="실제로 지급하지 않고 대상과 금액만 확인")
+    @app_commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def payroll_slash(self, interaction: discord.Interaction, 금액: int, 역할: discord.Role = None, 유저목록: str = None, 메모: str = None, 미리보기: bool = False):
+        await self._payroll(interaction.user, 금액, 역할, 유저목록, 메모, 미리보기, interaction=interaction)
+
+    @app_commands.command(name="거래내역내보내기", description="전체 거래 내역을 압축 파일(CSV/NDJSON)로 받습니다.")
+    @app_commands.describe(형식="파일 형식", 유형="이 유형의 거래만 내보내기", 시작일="이 날짜부터 (YYYY-MM-DD)", 종료일="이 날짜까지 (YYYY-MM-DD)")
+    @app_commands.choices(
+        형식=[app_commands.Choice(name=name.upper(), value=name) for name in bank_ledger.STATEMENT_FORMATS],
+        유형=[app_commands.Choice(name=name, value=name) for name in bank_ledger.HISTORY_TYPE_FILTERS]
+    )
     @app_commands.guild_only()
-    async def transaction_history_slash(self, interaction: discord.Interaction): # 이름 변경하여 메시지 기반과 구분
-        await self._transaction_history(interaction.user, interaction=interaction)
+    async def export_statement_slash(self, interaction: discord.Interaction, 형식: app_commands.Choice[str] = None, 유형: app_commands.Choice[str] = None, 시작일: str = None, 종료일: str = None):
+        await self._export_statement(interaction.user, 형식.value if 형식 else "csv", 유형.value if 유형 else None, 시작일, 종료일, interaction=interaction)
 
     # --- 메시지 기반 명령어 ---
     @commands.command(name="잔액", help="현재 잔액을 확인합니다. (예: 저스트 잔액)")
@@ -150,18 +452,41 @@ class Bank(commands.Cog):
         if not self.bot.is_command_enabled(ctx.guild.id, "상환"): await ctx.send(f"❌ 명령어 `{self.bot.command_prefix}상환`은 현재 이 서버에서 비활성화되어 있습니다."); return
         await self._repay_loan(ctx.author, 금액, ctx=ctx)
 
-    @commands.command(name="거래내역", help="모든 은행 거래 내역을 조회합니다. (예: 저스트 거래내역)")
-    async def msg_transaction_history(self, ctx: commands.Context):
+    @commands.command(name="거래내역", help="은행 거래 내역을 페이지별로 조회합니다. (예: 저스트 거래내역 송금 2025-01-01 2025-01-31)")
+    async def msg_transaction_history(self, ctx: commands.Context, 유형: str = None, 시작일: str = None, 종료일: str = None):
         if not ctx.guild: await ctx.send("이 명령어는 서버에서만 사용할 수 있습니다.") ; return
         if not self.bot.is_command_enabled(ctx.guild.id, "거래내역"): await ctx.send(f"❌ 명령어 `{self.bot.command_prefix}거래내역`은 현재 이 서버에서 비활성화되어 있습니다."); return
-        await self._transaction_history(ctx.author, ctx=ctx)
+        await self._transaction_history(ctx.author, 유형, 시작일, 종료일, ctx=ctx)
+
+    @commands.command(name="부자순위", help="이 서버의 잔액 순위와 내 순위를 확인합니다. (예: 저스트 부자순위)")
+    async def msg_wealth_leaderboard(self, ctx: commands.Context):
+        if not ctx.guild: await ctx.send("이 명령어는 서버에서만 사용할 수 있습니다.") ; return
+        if not self.bot.is_command_enabled(ctx.guild.id, "부자순위"): await ctx.send(f"❌ 명령어 `{self.bot.command_prefix}부자순위`은 현재 이 서버에서 비활성화되어 있습니다."); return
+        await self._wealth_leaderboard(ctx.author, ctx=ctx)
+
+    @commands.command(name="급여지급", help="[관리자] 역할 멤버 또는 지정한 유저들에게 같은 금액을 지급합니다. (예: 저스트 급여지급 50000 @경찰, 끝에 '미리보기'를 붙이면 확인만)")
+    @commands.has_permissions(administrator=True)
+    async def msg_payroll(self, ctx: commands.Context, 금액: int, *, 대상: str):
+        if not ctx.guild: await ctx.send("이 명령어는 서버에서만 사용할 수 있습니다.") ; return
+        if not self.bot.is_command_enabled(ctx.guild.id, "급여지급"): await ctx.send(f"❌ 명령어 `{self.bot.command_prefix}급여지급`은 현재 이 서버에서 비활성화되어 있습니다."); return
+        미리보기 = "미리보기" in 대상.split()
+        role_match = re.search(r"<@&(\d+)>", 대상)
+        역할 = ctx.guild.get_role(int(role_match.group(1))) if role_match else None
+        유저목록 = None if 역할 else 대상
+        await self._payroll(ctx.author, 금액, 역할, 유저목록, None, 미리보기, ctx=ctx)
+
+    @commands.command(name="거래내역내보내기", help="전체 거래 내역을 압축 파일로 받습니다. (예: 저스트 거래내역내보내기 csv 송금 2025-01-01 2025-01-31)")
+    async def msg_export_statement(self, ctx: commands.Context, 형식: str = "csv", 유형: str = None, 시작일: str = None, 종료일: str = None):
+        if not ctx.guild: await ctx.send("이 명령어는 서버에서만 사용할 수 있습니다.") ; return
+        if not self.bot.is_command_enabled(ctx.guild.id, "거래내역내보내기"): await ctx.send(f"❌ 명령어 `{self.bot.command_prefix}거래내역내보내기`은 현재 이 서버에서 비활성화되어 있습니다."); return
+        await self._export_statement(ctx.author, 형식.lower(), 유형, 시작일, 종료일, ctx=ctx)
 
 
     # --- 내부 함수 (슬래시 및 메시지 기반 명령어에서 공통 사용) ---
     async def _check_bank_channel(self, guild_id: int, current_channel_id: int, interaction: discord.Interaction = None, ctx: commands.Context = None):
         """은행 명령어가 은행 채널에서 사용되었는지 확인합니다."""
         server_config = self.bot.get_server_config(guild_id)
-        bank_channel_id = server_config.get('bank_channel_id')
+        bank_channel_id = server_config['bank_channel_id'] if server_config else None
 
         if bank_channel_id and str(current_channel_id) != bank_channel_id:
             bank_channel_mention = self.bot.get_channel(int(bank_channel_id)).mention if self.bot.get_channel(int(bank_channel_id)) else "설정된 은행 채널"
@@ -171,32 +496,76 @@ class Bank(commands.Cog):
             return False
         return True
 
+    async def _reply(self, response_msg: str, interaction: discord.Interaction = None, ctx: commands.Context = None):
+        """응답 여부에 맞춰 response/followup 중 하나로 보냅니다."""
+        if interaction:
+            if interaction.response.is_done(): await interaction.followup.send(response_msg, ephemeral=True)
+            else: await interaction.response.send_message(response_msg, ephemeral=True)
+        elif ctx: await ctx.send(response_msg)
+
+    @contextlib.asynccontextmanager
+    async def _account_locks(self, *user_ids: str):
+        """계좌별 잠금을 항상 정렬된 순서로 잡아 맞송금끼리 교착 상태가 생기지 않게 합니다. 아무도 쓰지 않는 잠금은 지웁니다."""
+        user_ids = sorted(set(user_ids))
+        for user_id in user_ids:
+            self.account_lock_users[user_id] += 1
+        try:
+            async with contextlib.AsyncExitStack() as stack:
+                for user_id in user_ids:
+                    await stack.enter_async_context(self.account_locks[user_id])
+                yield
+        finally:
+            for user_id in user_ids:
+                self.account_lock_users[user_id] -= 1
+                if not self.account_lock_users[user_id]:
+                    del self.account_lock_users[user_id]
+                    self.account_locks.pop(user_id, None)
+
+    def _execute_ledger(self, operation, *args):
+        conn = self.get_db_connection()
+        try:
+            with bank_ledger.transaction(conn):
+                return operation(conn, *args)
+        finally:
+            conn.close()
+
+    async def _run_ledger(self, user_ids, operation, *args):
+        """관련 계좌 잠금을 잡은 뒤 DB 작업을 스레드에서 하나의 트랜잭션으로 실행합니다."""
+        async with self._account_locks(*user_ids):
+            return await asyncio.to_thread(self._execute_ledger, operation, *args)
+
+    @staticmethod
+    def _idempotency_key(interaction: discord.Interaction = None, ctx: commands.Context = None) -> str:
+        return f"i:{interaction.id}" if interaction else f"m:{ctx.message.id}"
+
+    async def _run_idempotent(self, key: str, user_ids, operation, *args):
+        """돈이 오가는 작업을 interaction(또는 메시지) ID 기준으로 한 번만 실행합니다.
+
+        디스코드 재전송 등으로 같은 ID가 다시 오면 잔액은 건드리지 않고 처음 결과를 돌려줍니다. 반환값: (결과, 재전송 여부)
+        """
+        if key in self.processed_interactions:
+            self.processed_interactions.move_to_end(key)
+            return self.processed_interactions[key], True
+        result, replayed = await self._run_ledger(user_ids, bank_ledger.run_idempotent, key, operation, *args)
+        self.processed_interactions[key] = result
+        if len(self.processed_interactions) > IDEMPOTENCY_CACHE_SIZE:
+            self.processed_interactions.popitem(last=False)
+        return result, replayed
+
     async def _open_account(self, user: discord.User, interaction: discord.Interaction = None, ctx: commands.Context = None):
         guild_id = interaction.guild_id if interaction else ctx.guild.id
         current_channel_id = interaction.channel_id if interaction else ctx.channel.id
 
         if not await self._check_bank_channel(guild_id, current_channel_id, interaction=interaction, ctx=ctx): return
 
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
         user_id = str(user.id)
-
-        cursor.execute("SELECT user_id FROM bank_accounts WHERE user_id = ?", (user_id,))
-        if cursor.fetchone():
-            conn.close()
-            response_msg = "❌ 이미 통장이 개설되어 있습니다!"
-            if interaction: await interaction.followup.send(response_msg, ephemeral=True)
-            elif ctx: await ctx.send(response_msg)
+        created = await self._run_ledger([user_id], bank_ledger.open_account, user_id, user.display_name)
+        if not created:
+            await self._reply("❌ 이미 통장이 개설되어 있습니다!", interaction=interaction, ctx=ctx)
             return
+        self.update_leaderboards(user_id, 0)
 
-        username = user.display_name
-        cursor.execute("INSERT INTO bank_accounts (user_id, username, balance) VALUES (?, ?, ?)", (user_id, username, 0))
-        conn.commit()
-        conn.close()
-
-        response_msg = "✅ 통장이 성공적으로 개설되었습니다! 이제 은행 기능을 이용할 수 있습니다."
-        if interaction: await interaction.followup.send(response_msg, ephemeral=True)
-        elif ctx: await ctx.send(response_msg)
+        await self._reply("✅ 통장이 성공적으로 개설되었습니다! 이제 은행 기능을 이용할 수 있습니다.", interaction=interaction, ctx=ctx)
 
     async def _deposit_money(self, user: discord.User, 금액: int, interaction: discord.Interaction = None, ctx: commands.Context = None):
         guild_id = interaction.guild_id if interaction else ctx.guild.id
@@ -205,39 +574,18 @@ class Bank(commands.Cog):
         if not await self._check_bank_channel(guild_id, current_channel_id, interaction=interaction, ctx=ctx): return
 
         if 금액 <= 0:
-            response_msg = "❌ 0원 이하의 금액은 입금할 수 없습니다!"
-            if interaction: await interaction.response.send_message(response_msg, ephemeral=True)
-            elif ctx: await ctx.send(response_msg)
+            await self._reply("❌ 0원 이하의 금액은 입금할 수 없습니다!", interaction=interaction, ctx=ctx)
             return
 
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
         user_id = str(user.id)
-
-        cursor.execute("SELECT user_id FROM bank_accounts WHERE user_id = ?", (user_id,))
-        if not cursor.fetchone():
-            conn.close()
-            response_msg = "❌ 통장이 개설되어 있지 않습니다. `/통장개설`을 먼저 이용해주세요."
-            if interaction: await interaction.response.send_message(response_msg, ephemeral=True)
-            elif ctx: await ctx.send(response_msg)
+        try:
+            new_balance, _ = await self._run_idempotent(self._idempotency_key(interaction, ctx), [user_id], bank_ledger.deposit, user_id, user.display_name, 금액)
+        except bank_ledger.AccountNotFound:
+            await self._reply(NO_ACCOUNT_MESSAGE, interaction=interaction, ctx=ctx)
             return
 
-        username = user.display_name
-        cursor.execute("INSERT INTO bank_accounts (user_id, username, balance) VALUES (?, ?, ?) ON CONFLICT(user_id) DO UPDATE SET balance = balance + ?", (user_id, username, 금액, 금액))
-        conn.commit()
-
-        cursor.execute("""
-            INSERT INTO bank_transactions (user_id, username, type, amount, timestamp, description)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (user_id, username, 'deposit', 금액, datetime.datetime.now(datetime.UTC).isoformat(), f"{금액} 원 입금"))
-        conn.commit()
-
-        cursor.execute("SELECT balance FROM bank_accounts WHERE user_id = ?", (user_id,))
-        account = cursor.fetchone()
-        conn.close()
-        response_msg = f"💰 {금액} 원이 입금되었습니다. 현재 잔액: **{account['balance']} 원**"
-        if interaction: await interaction.response.send_message(response_msg, ephemeral=True)
-        elif ctx: await ctx.send(response_msg)
+        self.update_leaderboards(user_id, new_balance)
+        await self._reply(f"💰 {금액} 원이 입금되었습니다. 현재 잔액: **{new_balance} 원**", interaction=interaction, ctx=ctx)
 
     async def _withdraw_money(self, user: discord.User, 금액: int, interaction: discord.Interaction = None, ctx: commands.Context = None):
         guild_id = interaction.guild_id if interaction else ctx.guild.id
@@ -246,49 +594,21 @@ class Bank(commands.Cog):
         if not await self._check_bank_channel(guild_id, current_channel_id, interaction=interaction, ctx=ctx): return
 
         if 금액 <= 0:
-            response_msg = "❌ 0원 이하의 금액은 출금할 수 없습니다!"
-            if interaction: await interaction.response.send_message(response_msg, ephemeral=True)
-            elif ctx: await ctx.send(response_msg)
+            await self._reply("❌ 0원 이하의 금액은 출금할 수 없습니다!", interaction=interaction, ctx=ctx)
             return
 
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
         user_id = str(user.id)
-
-        cursor.execute("SELECT user_id FROM bank_accounts WHERE user_id = ?", (user_id,))
-        if not cursor.fetchone():
-            conn.close()
-            response_msg = "❌ 통장이 개설되어 있지 않습니다. `/통장개설`을 먼저 이용해주세요."
-            if interaction: await interaction.response.send_message(response_msg, ephemeral=True)
-            elif ctx: await ctx.send(response_msg)
+        try:
+            new_balance, _ = await self._run_idempotent(self._idempotency_key(interaction, ctx), [user_id], bank_ledger.withdraw, user_id, user.display_name, 금액)
+        except bank_ledger.AccountNotFound:
+            await self._reply(NO_ACCOUNT_MESSAGE, interaction=interaction, ctx=ctx)
             return
-
-        cursor.execute("SELECT balance FROM bank_accounts WHERE user_id = ?", (user_id,))
-        account = cursor.fetchone()
-        current_balance = account["balance"] if account else 0
-
-        if current_balance < 금액:
-            conn.close()
-            response_msg = "💸 잔액이 부족합니다!"
-            if interaction: await interaction.response.send_message(response_msg, ephemeral=True)
-            elif ctx: await ctx.send(response_msg)
+        except bank_ledger.InsufficientFunds:
+            await self._reply("💸 잔액이 부족합니다!", interaction=interaction, ctx=ctx)
             return
 
-        cursor.execute("UPDATE bank_accounts SET balance = balance - ? WHERE user_id = ?", (금액, user_id))
-        conn.commit()
-
-        cursor.execute("""
-            INSERT INTO bank_transactions (user_id, username, type, amount, timestamp, description)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (user_id, user.display_name, 'withdrawal', 금액, datetime.datetime.now(datetime.UTC).isoformat(), f"{금액} 원 출금"))
-        conn.commit()
-
-        cursor.execute("SELECT balance FROM bank_accounts WHERE user_id = ?", (user_id,))
-        account = cursor.fetchone()
-        conn.close()
-        response_msg = f"💸 {금액} 원이 출금되었습니다. 현재 잔액: **{account['balance']} 원**"
-        if interaction: await interaction.response.send_message(response_msg, ephemeral=True)
-        elif ctx: await ctx.send(response_msg)
+        self.update_leaderboards(user_id, new_balance)
+        await self._reply(f"💸 {금액} 원이 출금되었습니다. 현재 잔액: **{new_balance} 원**", interaction=interaction, ctx=ctx)
 
     async def _transfer_money(self, sender: discord.User, receiver: discord.Member, 금액: int, interaction: discord.Interaction = None, ctx: commands.Context = None):
         guild_id = interaction.guild_id if interaction else ctx.guild.id
@@ -297,95 +617,41 @@ class Bank(commands.Cog):
         if not await self._check_bank_channel(guild_id, current_channel_id, interaction=interaction, ctx=ctx): return
 
         if 금액 <= 0:
-            response_msg = "❌ 0원 이하의 금액은 송금할 수 없습니다!"
-            if interaction: await interaction.response.send_message(response_msg, ephemeral=True)
-            elif ctx: await ctx.send(response_msg)
+            await self._reply("❌ 0원 이하의 금액은 송금할 수 없습니다!", interaction=interaction, ctx=ctx)
             return
         if receiver.bot:
-            response_msg = "❌ 봇에게는 송금할 수 없습니다!"
-            if interaction: await interaction.response.send_message(response_msg, ephemeral=True)
-            elif ctx: await ctx.send(response_msg)
+            await self._reply("❌ 봇에게는 송금할 수 없습니다!", interaction=interaction, ctx=ctx)
             return
         if receiver.id == sender.id:
-            response_msg = "❌ 자기 자신에게는 송금할 수 없습니다!"
-            if interaction: await interaction.response.send_message(response_msg, ephemeral=True)
-            elif ctx: await ctx.send(response_msg)
+            await self._reply("❌ 자기 자신에게는 송금할 수 없습니다!", interaction=interaction, ctx=ctx)
             return
 
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
         sender_id = str(sender.id)
         receiver_id = str(receiver.id)
-
-        cursor.execute("SELECT user_id FROM bank_accounts WHERE user_id = ?", (sender_id,))
-        if not cursor.fetchone():
-            conn.close()
-            response_msg = "❌ 통장이 개설되어 있지 않습니다. `/통장개설`을 먼저 이용해주세요."
-            if interaction: await interaction.response.send_message(response_msg, ephemeral=True)
-            elif ctx: await ctx.send(response_msg)
+        try:
+            (sender_balance, receiver_balance), replayed = await self._run_idempotent(
+                self._idempotency_key(interaction, ctx), [sender_id, receiver_id], bank_ledger.transfer,
+                sender_id, sender.display_name, receiver_id, receiver.display_name, 금액
+            )
+        except bank_ledger.AccountNotFound:
+            await self._reply(NO_ACCOUNT_MESSAGE, interaction=interaction, ctx=ctx)
             return
-
-        cursor.execute("SELECT balance FROM bank_accounts WHERE user_id = ?", (sender_id,))
-        sender_account = cursor.fetchone()
-        sender_balance = sender_account["balance"] if sender_account else 0
-
-        if sender_balance < 금액:
-            conn.close()
-            response_msg = "💸 잔액이 부족해서 송금할 수 없습니다!"
-            if interaction: await interaction.response.send_message(response_msg, ephemeral=True)
-            elif ctx: await ctx.send(response_msg)
+        except bank_ledger.InsufficientFunds:
+            await self._reply("💸 잔액이 부족해서 송금할 수 없습니다!", interaction=interaction, ctx=ctx)
             return
-
-        try:
-            # 송신자 잔액 감소
-            cursor.execute("UPDATE bank_accounts SET balance = balance - ? WHERE user_id = ?", (금액, sender_id))
-            # 수신자 잔액 증가 (없으면 새로 생성)
-            cursor.execute("INSERT INTO bank_accounts (user_id, username, balance) VALUES (?, ?, ?) ON CONFLICT(user_id) DO UPDATE SET balance = balance + ?", (receiver_id, receiver.display_name, 금액, 금액))
-            conn.commit()
-
-            # 거래 내역 기록 (송신자)
-            cursor.execute("""
-                INSERT INTO bank_transactions (user_id, username, type, amount, timestamp, related_user_id, related_username, description)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (sender_id, sender.display_name, 'transfer_out', 금액, datetime.datetime.now(datetime.UTC).isoformat(), receiver_id, receiver.display_name, f"{receiver.display_name}님에게 {금액} 원 송금"))
-            conn.commit()
-            # 거래 내역 기록 (수신자)
-            cursor.execute("""
-                INSERT INTO bank_transactions (user_id, username, type, amount, timestamp, related_user_id, related_username, description)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (receiver_id, receiver.display_name, 'transfer_in', 금액, datetime.datetime.now(datetime.UTC).isoformat(), sender_id, sender.display_name, f"{sender.display_name}님으로부터 {금액} 원 입금"))
-            conn.commit()
-
         except Exception as e:
-            conn.rollback()
-            conn.close()
             print(f"송금 처리 중 오류 발생: {e}")
-            response_msg = f"❌ 송금 처리 중 오류가 발생했습니다. 관리자에게 문의하세요: {e}"
-            if interaction: await interaction.response.send_message(response_msg, ephemeral=True)
-            elif ctx: await ctx.send(response_msg)
+            await self._reply(f"❌ 송금 처리 중 오류가 발생했습니다. 관리자에게 문의하세요: {e}", interaction=interaction, ctx=ctx)
             return
-        finally:
-            conn.close()
 
-        conn = self.get_db_connection() # 다시 연결해서 최신 잔액 조회
-        cursor = conn.cursor()
-        cursor.execute("SELECT balance FROM bank_accounts WHERE user_id = ?", (sender_id,))
-        updated_sender_account = cursor.fetchone()
-        cursor.execute("SELECT balance FROM bank_accounts WHERE user_id = ?", (receiver_id,))
-        updated_receiver_account = cursor.fetchone()
-        conn.close()
+        self.update_leaderboards(sender_id, sender_balance)
+        self.update_leaderboards(receiver_id, receiver_balance)
+        await self._reply(f"✅ {receiver.display_name}님에게 **{금액} 원**을 송금했습니다. 내 잔액: **{sender_balance} 원**", interaction=interaction, ctx=ctx)
+        if replayed: return # 이미 처리된 송금 - 수신자 알림을 다시 보내지 않음
 
-        response_msg = (
-            f"✅ {receiver.display_name}님에게 **{금액} 원**을 송금했습니다. "
-            f"내 잔액: **{updated_sender_account['balance']} 원**"
-        )
-        if interaction: await interaction.response.send_message(response_msg, ephemeral=True)
-        elif ctx: await ctx.send(response_msg)
-
-        try:
-            await receiver.send(f"💰 {sender.display_name}님으로부터 **{금액} 원**을 송금받았습니다. 현재 잔액: **{updated_receiver_account['balance']} 원**")
-        except discord.Forbidden:
-            print(f"수신자 {receiver.display_name}에게 DM을 보낼 수 없습니다.")
+        dm_cog = self.bot.get_cog("DirectMessages")
+        if dm_cog: # 연속 송금은 DM 큐에서 한 메시지로 합쳐짐
+            dm_cog.send(receiver, f"💰 {sender.display_name}님으로부터 **{금액} 원**을 송금받았습니다. 현재 잔액: **{receiver_balance} 원**")
 
     async def _take_loan(self, user: discord.User, 금액: int, interaction: discord.Interaction = None, ctx: commands.Context = None):
         guild_id = interaction.guild_id if interaction else ctx.guild.id
@@ -394,103 +660,43 @@ class Bank(commands.Cog):
         if not await self._check_bank_channel(guild_id, current_channel_id, interaction=interaction, ctx=ctx): return
 
         if 금액 <= 0:
-            response_msg = "❌ 0원 이하의 금액은 대출받을 수 없습니다!"
-            if interaction: await interaction.response.send_message(response_msg, ephemeral=True)
-            elif ctx: await ctx.send(response_msg)
-            return
-
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        user_id = str(user.id)
-
-        cursor.execute("SELECT user_id FROM bank_accounts WHERE user_id = ?", (user_id,))
-        if not cursor.fetchone():
-            conn.close()
-            response_msg = "❌ 통장이 개설되어 있지 않습니다. `/통장개설`을 먼저 이용해주세요."
-            if interaction: await interaction.response.send_message(response_msg, ephemeral=True)
-            elif ctx: await ctx.send(response_msg)
+            await self._reply("❌ 0원 이하의 금액은 대출받을 수 없습니다!", interaction=interaction, ctx=ctx)
             return
 
         server_config = self.bot.get_server_config(guild_id)
         if server_config and server_config['bank_loan_enabled'] == 0:
-            response_msg = "❌ 이 서버에서 은행 대출 기능이 비활성화되어 있습니다."
-            if interaction: await interaction.followup.send(response_msg, ephemeral=True)
-            elif ctx: await ctx.send(response_msg)
-            conn.close()
+            await self._reply("❌ 이 서버에서 은행 대출 기능이 비활성화되어 있습니다.", interaction=interaction, ctx=ctx)
             return
 
         max_loan_amount = server_config['bank_max_loan_amount'] if server_config and server_config['bank_max_loan_amount'] is not None else 1000000 
         interest_rate = server_config['bank_loan_interest_rate'] if server_config and server_config['bank_loan_interest_rate'] is not None else 0.032
 
         if 금액 > max_loan_amount:
-            response_msg = f"❌ 최대 대출 가능 금액은 **{max_loan_amount} 원**입니다. {금액} 원은 대출받을 수 없습니다." # 통화단위 변경
-            if interaction: await interaction.followup.send(response_msg, ephemeral=True)
-            elif ctx: await ctx.send(response_msg)
-            conn.close()
-            return
-
-        cursor.execute("SELECT id FROM loans WHERE user_id = ? AND status = 'active'", (user_id,))
-        if cursor.fetchone():
-            conn.close()
-            response_msg = "❌ 이미 활성화된 대출이 있습니다. 기존 대출을 상환해주세요."
-            if interaction: await interaction.followup.send(response_msg, ephemeral=True)
-            elif ctx: await ctx.send(response_msg)
+            await self._reply(f"❌ 최대 대출 가능 금액은 **{max_loan_amount} 원**입니다. {금액} 원은 대출받을 수 없습니다.", interaction=interaction, ctx=ctx)
             return
 
-        total_repay_amount = int(금액 * (1 + interest_rate)) # 이자 포함 상환 금액 (단순화: 1년 기준)
-
+        user_id = str(user.id)
         try:
-            # 1. 은행 계좌에 대출 금액 추가
-            cursor.execute("UPDATE bank_accounts SET balance = balance + ? WHERE user_id = ?", (금액, user_id))
-
-            # 2. 대출 정보 기록
-            loan_doc = {
-                "user_id": user_id,
-                "username": user.display_name,
-                "loan_amount": 금액,
-                "interest_rate": interest_rate,
-                "total_repay_amount": total_repay_amount,
-                "paid_amount": 0,
-                "status": "active",
-                "loan_date": datetime.datetime.now(datetime.UTC).isoformat(), 
-                "due_date": (datetime.datetime.now(datetime.UTC) + datetime.timedelta(days=365)).isoformat() # 1년 후 만기 (예시)
-            }
-            cursor.execute("""
-                INSERT INTO loans (user_id, username, loan_amount, interest_rate, total_repay_amount, paid_amount, status, loan_date, due_date)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (loan_doc["user_id"], loan_doc["username"], loan_doc["loan_amount"], loan_doc["interest_rate"], loan_doc["total_repay_amount"], loan_doc["paid_amount"], loan_doc["status"], loan_doc["loan_date"], loan_doc["due_date"]))
-            loan_id = cursor.lastrowid
-
-            # 거래 내역 기록
-            cursor.execute("""
-                INSERT INTO bank_transactions (user_id, username, type, amount, timestamp, description)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (user_id, user.display_name, 'loan_taken', 금액, datetime.datetime.now(datetime.UTC).isoformat(), f"대출 {금액} 원 받음 (총 상환 {total_repay_amount} 원)")) # 통화단위 변경
-            conn.commit()
-
+            (total_repay_amount, current_balance_after_loan), _ = await self._run_idempotent(
+                self._idempotency_key(interaction, ctx), [user_id], bank_ledger.take_loan, user_id, user.display_name, 금액, interest_rate
+            )
+        except bank_ledger.AccountNotFound:
+            await self._reply(NO_ACCOUNT_MESSAGE, interaction=interaction, ctx=ctx)
+            return
+        except bank_ledger.BankError as e:
+            await self._reply(f"❌ {e}", interaction=interaction, ctx=ctx)
+            return
         except Exception as e:
-            conn.rollback()
             print(f"대출 처리 중 오류 발생: {e}")
-            response_msg = f"❌ 대출 처리 중 오류가 발생했습니다. 관리자에게 문의하세요: {e}"
-            if interaction: await interaction.followup.send(response_msg, ephemeral=True)
-            elif ctx: await ctx.send(response_msg)
+            await self._reply(f"❌ 대출 처리 중 오류가 발생했습니다. 관리자에게 문의하세요: {e}", interaction=interaction, ctx=ctx)
             return
-        finally:
-            conn.close()
-
-        conn = self.get_db_connection() # 다시 연결해서 최신 잔액 조회
-        cursor = conn.cursor()
-        cursor.execute("SELECT balance FROM bank_accounts WHERE user_id = ?", (user_id,))
-        account = cursor.fetchone()
-        current_balance_after_loan = account["balance"] if account else 0
-        conn.close()
 
+        self.update_leaderboards(user_id, current_balance_after_loan)
         response_msg = (
             f"✅ {금액} 원이 대출되었습니다! 이자({interest_rate * 100:.1f}%) 포함 총 상환 금액: **{total_repay_amount} 원**.\n" # 통화단위 변경
             f"현재 잔액: **{current_balance_after_loan} 원**" # 통화단위 변경
         )
-        if interaction: await interaction.followup.send(response_msg, ephemeral=True)
-        elif ctx: await ctx.send(response_msg)
+        await self._reply(response_msg, interaction=interaction, ctx=ctx)
 
     async def _repay_loan(self, user: discord.User, 금액: int, interaction: discord.Interaction = None, ctx: commands.Context = None):
         guild_id = interaction.guild_id if interaction else ctx.guild.id
@@ -499,176 +705,301 @@ class Bank(commands.Cog):
         if not await self._check_bank_channel(guild_id, current_channel_id, interaction=interaction, ctx=ctx): return
 
         if 금액 <= 0:
-            response_msg = "❌ 0원 이하의 금액은 상환할 수 없습니다!"
-            if interaction: await interaction.response.send_message(response_msg, ephemeral=True)
-            elif ctx: await ctx.send(response_msg)
+            await self._reply("❌ 0원 이하의 금액은 상환할 수 없습니다!", interaction=interaction, ctx=ctx)
             return
 
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
         user_id = str(user.id)
+        try:
+            (remaining, new_status, new_balance), _ = await self._run_idempotent(
+                self._idempotency_key(interaction, ctx), [user_id], bank_ledger.repay_loan, user_id, user.display_name, 금액
+            )
+        except bank_ledger.AccountNotFound:
+            await self._reply(NO_ACCOUNT_MESSAGE, interaction=interaction, ctx=ctx)
+            return
+        except bank_ledger.InsufficientFunds as e:
+            await self._reply(f"💸 잔액이 부족하여 상환할 수 없습니다! 현재 잔액: **{e.balance} 원**", interaction=interaction, ctx=ctx)
+            return
+        except bank_ledger.BankError as e:
+            await self._reply(f"❌ {e}", interaction=interaction, ctx=ctx)
+            return
+        except Exception as e:
+            print(f"상환 처리 중 오류 발생: {e}")
+            await self._reply(f"❌ 상환 처리 중 오류가 발생했습니다. 관리자에게 문의하세요: {e}", interaction=interaction, ctx=ctx)
+            return
 
-        cursor.execute("SELECT user_id FROM bank_accounts WHERE user_id = ?", (user_id,))
-        if not cursor.fetchone():
+        self.update_leaderboards(user_id, new_balance)
+        if new_status == "paid":
+            status_message = "✅ 대출금을 전액 상환했습니다! 감사합니다."
+        else:
+            status_message = f"✅ {금액} 원 상환 완료! 남은 상환 금액: **{remaining} 원**" # 통화단위 변경
+        await self._reply(status_message, interaction=interaction, ctx=ctx)
+
+    def _load_history_page(self, user_id: str, filters: dict, after=None, before=None):
+        conn = self.get_db_connection()
+        try:
+            return bank_ledger.fetch_history_page(
+                conn, user_id, types=filters['types'], since=filters['since'], until=filters['until'],
+                after=after, before=before, limit=HISTORY_PAGE_SIZE
+            )
+        finally:
             conn.close()
-            response_msg = "❌ 통장이 개설되어 있지 않습니다. `/통장개설`을 먼저 이용해주세요."
-            if interaction: await interaction.response.send_message(response_msg, ephemeral=True)
-            elif ctx: await ctx.send(response_msg)
+
+    def _parse_history_filters(self, 유형: str = None, 시작일: str = None, 종료일: str = None) -> dict:
+        """거래 내역 필터를 검사합니다. 날짜는 YYYY-MM-DD (UTC), 종료일은 그날 하루를 포함합니다. 잘못된 값이면 ValueError."""
+        if 유형 in (None, "전체"):
+            types = ()
+        elif 유형 in bank_ledger.HISTORY_TYPE_FILTERS:
+            types = bank_ledger.HISTORY_TYPE_FILTERS[유형]
+        else:
+            raise ValueError(f"알 수 없는 거래 유형입니다. ({', '.join(['전체', *bank_ledger.HISTORY_TYPE_FILTERS])} 중 하나)")
+        try:
+            since = datetime.date.fromisoformat(시작일) if 시작일 else None
+            until = datetime.date.fromisoformat(종료일) if 종료일 else None
+        except ValueError:
+            raise ValueError("날짜는 `YYYY-MM-DD` 형식으로 입력해주세요. (예: 2025-01-31)")
+        if since and until and since > until:
+            raise ValueError("시작일이 종료일보다 늦습니다.")
+
+        label_parts = [f"유형: {유형}" if types else "전체 유형"]
+        if since or until:
+            label_parts.append(f"{since or '처음'} ~ {until or '현재'}")
+        return {
+            "types": types,
+            "since": since.isoformat() if since else None,
+            "until": (until + datetime.timedelta(days=1)).isoformat() if until else None,
+            "label": " | ".join(label_parts),
+        }
+
+    async def _transaction_history(self, user: discord.User, 유형: str = None, 시작일: str = None, 종료일: str = None, interaction: discord.Interaction = None, ctx: commands.Context = None):
+        guild_id = interaction.guild_id if interaction else ctx.guild.id
+        current_channel_id = interaction.channel_id if interaction else ctx.channel.id
+
+        if not await self._check_bank_channel(guild_id, current_channel_id, interaction=interaction, ctx=ctx): return
+
+        try:
+            filters = self._parse_history_filters(유형, 시작일, 종료일)
+        except ValueError as e:
+            await self._reply(f"❌ {e}", interaction=interaction, ctx=ctx)
             return
 
-        cursor.execute("SELECT * FROM loans WHERE user_id = ? AND status = 'active'", (user_id,))
-        active_loan = cursor.fetchone()
+        if interaction: await interaction.response.defer(ephemeral=True)
 
-        if not active_loan:
-            conn.close()
-            response_msg = "❌ 현재 활성화된 대출이 없습니다."
-            if interaction: await interaction.followup.send(response_msg, ephemeral=True)
-            elif ctx: await ctx.send(response_msg)
+        user_id = str(user.id)
+        has_account = (await asyncio.to_thread(self._load_balances, [user_id])).get(user_id) is not None
+        if not has_account:
+            await self._reply(NO_ACCOUNT_MESSAGE, interaction=interaction, ctx=ctx)
             return
 
-        cursor.execute("SELECT balance FROM bank_accounts WHERE user_id = ?", (user_id,))
-        bank_account = cursor.fetchone()
-        current_balance = bank_account["balance"] if bank_account else 0
+        rows, has_older = await asyncio.to_thread(self._load_history_page, user_id, filters)
+        if not rows:
+            await self._reply("❌ 조건에 맞는 거래 내역이 없습니다." if filters['types'] or filters['since'] or filters['until'] else "❌ 최근 거래 내역이 없습니다.", interaction=interaction, ctx=ctx)
+            return
 
-        if current_balance < 금액:
+        view = self.TransactionHistoryPages(self, user, filters, rows, has_older)
+        if interaction: view.message = await interaction.followup.send(embed=view.build_embed(), view=view, ephemeral=True, wait=True)
+        elif ctx: view.message = await ctx.send(embed=view.build_embed(), view=view)
+
+    async def _resolve_payroll_members(self, guild: discord.Guild, role: discord.Role = None, user_text: str = None):
+        """지급 대상 멤버 목록과 찾지 못한 ID 수를 반환합니다. 봇은 제외합니다."""
+        if role:
+            if not guild.chunked:
+                await guild.chunk() # 역할 멤버 목록은 멤버 캐시가 있어야 정확함
+            return [member for member in role.members if not member.bot], 0
+
+        members, missing = {}, 0
+        for user_id in dict.fromkeys(int(match) for match in re.findall(r"\d{15,20}", user_text or "")):
+            member = guild.get_member(user_id)
+            if member is None:
+                try:
+                    member = await guild.fetch_member(user_id)
+                except discord.NotFound:
+                    missing += 1
+                    continue
+            if not member.bot:
+                members[member.id] = member
+        return list(members.values()), missing
+
+    def _execute_payroll(self, recipients, amount: int, description: str, dry_run: bool):
+        conn = self.get_db_connection()
+        try:
+            if dry_run:
+                return bank_ledger.pay_many(conn, recipients, amount, description, dry_run=True)
+            with bank_ledger.transaction(conn):
+                return bank_ledger.pay_many(conn, recipients, amount, description)
+        finally:
             conn.close()
-            response_msg = f"💸 잔액이 부족하여 상환할 수 없습니다! 현재 잔액: **{current_balance} 원**" # 통화단위 변경
-            if interaction: await interaction.response.send_message(response_msg, ephemeral=True)
-            elif ctx: await ctx.send(response_msg)
+
+    async def _payroll(self, author: discord.Member, 금액: int, 역할: discord.Role = None, 유저목록: str = None, 메모: str = None, 미리보기: bool = False, interaction: discord.Interaction = None, ctx: commands.Context = None):
+        guild = interaction.guild if interaction else ctx.guild
+
+        if not author.guild_permissions.administrator:
+            await self._reply("❌ 이 명령어는 서버 관리자만 사용할 수 있습니다.", interaction=interaction, ctx=ctx)
+            return
+        if 금액 <= 0:
+            await self._reply("❌ 0원 이하의 금액은 지급할 수 없습니다!", interaction=interaction, ctx=ctx)
+            return
+        if not 역할 and not 유저목록:
+            await self._reply("❌ 지급할 역할 또는 유저 목록을 지정해주세요.", interaction=interaction, ctx=ctx)
             return
 
-        remaining_repay = active_loan["total_repay_amount"] - active_loan["paid_amount"]
+        if interaction: await interaction.response.defer(ephemeral=True)
 
-        if 금액 > remaining_repay:
-            response_msg = f"❌ 상환할 금액이 남은 상환 금액({remaining_repay} 원)보다 많습니다. 정확한 금액을 입력해주세요." # 통화단위 변경
-            if interaction: await interaction.response.send_message(response_msg, ephemeral=True)
-            elif ctx: await ctx.send(response_msg)
-            conn.close()
+        members, missing = await self._resolve_payroll_members(guild, 역할, 유저목록)
+        if not members:
+            await self._reply("❌ 지급할 대상이 없습니다. (봇과 찾을 수 없는 유저는 제외됩니다)", interaction=interaction, ctx=ctx)
             return
 
+        target_label = f"역할 {역할.name}" if 역할 else "지정한 유저"
+        description = 메모 or f"{guild.name} 급여 지급 ({target_label})"
+        recipients = [(str(member.id), member.display_name) for member in members]
         try:
-            # 1. 은행 계좌에서 상환 금액 차감
-            cursor.execute("UPDATE bank_accounts SET balance = balance - ? WHERE user_id = ?", (금액, user_id))
-
-            # 2. 대출 정보 업데이트
-            new_paid_amount = active_loan["paid_amount"] + 금액
-            new_status = "active"
-            if new_paid_amount >= active_loan["total_repay_amount"]:
-                new_status = "paid"
-
-            cursor.execute("""
-                UPDATE loans SET paid_amount = ?, status = ?
-                WHERE id = ?
-            """, (new_paid_amount, new_status, active_loan["id"]))
-
-            # 3. 상환 내역 기록
-            cursor.execute("""
-                INSERT INTO loan_payments (loan_id, user_id, payment_amount, payment_date)
-                VALUES (?, ?, ?, ?)
-            """, (active_loan["id"], user_id, 금액, datetime.datetime.now(datetime.UTC).isoformat())) 
-            # 거래 내역 기록
-            cursor.execute("""
-                INSERT INTO bank_transactions (user_id, username, type, amount, timestamp, description)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (user_id, user.display_name, 'loan_repaid', 금액, datetime.datetime.now(datetime.UTC).isoformat(), f"대출 {금액} 원 상환")) # 통화단위 변경
-            conn.commit()
-
+            # 입금만 하므로 계좌 잠금 없이 한 트랜잭션으로 처리 (잔액 차감이 없어 다른 작업과 충돌하지 않음)
+            result = await asyncio.to_thread(self._execute_payroll, recipients, 금액, description, 미리보기)
         except Exception as e:
-            conn.rollback()
-            print(f"상환 처리 중 오류 발생: {e}")
-            response_msg = f"❌ 상환 처리 중 오류가 발생했습니다. 관리자에게 문의하세요: {e}"
-            if interaction: await interaction.followup.send(response_msg, ephemeral=True)
-            elif ctx: await ctx.send(response_msg)
+            print(f"급여 지급 중 오류 발생: {e}")
+            await self._reply(f"❌ 급여 지급 중 오류가 발생했습니다. 관리자에게 문의하세요: {e}", interaction=interaction, ctx=ctx)
             return
-        finally:
-            conn.close()
 
-        status_message = ""
-        if new_status == "paid":
-            status_message = "✅ 대출금을 전액 상환했습니다! 감사합니다."
-        else:
-            status_message = f"✅ {금액} 원 상환 완료! 남은 상환 금액: **{remaining_repay - 금액} 원**" # 통화단위 변경
+        for user_id, balance in result['balances'].items():
+            self.update_leaderboards(user_id, balance)
 
-        if interaction: await interaction.followup.send(status_message, ephemeral=True)
-        elif ctx: await ctx.send(status_message)
+        embed = discord.Embed(
+            title="🔍 급여 지급 미리보기" if result['dry_run'] else "💼 급여 지급 완료",
+            color=discord.Color.blue() if result['dry_run'] else discord.Color.green()
+        )
+        embed.add_field(name="대상", value=f"{target_label} {result['recipients']:,}명", inline=True)
+        embed.add_field(name="1인당 금액", value=f"{금액:,} 원", inline=True)
+        embed.add_field(name="총액", value=f"{result['total']:,} 원", inline=True)
+        embed.add_field(name="신규 통장", value=f"{result['new_accounts']:,}개", inline=True)
+        if missing:
+            embed.add_field(name="찾을 수 없는 유저", value=f"{missing:,}명 (제외됨)", inline=True)
+        embed.set_footer(text=f"설명: {description} | DB 처리 {result['elapsed'] * 1000:.0f}ms")
+        if interaction: await interaction.followup.send(embed=embed, ephemeral=True)
+        elif ctx: await ctx.send(embed=embed)
 
-    async def _transaction_history(self, user: discord.User, interaction: discord.Interaction = None, ctx: commands.Context = None):
-        guild_id = interaction.guild_id if interaction else ctx.guild.id
+    async def _wealth_leaderboard(self, user: discord.User, interaction: discord.Interaction = None, ctx: commands.Context = None):
+        guild = interaction.guild if interaction else ctx.guild
         current_channel_id = interaction.channel_id if interaction else ctx.channel.id
 
-        if not await self._check_bank_channel(guild_id, current_channel_id, interaction=interaction, ctx=ctx): return
+        if not await self._check_bank_channel(guild.id, current_channel_id, interaction=interaction, ctx=ctx): return
 
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        user_id = str(user.id)
-
-        cursor.execute("SELECT user_id FROM bank_accounts WHERE user_id = ?", (user_id,))
-        if not cursor.fetchone():
-            conn.close()
-            response_msg = "❌ 통장이 개설되어 있지 않습니다. `/통장개설`을 먼저 이용해주세요."
-            if interaction: await interaction.response.send_message(response_msg, ephemeral=True)
-            elif ctx: await ctx.send(response_msg)
-            return
+        if interaction: await interaction.response.defer() # 첫 조회라면 멤버 목록을 불러오는 데 시간이 걸릴 수 있음
 
-        cursor.execute("""
-            SELECT type, amount, timestamp, related_username, description FROM bank_transactions 
-            WHERE user_id = ? ORDER BY timestamp DESC LIMIT 10
-        """, (user_id,))
-        transactions = cursor.fetchall()
-        conn.close()
-
-        if not transactions:
-            response_msg = "❌ 최근 거래 내역이 없습니다."
-            if interaction: await interaction.followup.send(response_msg, ephemeral=True)
-            elif ctx: await ctx.send(response_msg)
+        leaderboard = await self._get_leaderboard(guild)
+        top = leaderboard.top(LEADERBOARD_SIZE)
+        if not top:
+            await self._reply("❌ 이 서버에는 아직 통장을 가진 멤버가 없습니다.", interaction=interaction, ctx=ctx)
             return
 
+        medals = {1: "🥇", 2: "🥈", 3: "🥉"}
         embed = discord.Embed(
-            title=f"💰 {user.display_name}님의 최근 거래 내역",
+            title=f"🏆 {guild.name} 부자 순위",
+            description="\n".join(f"{medals.get(rank, f'**{rank}.**')} {self._leaderboard_name(guild, user_id)} - **{balance:,} 원**" for rank, user_id, balance in top),
             color=discord.Color.gold()
         )
-
-        # 거래 내역을 문자열로 만들어 임베드 필드에 추가
-        history_text = ""
-        for i, tx in enumerate(transactions):
-            tx_type = ""
-            amount_str = f"{tx['amount']:,} 원" # 통화단위 변경
-
-            if tx['type'] == 'deposit':
-                tx_type = "📥 입금"
-                amount_str = f"+{amount_str}"
-            elif tx['type'] == 'withdrawal':
-                tx_type = "📤 출금"
-                amount_str = f"-{amount_str}"
-            elif tx['type'] == 'transfer_out':
-                tx_type = "➡️ 송금"
-                amount_str = f"-{amount_str} ➡️ {tx['related_username'] if tx['related_username'] else '알 수 없음'}" # 관련 유저명 없으면 처리
-            elif tx['type'] == 'transfer_in':
-                tx_type = "⬅️ 입금"
-                amount_str = f"+{amount_str} ⬅️ {tx['related_username'] if tx['related_username'] else '알 수 없음'}" # 관련 유저명 없으면 처리
-            elif tx['type'] == 'loan_taken':
-                tx_type = "🏦 대출"
-                amount_str = f"+{amount_str}"
-            elif tx['type'] == 'loan_repaid':
-                tx_type = "💳 상환"
-                amount_str = f"-{amount_str}"
-
-            # 날짜 형식 조정
-            tx_time = datetime.datetime.fromisoformat(tx['timestamp']).strftime('%Y-%m-%d %H:%M')
-
-            history_text += f"**{tx_type}**: {amount_str}\n"
-            if tx['description']:
-                history_text += f"  > {tx['description']}\n"
-            history_text += f"  _{tx_time}_\n\n" # 날짜를 더 작게 표시
-
-        if history_text:
-            embed.description = history_text[:2048] # 임베드 설명 최대 길이
-            if len(history_text) > 2048:
-                embed.set_footer(text="...더 많은 거래 내역은 표시할수 없습니다.")
+        my_rank = leaderboard.rank(str(user.id))
+        if my_rank:
+            embed.set_footer(text=f"내 순위: {my_rank}위 / {len(leaderboard)}명 (잔액 {leaderboard.balance(str(user.id)):,} 원)")
+        else:
+            embed.set_footer(text="통장이 없어 순위가 없습니다. /통장개설로 통장을 만들어보세요.")
 
         if interaction: await interaction.followup.send(embed=embed)
         elif ctx: await ctx.send(embed=embed)
 
+    def _build_statement_file(self, user_id: str, statement_format: str, filters: dict):
+        """명세서를 gzip으로 압축해 임시 파일에 씁니다. (파일, 거래 건수, 바이트 크기)를 반환합니다."""
+        statement_file = tempfile.SpooledTemporaryFile(max_size=STATEMENT_SPOOL_SIZE)
+        conn = self.get_db_connection()
+        try:
+            count = bank_ledger.write_statement(conn, statement_file, user_id, statement_format, filters['types'], filters['since'], filters['until'])
+        except Exception:
+            statement_file.close()
+            raise
+        finally:
+            conn.close()
+        size = statement_file.tell()
+        statement_file.seek(0)
+        return statement_file, count, size
+
+    async def _export_statement(self, user: discord.User, 형식: str = "csv", 유형: str = None, 시작일: str = None, 종료일: str = None, interaction: discord.Interaction = None, ctx: commands.Context = None):
+        guild = interaction.guild if interaction else ctx.guild
+        current_channel_id = interaction.channel_id if interaction else ctx.channel.id
+
+        if not await self._check_bank_channel(guild.id, current_channel_id, interaction=interaction, ctx=ctx): return
+
+        if 형식 not in bank_ledger.STATEMENT_FORMATS:
+            await self._reply(f"❌ 지원하지 않는 형식입니다. ({', '.join(bank_ledger.STATEMENT_FORMATS)} 중 하나)", interaction=interaction, ctx=ctx)
+            return
+        try:
+            filters = self._parse_history_filters(유형, 시작일, 종료일)
+        except ValueError as e:
+            await self._reply(f"❌ {e}", interaction=interaction, ctx=ctx)
+            return
+
+        if interaction: await interaction.response.defer(ephemeral=True)
+
+        user_id = str(user.id)
+        has_account = (await asyncio.to_thread(self._load_balances, [user_id])).get(user_id) is not None
+        if not has_account:
+            await self._reply(NO_ACCOUNT_MESSAGE, interaction=interaction, ctx=ctx)
+            return
+
+        try:
+            statement_file, count, size = await asyncio.to_thread(self._build_statement_file, user_id, 형식, filters)
+        except Exception as e:
+            print(f"거래 명세서 생성 중 오류 발생: {e}")
+            await self._reply(f"❌ 거래 명세서 생성 중 오류가 발생했습니다. 관리자에게 문의하세요: {e}", interaction=interaction, ctx=ctx)
+            return
+
+        with statement_file:
+            if count == 0:
+                await self._reply("❌ 조건에 맞는 거래 내역이 없습니다.", interaction=interaction, ctx=ctx)
+                return
+            if size > guild.filesize_limit:
+                await self._reply(f"❌ 명세서가 너무 큽니다. ({size / 1024 / 1024:.1f}MB) 날짜 범위를 줄여서 다시 시도해주세요.", interaction=interaction, ctx=ctx)
+                return
+
+            filename = f"statement_{user_id}_{datetime.datetime.now(datetime.UTC).strftime('%Y%m%d')}.{형식}.gz"
+            response_msg = f"📄 거래 명세서 ({filters['label']}, {count:,}건)"
+            statement = discord.File(statement_file, filename=filename)
+            if interaction: await interaction.followup.send(response_msg, file=statement, ephemeral=True)
+            elif ctx: await ctx.send(response_msg, file=statement)
+
+
+def _format_transaction(tx) -> str:
+    """거래 한 건을 임베드에 표시할 문자열로 만듭니다."""
+    amount_str = f"{tx['amount']:,} 원" # 통화단위 변경
+    related = tx['related_username'] if tx['related_username'] else '알 수 없음' # 관련 유저명 없으면 처리
+    if tx['type'] == 'deposit':
+        tx_type, amount_str = "📥 입금", f"+{amount_str}"
+    elif tx['type'] == 'withdrawal':
+        tx_type, amount_str = "📤 출금", f"-{amount_str}"
+    elif tx['type'] == 'transfer_out':
+        tx_type, amount_str = "➡️ 송금", f"-{amount_str} ➡️ {related}"
+    elif tx['type'] == 'transfer_in':
+        tx_type, amount_str = "⬅️ 입금", f"+{amount_str} ⬅️ {related}"
+    elif tx['type'] == 'loan_taken':
+        tx_type, amount_str = "🏦 대출", f"+{amount_str}"
+    elif tx['type'] == 'loan_repaid':
+        tx_type, amount_str = "💳 상환", f"-{amount_str}"
+    elif tx['type'] == 'fee':
+        tx_type, amount_str = "🧾 수수료", f"-{amount_str}"
+    elif tx['type'] == 'interest':
+        tx_type, amount_str = "💹 이자", f"+{amount_str}"
+    elif tx['type'] == 'payroll':
+        tx_type, amount_str = "💼 급여", f"+{amount_str}"
+    elif tx['type'] == 'refund':
+        tx_type, amount_str = "↩️ 환불", f"+{amount_str}"
+    else:
+        tx_type = tx['type']
+
+    # 날짜 형식 조정
+    tx_time = datetime.datetime.fromisoformat(tx['timestamp']).strftime('%Y-%m-%d %H:%M')
+    line = f"**{tx_type}**: {amount_str}\n"
+    if tx['description']:
+        line += f"  > {tx['description']}\n"
+    return line + f"  _{tx_time}_\n" # 날짜를 더 작게 표시
+
 
 async def setup(bot):
     await bot.add_cog(Bank(bot))
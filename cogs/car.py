@@ -1,121 +1,383 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
+import asyncio
+import collections
 import sqlite3
 import datetime
-import json # JSON 처리 임포트
+import re
+import time
+
+import bank_ledger
+import forbidden_cars
+
+# 검토 버튼 custom_id: car_review:<approve|reject>:<신청 ID> - 클릭은 on_interaction에서 처리하므로 신청마다 View를 메모리에 두지 않음
+CAR_REVIEW_CUSTOM_ID = re.compile(r"^car_review:(approve|reject):(\d+)$")
+# 관리자가 검토하지 않은 신청을 만료시키는 시간 (초)
+CAR_REVIEW_TIMEOUT_SECONDS = 300
+# 만료된 신청을 찾는 주기 (초)
+CAR_REVIEW_SWEEP_INTERVAL = 60
+# 처리된 신청의 관리자 메시지/등록증을 보내는 간격 (초) - 한꺼번에 처리되어도 채널 속도 제한(5회/5초)을 넘지 않도록
+CAR_MESSAGE_EDIT_INTERVAL = 1.2
+# 대시보드 일괄 검토 결과를 확인하는 주기 (초)
+CAR_DASHBOARD_POLL_INTERVAL = 15
+# 등록증 게시 메시지 하나에 담을 임베드 수 (디스코드 최대 10개)
+CERTIFICATES_PER_MESSAGE = 10
+
+STATUS_PENDING = "검토중"
+STATUS_APPROVED = "승인됨"
+STATUS_REJECTED = "거부됨"
+STATUS_TIMED_OUT = "검토 시간 초과"
+
+def review_buttons(registration_id: int, disabled: bool = False) -> discord.ui.View:
+    """신청 ID를 custom_id에 담은 승인/거부 버튼. 전송용으로만 쓰고 봇 메모리에는 등록하지 않습니다."""
+    view = discord.ui.View(timeout=None)
+    view.add_item(discord.ui.Button(label="승인 ✅", style=discord.ButtonStyle.success, custom_id=f"car_review:approve:{registration_id}", disabled=disabled))
+    view.add_item(discord.ui.Button(label="거부 ❌", style=discord.ButtonStyle.danger, custom_id=f"car_review:reject:{registration_id}", disabled=disabled))
+    view.stop() # 끝난 View는 discord.py가 메시지별로 보관하지 않음
+    return view
 
 class Car(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.get_db_connection = bot.get_db_connection
         self.get_server_config = bot.get_server_config
+        # key: guild_id, value: (금지 차량 설정 원문, 컴파일된 매처) - 설정 원문이 바뀌었을 때만 다시 컴파일
+        self.forbidden_matchers = {}
+        self.car_reviews_version = None # 마지막으로 처리한 대시보드 검토 버전 (data_versions 'car_reviews')
+        self.expire_registrations.start()
+        self.post_dashboard_reviews.start()
+
+    def cog_unload(self):
+        self.expire_registrations.cancel()
+        self.post_dashboard_reviews.cancel()
+
+    class RejectModal(discord.ui.Modal, title="차량 등록 거부 사유 입력"):
+        reason = discord.ui.TextInput(label="거부 사유", style=discord.TextStyle.paragraph, required=True,
+                                      placeholder="예: 금지 차량, 정보 부족 등")
+
+        def __init__(self, cog, registration_id: int):
+            super().__init__()
+            self.cog = cog
+            self.registration_id = registration_id
+
+        async def on_submit(self, modal_interaction: discord.Interaction):
+            await self.cog._reject_registration(modal_interaction, self.registration_id, self.reason.value)
+
+    def _get_forbidden_matcher(self, guild_id: int, raw_json) -> forbidden_cars.ForbiddenCarMatcher:
+        cached = self.forbidden_matchers.get(guild_id)
+        if cached and cached[0] == raw_json:
+            return cached[1]
+        matcher = forbidden_cars.ForbiddenCarMatcher(forbidden_cars.parse_forbidden_json(raw_json))
+        self.forbidden_matchers[guild_id] = (raw_json, matcher)
+        return matcher
+
+    def _load_registration(self, registration_id: int):
+        conn = self.get_db_connection()
+        try:
+            return conn.execute("SELECT * FROM car_registrations WHERE id = ?", (registration_id,)).fetchone()
+        finally:
+            conn.close()
 
-    class ApprovalButtons(discord.ui.View):
-        def __init__(self, bot_instance, user_id: int, car_name: str, original_interaction_user_mention: str, interaction_id: int, guild_id: int):
-            super().__init__(timeout=300)
-            self.bot_instance = bot_instance
-            self.user_id = user_id
-            self.car_name = car_name
-            self.original_interaction_user_mention = original_interaction_user_mention
-            self.interaction_id = interaction_id
-            self.guild_id = guild_id
-
-        @discord.ui.button(label="승인 ✅", style=discord.ButtonStyle.success, custom_id="approve_car")
-        async def approve_callback(self, interaction: discord.Interaction, button: discord.ui.Button):
-            for item in self.children:
-                item.disabled = True
-            await interaction.response.edit_message(view=self)
-
-            approved_user = await self.bot_instance.fetch_user(self.user_id)
-            if approved_user:
-                conn = self.bot_instance.get_db_connection()
-                cursor = conn.cursor()
-                cursor.execute("""
-                    UPDATE car_registrations SET status = ?, approved_by = ?, approved_at = ?
-                    WHERE id = ?
-                """, ("승인됨", str(interaction.user.id), datetime.datetime.now(datetime.UTC).isoformat(), self.interaction_id)) # DeprecationWarning 수정
-                conn.commit()
-                conn.close()
-
-                # 서버 설정에서 등록세 가져오기
-                server_config = self.bot_instance.get_server_config(self.guild_id)
-                registration_tax = server_config['car_registration_tax'] if server_config and server_config['car_registration_tax'] is not None else 50000
-
-                registration_certificate_embed = discord.Embed(
-                    title=f"🚗 {self.car_name} 차량 등록증",
-                    description=f"{approved_user.mention}님의 차량이 성공적으로 등록되었습니다!",
-                    color=discord.Color.blue()
-                )
-                registration_certificate_embed.add_field(name="차량 이름", value=self.car_name, inline=False)
-                registration_certificate_embed.add_field(name="등록세", value=f"{registration_tax} 원 (납부 완료)", inline=False) # 통화단위 변경
-                registration_certificate_embed.set_footer(text=f"승인 관리자: {interaction.user.display_name}")
-                registration_certificate_embed.set_thumbnail(url=approved_user.avatar.url if approved_user.avatar else None)
-
-                if server_config and server_config['approved_cars_channel_id']:
-                    approved_channel = self.bot_instance.get_channel(int(server_config['approved_cars_channel_id']))
-                    if approved_channel:
-                        await approved_channel.send(f"{self.original_interaction_user_mention}님, 차량 등록이 승인되었습니다!", embed=registration_certificate_embed)
-                        await interaction.followup.send(f"✅ {self.car_name} 차량이 승인되어 등록증이 발급되었습니다.", ephemeral=False)
-                    else:
-                        await interaction.followup.send("❌ 서버에 설정된 '차량 승인 채널'을 찾을 수 없습니다. 관리자에게 문의하세요.", ephemeral=True)
-                else:
-                    await interaction.followup.send("❌ 서버에 '차량 승인 채널'이 설정되어 있지 않습니다. 관리자에게 문의하세요.", ephemeral=True)
+    def _close_registration(self, registration_id: int, sql: str, params: tuple) -> bool:
+        """검토중인 신청만 상태를 바꿉니다. 다른 관리자가 먼저 처리했거나 만료되었으면 False."""
+        conn = self.get_db_connection()
+        try:
+            cursor = conn.execute(sql + " WHERE id = ? AND status = ?", params + (registration_id, STATUS_PENDING))
+            conn.commit()
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    # --- 검토 버튼 처리 (봇이 재시작되어도 custom_id로 신청을 찾아 처리) ---
+    @commands.Cog.listener()
+    async def on_interaction(self, interaction: discord.Interaction):
+        if interaction.type != discord.InteractionType.component or not interaction.data:
+            return
+        match = CAR_REVIEW_CUSTOM_ID.match(interaction.data.get('custom_id', ''))
+        if not match:
+            return
+        action, registration_id = match.group(1), int(match.group(2))
+
+        registration = self._load_registration(registration_id)
+        if not registration or registration['status'] != STATUS_PENDING:
+            status = registration['status'] if registration else "삭제됨"
+            await interaction.response.edit_message(view=review_buttons(registration_id, disabled=True))
+            await interaction.followup.send(f"ℹ️ 이미 처리된 신청입니다. (현재 상태: {status})", ephemeral=True)
+            return
+
+        if action == "reject":
+            await interaction.response.send_modal(self.RejectModal(self, registration_id))
+            return
+
+        now = datetime.datetime.now(datetime.UTC).isoformat()
+        if not self._close_registration(registration_id, "UPDATE car_registrations SET status = ?, approved_by = ?, approved_at = ?", (STATUS_APPROVED, str(interaction.user.id), now)):
+            await interaction.response.send_message("ℹ️ 다른 관리자가 먼저 처리했거나 검토 시간이 지난 신청입니다.", ephemeral=True)
+            return
+        await interaction.response.edit_message(view=review_buttons(registration_id, disabled=True))
+
+        try:
+            approved_user = await self.bot.fetch_user(int(registration['user_id']))
+        except discord.HTTPException:
+            approved_user = None
+        if not approved_user:
+            await interaction.followup.send("원래 신청자를 찾을 수 없어 차량 등록증을 발급할 수 없습니다.", ephemeral=True)
+            return
+
+        registration_certificate_embed = self._certificate_embed(registration, interaction.user.display_name, approved_user)
+
+        server_config = self.get_server_config(int(registration['guild_id']))
+        if server_config and server_config['approved_cars_channel_id']:
+            approved_channel = self.bot.get_channel(int(server_config['approved_cars_channel_id']))
+            if approved_channel:
+                await approved_channel.send(f"{approved_user.mention}님, 차량 등록이 승인되었습니다!", embed=registration_certificate_embed)
+                await interaction.followup.send(f"✅ {registration['car_name']} 차량이 승인되어 등록증이 발급되었습니다.", ephemeral=False)
             else:
-                await interaction.followup.send("원래 신청자를 찾을 수 없어 차량 등록증을 발급할 수 없습니다.", ephemeral=True)
-            self.stop()
-
-        @discord.ui.button(label="거부 ❌", style=discord.ButtonStyle.danger, custom_id="reject_car")
-        async def reject_callback(self, interaction: discord.Interaction, button: discord.ui.Button):
-            for item in self.children:
-                item.disabled = True
-            await interaction.response.edit_message(view=self)
-
-            class RejectModal(discord.ui.Modal, title="차량 등록 거부 사유 입력"):
-                reason = discord.ui.TextInput(label="거부 사유", style=discord.TextStyle.paragraph, required=True,
-                                              placeholder="예: 금지 차량, 정보 부족 등")
-
-                async def on_submit(self, modal_interaction: discord.Interaction):
-                    rejected_user = await self.bot_instance.fetch_user(self.user_id)
-                    conn = self.bot_instance.get_db_connection()
-                    cursor = conn.cursor()
-                    cursor.execute("""
-                        UPDATE car_registrations SET status = ?, rejected_by = ?, rejected_at = ?, rejection_reason = ?
-                        WHERE id = ?
-                    """, ("거부됨", str(modal_interaction.user.id), datetime.datetime.now(datetime.UTC).isoformat(), self.reason.value, self.interaction_id)) # DeprecationWarning 수정
-                    conn.commit()
-                    conn.close()
+                await interaction.followup.send("❌ 서버에 설정된 '차량 승인 채널'을 찾을 수 없습니다. 관리자에게 문의하세요.", ephemeral=True)
+        else:
+            await interaction.followup.send("❌ 서버에 '차량 승인 채널'이 설정되어 있지 않습니다. 관리자에게 문의하세요.", ephemeral=True)
+
+    @staticmethod
+    def _certificate_embed(registration, approver_name: str, user: discord.abc.User = None) -> discord.Embed:
+        registration_certificate_embed = discord.Embed(
+            title=f"🚗 {registration['car_name']} 차량 등록증",
+            description=f"<@{registration['user_id']}>님의 차량이 성공적으로 등록되었습니다!",
+            color=discord.Color.blue()
+        )
+        registration_certificate_embed.add_field(name="차량 이름", value=registration['car_name'], inline=False)
+        registration_certificate_embed.add_field(name="등록세", value=f"{registration['registration_tax']} 원 (납부 완료)", inline=False) # 통화단위 변경
+        registration_certificate_embed.set_footer(text=f"승인 관리자: {approver_name}")
+        if user and user.avatar:
+            registration_certificate_embed.set_thumbnail(url=user.avatar.url)
+        return registration_certificate_embed
+
+    async def _reject_registration(self, modal_interaction: discord.Interaction, registration_id: int, reason: str):
+        now = datetime.datetime.now(datetime.UTC).isoformat()
+        if not self._close_registration(registration_id, "UPDATE car_registrations SET status = ?, rejected_by = ?, rejected_at = ?, rejection_reason = ?",
+                                        (STATUS_REJECTED, str(modal_interaction.user.id), now, reason)):
+            await modal_interaction.response.send_message("ℹ️ 다른 관리자가 먼저 처리했거나 검토 시간이 지난 신청입니다.", ephemeral=True)
+            return
+        await modal_interaction.response.edit_message(view=review_buttons(registration_id, disabled=True))
+
+        registration = self._load_registration(registration_id)
+        try:
+            rejected_user = await self.bot.fetch_user(int(registration['user_id']))
+        except discord.HTTPException:
+            rejected_user = None
+        if not rejected_user:
+            await modal_interaction.followup.send("원래 신청자를 찾을 수 없어 거부 메시지를 보낼 수 없습니다.", ephemeral=True)
+            return
+
+        dm_cog = self.bot.get_cog("DirectMessages")
+        if dm_cog:
+            dm_cog.send(rejected_user,
+                f"❌ {registration['car_name']} 차량 등록 신청이 거부되었습니다.\n"
+                f"**사유:** {reason}\n"
+                f"궁금한 점이 있다면 관리자에게 문의해주세요."
+            )
+        await modal_interaction.followup.send(f"❌ {registration['car_name']} 차량 등록이 거부되었고, 신청자에게 사유가 전달되었습니다.", ephemeral=False)
+
+    # --- 주기 작업: 검토 시간이 지난 신청을 한 번에 만료 처리 ---
+    def _expire_stale_registrations(self) -> dict:
+        """검토중인 신청 중 시간이 지난 것을 UPDATE 한 번으로 만료시키고, 환불을 켠 서버는 같은 트랜잭션에서 등록세를 돌려줍니다."""
+        started = time.perf_counter()
+        now = datetime.datetime.now(datetime.UTC)
+        cutoff = (now - datetime.timedelta(seconds=CAR_REVIEW_TIMEOUT_SECONDS)).isoformat()
+        conn = self.get_db_connection()
+        try:
+            with bank_ledger.transaction(conn):
+                expired = conn.execute("""
+                    UPDATE car_registrations SET status = ?, timed_out_at = ?
+                    WHERE status = ? AND requested_at < ?
+                    RETURNING id, user_id, username, car_name, registration_tax, guild_id, admin_channel_id, admin_message_id
+                """, (STATUS_TIMED_OUT, now.isoformat(), STATUS_PENDING, cutoff)).fetchall()
+                refunds = []
+                if expired:
+                    refund_guilds = {row[0] for row in conn.execute("SELECT guild_id FROM server_configs WHERE car_timeout_refund_enabled = 1")}
+                    refunds = [row for row in expired if row['guild_id'] in refund_guilds and row['registration_tax'] > 0]
+                balances = bank_ledger.refund_fees(conn, [
+                    (row['user_id'], row['username'], row['registration_tax'], f"차량 등록세 환불 ({row['car_name']}, 검토 시간 초과)") for row in refunds
+                ])
+        finally:
+            conn.close()
+        return {"expired": expired, "refunded": refunds, "balances": balances, "elapsed": time.perf_counter() - started}
+
+    async def _disable_review_messages(self, registrations) -> int:
+        """처리된 신청의 관리자 메시지 버튼을 비활성화합니다. 대량 처리 시 채널 속도 제한에 걸리지 않도록 간격을 둡니다."""
+        edited = 0
+        for row in registrations:
+            if not row['admin_channel_id'] or not row['admin_message_id']:
+                continue
+            try:
+                channel = self.bot.get_channel(int(row['admin_channel_id']))
+                if not channel:
+                    continue
+                await channel.get_partial_message(int(row['admin_message_id'])).edit(view=review_buttons(row['id'], disabled=True))
+                edited += 1
+            except discord.NotFound:
+                continue # 관리자가 메시지를 지운 경우
+            except Exception as e: # 한 건의 실패로 나머지 메시지 처리가 멈추지 않도록
+                print(f"차량 신청 {row['id']}의 버튼 비활성화 실패: {e}")
+            await asyncio.sleep(CAR_MESSAGE_EDIT_INTERVAL)
+        return edited
+
+    @tasks.loop(seconds=CAR_REVIEW_SWEEP_INTERVAL)
+    async def expire_registrations(self):
+        try:
+            result = await asyncio.to_thread(self._expire_stale_registrations)
+        except Exception as e:
+            print(f"차량 등록 만료 처리 중 오류 발생: {e}")
+            return
+
+        bank_cog = self.bot.get_cog("Bank")
+        if bank_cog:
+            for user_id, balance in result['balances'].items():
+                bank_cog.update_leaderboards(user_id, balance) # 부자 순위에 환불 반영
+        dm_cog = self.bot.get_cog("DirectMessages")
+        if dm_cog:
+            for row in result['refunded']:
+                user = self.bot.get_user(int(row['user_id']))
+                if user:
+                    dm_cog.send(user, f"⌛ {row['car_name']} 차량 등록 신청의 검토 시간이 지나 등록세 **{row['registration_tax']} 원**이 환불되었습니다.")
+
+        edit_started = time.perf_counter()
+        edited = await self._disable_review_messages(result['expired'])
+        metrics = {
+            'car_sweep_ms': round(result['elapsed'] * 1000, 2),
+            'car_sweep_expired': len(result['expired']),
+            'car_sweep_refunded': len(result['refunded']),
+            'car_sweep_edit_ms': round((time.perf_counter() - edit_started) * 1000),
+            'car_sweep_edited': edited,
+        }
+        try:
+            await asyncio.to_thread(self.bot.record_metrics, metrics)
+        except Exception as e:
+            print(f"차량 등록 만료 지표 기록 중 오류 발생: {e}")
+        if result['expired']:
+            print(f"차량 등록 신청 {len(result['expired'])}건 검토 시간 초과 처리 (환불 {len(result['refunded'])}건, {metrics['car_sweep_ms']}ms)")
+
+    @expire_registrations.before_loop
+    async def before_expire_registrations(self):
+        await self.bot.wait_until_ready()
 
-                    if rejected_user:
-                        await rejected_user.send(
-                            f"❌ {self.car_name} 차량 등록 신청이 거부되었습니다.\n"
-                            f"**사유:** {self.reason.value}\n"
-                            f"궁금한 점이 있다면 관리자에게 문의해주세요."
-                        )
-                        await modal_interaction.response.send_message(
-                            f"❌ {self.car_name} 차량 등록이 거부되었고, 신청자에게 사유가 전달되었습니다.", ephemeral=False)
-                    else:
-                        await modal_interaction.response.send_message(
-                            "원래 신청자를 찾을 수 없어 거부 메시지를 보낼 수 없습니다.", ephemeral=True)
-                    self.stop()
-
-            await interaction.response.send_modal(RejectModal())
-            self.stop()
-
-        async def on_timeout(self):
-            for item in self.children:
-                item.disabled = True
-            if self.message:
-                await self.message.edit(view=self)
-            conn = self.bot_instance.get_db_connection()
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE car_registrations SET status = ?, timed_out_at = ?
-                WHERE id = ?
-            """, ("검토 시간 초과", datetime.datetime.now(datetime.UTC).isoformat(), self.interaction_id)) # DeprecationWarning 수정
+    # --- 주기 작업: 대시보드에서 일괄 승인/거부한 신청의 등록증 게시 및 알림 ---
+    def _load_review_notifications(self) -> list:
+        conn = self.get_db_connection()
+        try:
+            return conn.execute("""
+                SELECT n.action, n.refunded, r.* FROM car_review_notifications n
+                JOIN car_registrations r ON r.id = n.registration_id
+                ORDER BY n.registration_id
+            """).fetchall()
+        finally:
+            conn.close()
+
+    def _finish_review_notifications(self, registration_ids: list, refunded_user_ids: list) -> dict:
+        """처리한 알림을 지우고 환불받은 유저의 현재 잔액을 돌려줍니다 (부자 순위 반영용)."""
+        conn = self.get_db_connection()
+        try:
+            conn.executemany("DELETE FROM car_review_notifications WHERE registration_id = ?", [(registration_id,) for registration_id in registration_ids])
             conn.commit()
+            return bank_ledger.load_balances(conn, refunded_user_ids)
+        finally:
             conn.close()
-            print("버튼 타임아웃!")
+
+    async def _post_certificates(self, approved: list) -> bool:
+        """승인된 신청의 등록증을 서버의 승인 채널에 메시지당 최대 10개씩 묶어 간격을 두고 게시합니다.
+
+        게시한 묶음의 알림은 바로 지워서, 중간에 실패해도 다음 주기에 같은 등록증을 다시 게시하지 않습니다.
+        반환값: 모든 서버를 오류 없이 처리했는지 여부
+        """
+        by_guild = collections.defaultdict(list)
+        for row in approved:
+            by_guild[row['guild_id']].append(row)
+        completed = True
+        for guild_id, rows in by_guild.items():
+            try:
+                await self._post_guild_certificates(guild_id, rows)
+            except Exception as e:
+                completed = False
+                print(f"서버 {guild_id} 등록증 게시 중 오류 발생 (다음 주기에 남은 건을 다시 처리): {e}")
+        return completed
+
+    async def _post_guild_certificates(self, guild_id: str, rows: list):
+        server_config = await asyncio.to_thread(self.get_server_config, int(guild_id))
+        channel = self.bot.get_channel(int(server_config['approved_cars_channel_id'])) if server_config and server_config['approved_cars_channel_id'] else None
+        if not channel:
+            print(f"서버 {guild_id}의 차량 승인 채널을 찾을 수 없어 등록증 {len(rows)}건을 게시하지 못했습니다.")
+            await asyncio.to_thread(self._finish_review_notifications, [row['id'] for row in rows], [])
+            return
+        for start in range(0, len(rows), CERTIFICATES_PER_MESSAGE):
+            batch = rows[start:start + CERTIFICATES_PER_MESSAGE]
+            embeds, mentions = [], []
+            for row in batch:
+                try:
+                    embeds.append(self._certificate_embed(row, f"대시보드 ({row['approved_by'].split(':', 1)[-1]})", self.bot.get_user(int(row['user_id']))))
+                    mentions.append(f"<@{row['user_id']}>")
+                except Exception as e:
+                    print(f"차량 신청 {row['id']}의 등록증을 만들지 못했습니다: {e}")
+            if embeds:
+                try:
+                    await channel.send(f"{' '.join(dict.fromkeys(mentions))}님, 차량 등록이 승인되었습니다!", embeds=embeds)
+                except discord.HTTPException as e:
+                    print(f"서버 {guild_id} 등록증 게시 실패: {e}")
+            await asyncio.to_thread(self._finish_review_notifications, [row['id'] for row in batch], [])
+            await asyncio.sleep(CAR_MESSAGE_EDIT_INTERVAL)
+
+    def _rejection_message(self, row) -> str:
+        message = (
+            f"❌ {row['car_name']} 차량 등록 신청이 거부되었습니다.\n"
+            f"**사유:** {row['rejection_reason']}\n"
+        )
+        if row['refunded']:
+            message += f"등록세 **{row['registration_tax']} 원**이 환불되었습니다.\n"
+        return message + "궁금한 점이 있다면 관리자에게 문의해주세요."
+
+    @tasks.loop(seconds=CAR_DASHBOARD_POLL_INTERVAL)
+    async def post_dashboard_reviews(self):
+        try:
+            version = await asyncio.to_thread(self.bot.get_data_version, 'car_reviews')
+            if version == self.car_reviews_version:
+                return
+            notifications = await asyncio.to_thread(self._load_review_notifications)
+        except Exception as e:
+            print(f"대시보드 차량 검토 결과 확인 중 오류 발생: {e}")
+            return
+
+        approved = [row for row in notifications if row['action'] == 'approve']
+        rejected = [row for row in notifications if row['action'] == 'reject']
+        completed = await self._post_certificates(approved)
+
+        # 거부 알림은 DM 큐에 넣기만 하므로 (기다림 없음) 모두 넣은 뒤 한 번에 지움
+        dm_cog = self.bot.get_cog("DirectMessages")
+        for row in rejected:
+            try:
+                user = self.bot.get_user(int(row['user_id']))
+                if dm_cog and user:
+                    dm_cog.send(user, self._rejection_message(row))
+            except Exception as e:
+                print(f"차량 신청 {row['id']}의 거부 알림 전송 실패: {e}")
+        try:
+            balances = await asyncio.to_thread(self._finish_review_notifications, [row['id'] for row in rejected],
+                                               list({row['user_id'] for row in rejected if row['refunded']}))
+        except Exception as e:
+            print(f"대시보드 차량 검토 알림 정리 중 오류 발생: {e}")
+            return
+        bank_cog = self.bot.get_cog("Bank")
+        if bank_cog:
+            for user_id, balance in balances.items():
+                bank_cog.update_leaderboards(user_id, balance) # 부자 순위에 환불 반영
+
+        # 알림은 이미 지웠으므로 버튼 비활성화가 일부 실패해도 다시 게시하지 않음 (남은 버튼은 누르면 처리된 신청으로 안내됨)
+        await self._disable_review_messages(notifications)
+        if completed:
+            self.car_reviews_version = version
+        if notifications:
+            print(f"대시보드 차량 검토 결과 처리: 승인 {len(approved)}건, 거부 {len(rejected)}건")
+
+    @post_dashboard_reviews.before_loop
+    async def before_post_dashboard_reviews(self):
+        await self.bot.wait_until_ready()
 
     # --- 메시지 리스너 (모든 메시지 처리의 시작점) ---
     @commands.Cog.listener()
@@ -169,14 +431,14 @@ class Car(commands.Cog):
             else: await send_response(response_msg)
             return
 
-        registration_channel_id = server_config.get('registration_channel_id')
-        car_admin_channel_id = server_config.get('car_admin_channel_id')
-        car_admin_role_id = server_config.get('car_admin_role_id')
-        approved_cars_channel_id = server_config.get('approved_cars_channel_id')
+        registration_channel_id = server_config['registration_channel_id']
+        car_admin_channel_id = server_config['car_admin_channel_id']
+        car_admin_role_id = server_config['car_admin_role_id']
+        approved_cars_channel_id = server_config['approved_cars_channel_id']
 
         # 상수로 사용할 값들을 DB에서 불러오기 (설정 없으면 기본값 사용)
-        forbidden_cars = json.loads(server_config.get('car_forbidden_cars_json', '["탱크", "전투기", "핵잠수함", "우주선"]'))
-        registration_tax = server_config.get('car_registration_tax', 50000)
+        forbidden_matcher = self._get_forbidden_matcher(guild_id, server_config['car_forbidden_cars_json'])
+        registration_tax = server_config['car_registration_tax'] if server_config['car_registration_tax'] is not None else 50000
 
         if not all([registration_channel_id, car_admin_channel_id, car_admin_role_id, approved_cars_channel_id]):
             response_msg = "❌ 차량 관리 봇의 필수 설정(차량 등록 채널, 관리 채널, 관리 역할, 승인 채널)이 완료되지 않았습니다. 관리자에게 문의하여 `/설정` 명령어를 사용해 필요한 채널과 역할을 설정해달라고 요청하세요."
@@ -184,8 +446,11 @@ class Car(commands.Cog):
             else: await send_response(response_msg)
             return
 
-        if 차량이름.lower() in [c.lower() for c in forbidden_cars]:
+        forbidden_hit = forbidden_matcher.match(차량이름)
+        if forbidden_hit is not None:
             response_msg = f"🚫 '{차량이름}'은(는) RP 서버에 등록할 수 없는 **금지 차량**입니다."
+            if forbidden_hit != 차량이름:
+                response_msg += f" ('{forbidden_hit}'과(와) 같은 차량으로 판단되었습니다.)"
             if interaction: await interaction.followup.send(response_msg, ephemeral=True)
             else: await send_response(response_msg)
             return
@@ -194,40 +459,35 @@ class Car(commands.Cog):
         cursor = conn.cursor()
         user_id = str(user.id)
 
-        cursor.execute("SELECT balance FROM bank_accounts WHERE user_id = ?", (user_id,))
-        bank_account = cursor.fetchone()
-        current_balance = bank_account["balance"] if bank_account else 0
-
-        if current_balance < registration_tax:
-            conn.close()
+        # 등록세 차감과 신청 기록을 하나의 트랜잭션으로 처리 (잔액 확인은 조건부 UPDATE가 대신함)
+        try:
+            with bank_ledger.transaction(conn):
+                new_balance = None
+                if registration_tax > 0:
+                    new_balance = bank_ledger.pay_fee(conn, user_id, user_display_name, registration_tax, f"차량 등록세 ({차량이름})")
+
+                car_doc = {
+                    "user_id": user_id,
+                    "username": user_display_name,
+                    "car_name": 차량이름,
+                    "registration_tax": registration_tax,
+                    "status": "검토중",
+                    "requested_at": datetime.datetime.now(datetime.UTC).isoformat(), # DeprecationWarning 수정
+                    "guild_id": str(guild_id),
+                    "channel_id": str(channel_id)
+                }
+                cursor.execute("""
+                    INSERT INTO car_registrations (user_id, username, car_name, registration_tax, status, requested_at, guild_id, channel_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, (car_doc["user_id"], car_doc["username"], car_doc["car_name"], car_doc["registration_tax"], car_doc["status"], car_doc["requested_at"], car_doc["guild_id"], car_doc["channel_id"]))
+                doc_id = cursor.lastrowid
+        except (bank_ledger.InsufficientFunds, bank_ledger.AccountNotFound) as e:
+            current_balance = e.balance if isinstance(e, bank_ledger.InsufficientFunds) else 0
             response_msg = f"❌ 잔고가 부족합니다! 차량 등록세 **{registration_tax} 원**이 필요합니다. 현재 잔고: {current_balance} 원"
             if interaction: await interaction.followup.send(response_msg, ephemeral=True)
             else: await send_response(response_msg)
             return
-
-        try:
-            cursor.execute("UPDATE bank_accounts SET balance = balance - ? WHERE user_id = ?", (registration_tax, user_id))
-
-            car_doc = {
-                "user_id": user_id,
-                "username": user_display_name,
-                "car_name": 차량이름,
-                "registration_tax": registration_tax,
-                "status": "검토중",
-                "requested_at": datetime.datetime.now(datetime.UTC).isoformat(), # DeprecationWarning 수정
-                "guild_id": str(guild_id),
-                "channel_id": str(channel_id)
-            }
-            cursor.execute("""
-                INSERT INTO car_registrations (user_id, username, car_name, registration_tax, status, requested_at, guild_id, channel_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (car_doc["user_id"], car_doc["username"], car_doc["car_name"], car_doc["registration_tax"], car_doc["status"], car_doc["requested_at"], car_doc["guild_id"], car_doc["channel_id"]))
-            doc_id = cursor.lastrowid
-
-            conn.commit()
         except Exception as e:
-            conn.rollback()
-            conn.close()
             print(f"차량 등록 및 결제 중 오류 발생: {e}")
             response_msg = "❌ 차량 등록 및 결제 처리 중 오류가 발생했습니다. 관리자에게 문의하세요."
             if interaction: await interaction.followup.send(response_msg, ephemeral=True)
@@ -236,6 +496,9 @@ class Car(commands.Cog):
         finally:
             conn.close()
 
+        bank_cog = self.bot.get_cog("Bank")
+        if bank_cog and new_balance is not None:
+            bank_cog.update_leaderboards(user_id, new_balance) # 부자 순위에 등록세 차감 반영
 
         registration_embed = discord.Embed(
             title=f"🚗 신규 차량 등록 신청: {차량이름}",
@@ -271,24 +534,19 @@ class Car(commands.Cog):
             admin_notification_embed.add_field(name="등록세", value=f"**{registration_tax} 원**", inline=True) # 통화단위 변경
             admin_notification_embed.set_footer(text=f"신청 ID: {doc_id} | 서버 ID: {guild_id}")
 
-            view = self.ApprovalButtons(
-                self.bot,
-                user_id=user.id,
-                car_name=차량이름,
-                original_interaction_user_mention=user_mention,
-                interaction_id=doc_id,
-                guild_id=guild_id
-            )
-
             try:
                 admin_role = admin_channel.guild.get_role(int(car_admin_role_id))
                 if admin_role:
                     message = await admin_channel.send(
                         f"{admin_role.mention} **차량 등록 신청이 들어왔습니다!**",
                         embed=admin_notification_embed,
-                        view=view
+                        view=review_buttons(doc_id)
                     )
-                    view.message = message
+                    conn = self.get_db_connection()
+                    conn.execute("UPDATE car_registrations SET admin_channel_id = ?, admin_message_id = ? WHERE id = ?",
+                                 (str(admin_channel.id), str(message.id), doc_id))
+                    conn.commit()
+                    conn.close()
                 else:
                     response_msg = "서버에 설정된 '차량 관리 역할'을 찾을 수 없습니다. 관리자에게 문의하세요."
                     if interaction: await interaction.followup.send(response_msg, ephemeral=True)
@@ -0,0 +1,201 @@
+import discord
+from discord.ext import commands, tasks
+import asyncio
+import collections
+import time
+
+# DM 큐를 확인하는 주기 (초)
+DM_QUEUE_TICK = 0.5
+# 같은 유저에게 가는 DM을 모아 두는 시간 (초) - 이 사이에 들어온 알림은 DM 하나로 합쳐서 전송
+DM_COALESCE_DELAY = 2
+# 전역 전송 속도 (토큰 버킷): 초당 DM_RATE_PER_SECOND개, 최대 DM_BURST개까지 연속 전송
+DM_RATE_PER_SECOND = 2
+DM_BURST = 5
+# 일시적인 오류로 실패한 DM 재시도 횟수와 첫 대기 시간 (초, 시도할 때마다 두 배)
+DM_MAX_ATTEMPTS = 4
+DM_RETRY_BASE_DELAY = 5
+# DM을 막아 둔 유저를 다시 시도하지 않을 시간 (초, 그 사이 봇이 있는 서버에 들어오면 바로 해제)
+DM_CLOSED_TTL = 60 * 60
+# 킥/밴 직전처럼 큐를 거치지 않고 바로 보내는 DM을 기다리는 최대 시간 (초) - 처분이 DM 때문에 늦어지지 않도록
+DM_DIRECT_TIMEOUT = 5
+# 지연 시간 통계에 쓸 최근 전송 건수
+DM_LATENCY_SAMPLES = 1000
+# 지표를 DB(bot_metrics)에 기록하는 주기 (초)
+DM_METRICS_INTERVAL = 60
+
+class DirectMessages(commands.Cog):
+    """유저 DM을 백그라운드에서 모아 보내는 큐. 명령어 응답이 DM 전송을 기다리지 않도록 다른 코그는 send()만 호출합니다."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        # key: user_id, value: {'user', 'lines', 'queued_at', 'ready_at', 'attempts'} - 들어온 순서대로 처리
+        self.pending = collections.OrderedDict()
+        self.closed_dms = {} # user_id -> 다시 시도할 시각 (DM을 막아 둔 유저)
+        self.tokens = float(DM_BURST)
+        self.tokens_updated_at = time.monotonic()
+        self.latencies = collections.deque(maxlen=DM_LATENCY_SAMPLES) # 첫 알림이 들어온 뒤 전송까지 걸린 시간 (초)
+        self.counters = collections.Counter() # queued, delivered, sent_dms, dropped, skipped_closed, retried
+        self.deliver_dms.start()
+        self.record_dm_metrics.start()
+
+    def cog_unload(self):
+        self.deliver_dms.cancel()
+        self.record_dm_metrics.cancel()
+        if self.pending:
+            print(f"⚠️ 전송하지 못한 DM {sum(len(entry['lines']) for entry in self.pending.values())}건이 버려집니다.")
+
+    def send(self, user: discord.abc.User, content: str):
+        """DM 한 건을 큐에 넣습니다. 같은 유저에게 곧이어 들어온 알림은 한 메시지로 합쳐집니다."""
+        now = time.monotonic()
+        self.counters['queued'] += 1
+        closed_until = self.closed_dms.get(user.id)
+        if closed_until:
+            if now < closed_until:
+                self.counters['skipped_closed'] += 1
+                return
+            del self.closed_dms[user.id]
+
+        entry = self.pending.get(user.id)
+        if entry:
+            entry['lines'].append(content)
+            return
+        self.pending[user.id] = {'user': user, 'lines': [content], 'queued_at': now, 'ready_at': now + DM_COALESCE_DELAY, 'attempts': 0}
+
+    async def send_now(self, user: discord.abc.User, content: str) -> bool:
+        """큐와 DM 차단 기록을 거치지 않고 바로 보냅니다. 킥/밴 안내처럼 처분 뒤에는 보낼 수 없는(공통 서버가 사라지는) DM용.
+
+        실패해도 차단 기록에 남기지 않습니다 (처분 직전의 실패는 이후 DM과 무관). 반환값: 전송 성공 여부
+        """
+        self.counters['queued'] += 1
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(user.send(content[:2000]), DM_DIRECT_TIMEOUT)
+        except (discord.HTTPException, asyncio.TimeoutError) as e:
+            self.counters['dropped'] += 1
+            print(f"유저 {user}에게 DM을 바로 보내지 못했습니다: {e}")
+            return False
+        self.counters['sent_dms'] += 1
+        self.counters['delivered'] += 1
+        self.latencies.append(time.monotonic() - started)
+        return True
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        # 다시 공통 서버가 생겼으므로 DM 차단 기록을 지움 (킥/밴 뒤 재입장 등)
+        self.closed_dms.pop(member.id, None)
+
+    def metrics(self) -> dict:
+        latencies = sorted(self.latencies)
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] if latencies else 0.0
+        return {
+            'dm_queued': self.counters['queued'],
+            'dm_delivered': self.counters['delivered'],
+            'dm_sent_messages': self.counters['sent_dms'],
+            'dm_dropped': self.counters['dropped'],
+            'dm_skipped_closed': self.counters['skipped_closed'],
+            'dm_retried': self.counters['retried'],
+            'dm_pending': sum(len(entry['lines']) for entry in self.pending.values()),
+            'dm_latency_p50_ms': round(percentile(0.5) * 1000),
+            'dm_latency_p95_ms': round(percentile(0.95) * 1000),
+        }
+
+    def _take_token(self, now: float) -> bool:
+        self.tokens = min(DM_BURST, self.tokens + (now - self.tokens_updated_at) * DM_RATE_PER_SECOND)
+        self.tokens_updated_at = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    @staticmethod
+    def _split_message(lines: list) -> list:
+        """모은 알림을 디스코드 메시지 길이 제한(2000자)에 맞게 나눕니다. 반환값: [(메시지, 포함된 알림 수), ...]"""
+        chunks, current, count = [], "", 0
+        for line in lines:
+            line = line[:2000]
+            if current and len(current) + 1 + len(line) > 2000:
+                chunks.append((current, count))
+                current, count = line, 1
+            else:
+                current = f"{current}\n{line}" if current else line
+                count += 1
+        if current:
+            chunks.append((current, count))
+        return chunks
+
+    # --- 주기 작업: 준비된 DM을 속도 제한에 맞춰 전송 ---
+    @tasks.loop(seconds=DM_QUEUE_TICK)
+    async def deliver_dms(self):
+        now = time.monotonic()
+        for user_id in list(self.pending.keys()):
+            entry = self.pending[user_id]
+            if entry['ready_at'] > now:
+                continue
+            if not self._take_token(now):
+                break
+            del self.pending[user_id]
+            try:
+                await self._deliver(user_id, entry)
+            except Exception as e:
+                # 예상하지 못한 오류로 큐 작업 전체가 멈추지 않도록 이 유저의 알림만 버림
+                self.counters['dropped'] += len(entry['lines'])
+                print(f"유저 {entry['user']}에게 DM 전송 중 오류 발생 (알림 {len(entry['lines'])}건 버림): {e}")
+            now = time.monotonic()
+
+    @deliver_dms.before_loop
+    async def before_deliver_dms(self):
+        await self.bot.wait_until_ready()
+
+    def _requeue(self, user_id: int, entry: dict, ready_at: float):
+        """보내지 못한 알림을 큐 뒤쪽에 다시 넣습니다. 그사이 같은 유저에게 들어온 알림은 뒤에 이어 붙입니다."""
+        entry['ready_at'] = ready_at
+        newer = self.pending.pop(user_id, None)
+        if newer:
+            entry['lines'].extend(newer['lines'])
+        self.pending[user_id] = entry
+
+    async def _deliver(self, user_id: int, entry: dict):
+        """모은 알림을 메시지 하나(토큰 하나)만큼 보냅니다. 2000자를 넘어 남은 알림은 다음 토큰으로 이어서 보냅니다."""
+        chunk, count = self._split_message(entry['lines'])[0]
+        try:
+            await entry['user'].send(chunk)
+        except discord.Forbidden:
+            # DM을 막아 두었거나 같은 서버가 없는 유저 - 한동안 이 유저에게는 보내지 않음
+            self.closed_dms[user_id] = time.monotonic() + DM_CLOSED_TTL
+            self.counters['dropped'] += len(entry['lines'])
+            print(f"유저 {entry['user']}에게 DM을 보낼 수 없습니다. (알림 {len(entry['lines'])}건 버림)")
+            return
+        except (discord.HTTPException, asyncio.TimeoutError) as e:
+            entry['attempts'] += 1
+            if entry['attempts'] >= DM_MAX_ATTEMPTS:
+                self.counters['dropped'] += len(entry['lines'])
+                print(f"유저 {entry['user']}에게 DM 전송 실패 ({entry['attempts']}회 시도, 알림 {len(entry['lines'])}건 버림): {e}")
+                return
+            self.counters['retried'] += 1
+            self._requeue(user_id, entry, time.monotonic() + DM_RETRY_BASE_DELAY * (2 ** (entry['attempts'] - 1)))
+            return
+
+        self.counters['sent_dms'] += 1
+        self.counters['delivered'] += count
+        del entry['lines'][:count] # 보낸 알림은 빼 두어 다시 보내지 않음
+        entry['attempts'] = 0
+        if entry['lines']:
+            self._requeue(user_id, entry, time.monotonic())
+            return
+        self.latencies.append(time.monotonic() - entry['queued_at'])
+
+    # --- 주기 작업: 지표 기록 (대시보드에서 조회) ---
+    @tasks.loop(seconds=DM_METRICS_INTERVAL)
+    async def record_dm_metrics(self):
+        try:
+            await asyncio.to_thread(self.bot.record_metrics, self.metrics())
+        except Exception as e:
+            print(f"DM 지표 기록 중 오류 발생: {e}")
+
+    @record_dm_metrics.before_loop
+    async def before_record_dm_metrics(self):
+        await self.bot.wait_until_ready()
+
+async def setup(bot):
+    await bot.add_cog(DirectMessages(bot))
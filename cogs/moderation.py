@@ -1,5 +1,5 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 import sqlite3
 import datetime
@@ -8,12 +8,64 @@ import os # os.getenv 사용을 위해 임포트
 import re # 정규표현식 (초대 링크 감지)
 import collections # 도배 감지를 위한 deque 사용
 import asyncio # 비동기 작업을 위한 asyncio 모듈 임포트
+import search_index
+
+# 전체 스캔 시 한 번에 처리할 멤버 수 (대형 서버는 이 단위로 끊어서 블랙리스트와 교집합 계산)
+BLACKLIST_SCAN_CHUNK_SIZE = 1000
+# 스캔 결과 임베드 한 페이지에 표시할 최대 유저 수
+BLACKLIST_SCAN_PAGE_SIZE = 15
+# 스캔 결과 한 페이지의 목록 최대 길이 (임베드 설명은 4096자 제한 - 위의 요약 줄 자리를 남겨둠)
+BLACKLIST_SCAN_PAGE_CHARS = 3500
+# 스캔 결과에 표시할 블랙리스트 사유 최대 길이 (일괄 가져온 피드의 사유는 길이 제한이 없음)
+BLACKLIST_SCAN_REASON_LIMIT = 200
+# 검색 결과를 대상별로 표시할 최대 개수
+SEARCH_RESULT_LIMIT = 5
+# 거래 내역처럼 트리거 없이 모아서 색인하는 검색 대상의 색인 주기 (초)
+SEARCH_INDEX_INTERVAL = 60
 
 class Moderation(commands.Cog):
     # 도배 감지를 위한 딕셔너리 (메시지 보낸 시간 기록)
     # key: guild_id, value: {user_id: deque(timestamps)}
     message_timestamps = collections.defaultdict(lambda: collections.defaultdict(collections.deque))
 
+    class BlacklistScanPages(discord.ui.View):
+        """블랙리스트 전체 스캔 결과를 페이지 단위로 넘겨보는 버튼 뷰"""
+        def __init__(self, pages: list, author_id: int):
+            super().__init__(timeout=300)
+            self.pages = pages
+            self.author_id = author_id
+            self.current_page = 0
+            self._update_buttons()
+
+        def _update_buttons(self):
+            self.prev_button.disabled = self.current_page <= 0
+            self.next_button.disabled = self.current_page >= len(self.pages) - 1
+
+        async def interaction_check(self, interaction: discord.Interaction) -> bool:
+            if interaction.user.id != self.author_id:
+                await interaction.response.send_message("❌ 스캔을 실행한 관리자만 페이지를 넘길 수 있습니다.", ephemeral=True)
+                return False
+            return True
+
+        @discord.ui.button(label="◀ 이전", style=discord.ButtonStyle.secondary)
+        async def prev_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+            self.current_page -= 1
+            self._update_buttons()
+            await interaction.response.edit_message(embed=self.pages[self.current_page], view=self)
+
+        @discord.ui.button(label="다음 ▶", style=discord.ButtonStyle.secondary)
+        async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+            self.current_page += 1
+            self._update_buttons()
+            await interaction.response.edit_message(embed=self.pages[self.current_page], view=self)
+
+        async def on_timeout(self):
+            for item in self.children:
+                item.disabled = True
+            if getattr(self, 'message', None):
+                try: await self.message.edit(view=self)
+                except discord.HTTPException: pass
+
     def __init__(self, bot):
         self.bot = bot
         self.get_db_connection = bot.get_db_connection
@@ -24,6 +76,161 @@ class Moderation(commands.Cog):
         self.get_bot_presence_settings = bot.get_bot_presence_settings # 봇 상태 가져오기 함수 주입
         self.set_bot_presence_settings = bot.set_bot_presence_settings # 봇 상태 설정 함수 주입
         self.gemini_model = bot.gemini_model # Gemini AI 모델 주입
+        # 블랙리스트 메모리 사본 {user_id(str): reason} - 전체 스캔 시 멤버마다 DB 조회하지 않도록 한 번만 불러옴
+        # (수십만 행이라 이벤트 루프를 막지 않도록 첫 적재도 갱신 작업의 첫 실행에서 스레드로 불러옴)
+        self.blacklist_cache = {}
+        self.blacklist_version = None
+        self.blacklist_loaded = asyncio.Event()
+        # 멤버 목록을 guild_members에 다시 쓰는 중인 길드 -> 그동안 들어온 입장/퇴장 이벤트 (덮어쓴 뒤 다시 반영)
+        self.member_sync_events = {}
+        self.refresh_blacklist_cache.start()
+        self.index_search_records.start()
+        self.sync_guild_members.start()
+
+    def cog_unload(self):
+        self.refresh_blacklist_cache.cancel()
+        self.index_search_records.cancel()
+        self.sync_guild_members.cancel()
+
+    # 대시보드/CLI에서 블랙리스트를 일괄 가져오면 data_versions 버전이 올라가므로, 바뀐 경우에만 다시 불러옴
+    @tasks.loop(seconds=30)
+    async def refresh_blacklist_cache(self):
+        try:
+            version = await asyncio.to_thread(self.bot.get_data_version, 'global_blacklist')
+            if version != self.blacklist_version:
+                # 새 사본을 스레드에서 다 만든 뒤 한 번에 교체 (불러오는 동안에는 이전 사본으로 계속 검사)
+                self.blacklist_cache = await asyncio.to_thread(self._load_blacklist_cache)
+                self.blacklist_version = version
+                self.blacklist_loaded.set()
+                print(f"✅ 블랙리스트 메모리 사본 갱신 완료: {len(self.blacklist_cache):,}명 (버전 {version})")
+        except Exception as e:
+            print(f"블랙리스트 메모리 사본 갱신 중 오류 발생: {e}") # 다음 주기에 다시 시도
+
+    def _load_blacklist_cache(self) -> dict:
+        """global_blacklist 테이블 전체를 {user_id: reason} 딕셔너리로 불러옵니다."""
+        conn = self.get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT user_id, reason FROM global_blacklist")
+        cache = {row['user_id']: row['reason'] for row in cursor.fetchall()}
+        conn.close()
+        return cache
+
+    # 거래 내역은 은행 작업의 쓰기 잠금 안에서 색인하지 않고, 쌓인 새 행을 주기적으로 묶어서 색인함
+    @tasks.loop(seconds=SEARCH_INDEX_INTERVAL)
+    async def index_search_records(self):
+        try:
+            indexed = await asyncio.to_thread(self._index_search_records)
+            if indexed:
+                print(f"🔎 검색 색인 갱신: {indexed:,}행")
+        except Exception as e:
+            print(f"검색 색인 갱신 중 오류 발생: {e}") # 다음 주기에 이어서 색인
+
+    def _index_search_records(self) -> int:
+        """밀린 행이 없을 때까지 배치 단위로 색인합니다. (배치마다 커밋하므로 쓰기 잠금은 짧게만 잡음)"""
+        conn = self.get_db_connection()
+        try:
+            total = 0
+            while indexed := search_index.index_pending(conn):
+                total += indexed
+            return total
+        finally:
+            conn.close()
+
+    # --- 길드 멤버 목록 (경고/거래 검색 범위) ---
+    def _replace_guild_members(self, guild_id: str, member_ids, events):
+        """guild_id의 멤버 목록을 member_ids로 바꾸고, 목록을 받는 동안 들어온 입장/퇴장 이벤트를 다시 반영합니다."""
+        conn = self.get_db_connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM guild_members WHERE guild_id = ?", (guild_id,))
+                conn.executemany("INSERT OR IGNORE INTO guild_members (guild_id, user_id) VALUES (?, ?)", ((guild_id, user_id) for user_id in member_ids))
+                for user_id, joined in events:
+                    if joined:
+                        conn.execute("INSERT OR IGNORE INTO guild_members (guild_id, user_id) VALUES (?, ?)", (guild_id, user_id))
+                    else:
+                        conn.execute("DELETE FROM guild_members WHERE guild_id = ? AND user_id = ?", (guild_id, user_id))
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _update_guild_member(self, guild_id: str, user_id: str, joined: bool):
+        conn = self.get_db_connection()
+        try:
+            if joined:
+                conn.execute("INSERT OR IGNORE INTO guild_members (guild_id, user_id) VALUES (?, ?)", (guild_id, user_id))
+            else:
+                conn.execute("DELETE FROM guild_members WHERE guild_id = ? AND user_id = ?", (guild_id, user_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+    async def _sync_guild_members(self, guild: discord.Guild):
+        """길드의 전체 멤버 목록을 받아 guild_members에 저장합니다. (멤버 캐시가 완성되지 않은 서버는 게이트웨이에서 받아옴)"""
+        guild_id = str(guild.id)
+        events = self.member_sync_events[guild_id] = []
+        try:
+            if guild.chunked:
+                member_ids = [str(member.id) for member in guild.members]
+            else:
+                member_ids = [str(member.id) async for member in guild.fetch_members(limit=None)]
+            await asyncio.to_thread(self._replace_guild_members, guild_id, member_ids, events)
+        finally:
+            del self.member_sync_events[guild_id]
+        return len(member_ids)
+
+    # 봇이 꺼져 있는 동안의 입장/퇴장은 이벤트로 받을 수 없으므로 시작할 때 모든 길드의 멤버 목록을 한 번 다시 씀
+    @tasks.loop(count=1)
+    async def sync_guild_members(self):
+        for guild in self.bot.guilds:
+            try:
+                await self._sync_guild_members(guild)
+            except Exception as e:
+                print(f"길드 멤버 목록 동기화 실패 (서버 {guild.id}): {e}")
+
+    @sync_guild_members.before_loop
+    async def before_sync_guild_members(self):
+        await self.bot.wait_until_ready()
+
+    async def _record_member_event(self, guild_id: str, user_id: str, joined: bool):
+        if guild_id in self.member_sync_events:
+            self.member_sync_events[guild_id].append((user_id, joined))
+        try:
+            await asyncio.to_thread(self._update_guild_member, guild_id, user_id, joined)
+        except sqlite3.Error as e:
+            print(f"길드 멤버 목록 갱신 실패 (서버 {guild_id}, 유저 {user_id}): {e}")
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        await self._record_member_event(str(member.guild.id), str(member.id), True)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        await self._record_member_event(str(member.guild.id), str(member.id), False)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild: discord.Guild):
+        try:
+            await self._sync_guild_members(guild)
+        except Exception as e:
+            print(f"길드 멤버 목록 동기화 실패 (서버 {guild.id}): {e}")
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        def delete_members():
+            conn = self.get_db_connection()
+            try:
+                conn.execute("DELETE FROM guild_members WHERE guild_id = ?", (str(guild.id),))
+                conn.commit()
+            finally:
+                conn.close()
+        try:
+            await asyncio.to_thread(delete_members)
+        except sqlite3.Error as e:
+            print(f"길드 멤버 목록 삭제 실패 (서버 {guild.id}): {e}")
 
     # --- 메시지 리스너 (모든 메시지 처리의 시작점) ---
     @commands.Cog.listener()
@@ -364,12 +571,26 @@ class Moderation(commands.Cog):
     async def scan_blacklist_slash(self, interaction: discord.Interaction, 유저: discord.Member):
         await self._scan_blacklist_user(유저, interaction=interaction)
 
+    @app_commands.command(name="블랙리스트전체스캔", description="서버의 모든 멤버를 글로벌 블랙리스트와 대조합니다.")
+    @app_commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def scan_blacklist_all_slash(self, interaction: discord.Interaction):
+        await self._scan_blacklist_guild(interaction=interaction)
+
     @app_commands.command(name="보안리포트", description="이 서버의 보안 설정 상태에 대한 리포트를 제공합니다.")
     @app_commands.guild_only()
     @commands.has_permissions(administrator=True)
     async def security_report_slash(self, interaction: discord.Interaction):
         await self._security_report(interaction=interaction)
 
+    @app_commands.command(name="검색", description="차량 등록, 경고, 티켓, 거래 기록을 검색어로 찾습니다.")
+    @app_commands.describe(검색어="찾을 단어 (여러 단어는 모두 포함하는 기록만)", 대상="검색할 기록 종류 (생략 시 전체)")
+    @app_commands.choices(대상=[app_commands.Choice(name=name, value=name) for name in search_index.SEARCH_SOURCES])
+    @app_commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def search_records_slash(self, interaction: discord.Interaction, 검색어: str, 대상: app_commands.Choice[str] = None):
+        await self._search_records(검색어, 대상.value if 대상 else None, interaction=interaction)
+
     @app_commands.command(name="명령어리스트", description="이 채널에서 사용 가능한 명령어 목록을 보여줍니다.")
     @app_commands.guild_only()
     async def command_list_slash(self, interaction: discord.Interaction):
@@ -433,11 +654,32 @@ class Moderation(commands.Cog):
     async def scan_blacklist_msg(self, ctx: commands.Context, 유저: discord.Member):
         await self._scan_blacklist_user(유저, ctx=ctx)
 
+    @commands.command(name="블랙리스트전체스캔", help="서버의 모든 멤버를 글로벌 블랙리스트와 대조합니다. (예: 저스트 블랙리스트전체스캔)")
+    @commands.has_permissions(administrator=True)
+    async def scan_blacklist_all_msg(self, ctx: commands.Context):
+        if not ctx.guild:
+            await ctx.send("이 명령어는 서버에서만 사용할 수 있습니다.")
+            return
+        await self._scan_blacklist_guild(ctx=ctx)
+
     @commands.command(name="보안리포트", help="이 서버의 보안 설정 상태에 대한 리포트를 제공합니다. (예: 저스트 보안리포트)")
     @commands.has_permissions(administrator=True)
     async def security_report_msg(self, ctx: commands.Context):
         await self._security_report(ctx=ctx)
 
+    @commands.command(name="검색", help="차량 등록, 경고, 티켓, 거래 기록을 검색어로 찾습니다. (예: 저스트 검색 람보르기니 / 저스트 검색 거래 월급)")
+    @commands.has_permissions(administrator=True)
+    async def search_records_msg(self, ctx: commands.Context, *, 검색어: str):
+        if not ctx.guild:
+            await ctx.send("이 명령어는 서버에서만 사용할 수 있습니다.")
+            return
+        if not self.is_command_enabled(ctx.guild.id, "검색"): await ctx.send(f"❌ 명령어 `{self.bot.command_prefix}검색`은 현재 이 서버에서 비활성화되어 있습니다."); return
+        대상, _, 나머지 = 검색어.partition(" ")
+        if 대상 in search_index.SEARCH_SOURCES and 나머지.strip():
+            await self._search_records(나머지.strip(), 대상, ctx=ctx)
+        else:
+            await self._search_records(검색어, None, ctx=ctx)
+
     @commands.command(name="명령어리스트", help="이 채널에서 사용 가능한 명령어 목록을 보여줍니다. (예: 저스트 명령어리스트)")
     async def command_list_msg(self, ctx: commands.Context):
         if not ctx.guild:
@@ -508,14 +750,13 @@ class Moderation(commands.Cog):
 
         try:
             if interaction and not interaction.response.is_done(): await interaction.response.defer(ephemeral=False) # 이미 응답이 없으면 defer
+            # 강퇴 뒤에는 공통 서버가 없어 DM이 막히므로 큐를 거치지 않고 먼저 보냄
+            await self._send_dm_now(유저, f"🚨 당신은 {target_guild.name} 서버에서 강퇴당했습니다. 사유: {사유}")
             await 유저.kick(reason=사유)
             response_msg = f"✅ {유저.display_name}님을 강퇴했습니다. 사유: {사유}"
             if interaction: await interaction.followup.send(response_msg)
             elif ctx: await ctx.send(response_msg)
             elif channel_to_send: await channel_to_send.send(response_msg)
-
-            try: await 유저.send(f"🚨 당신은 {target_guild.name} 서버에서 강퇴당했습니다. 사유: {사유}")
-            except discord.Forbidden: print(f"유저 {유저.display_name}에게 DM을 보낼 수 없습니다.")
         except discord.Forbidden:
             response_msg = "❌ 봇에게 강퇴 권한이 없거나, 대상 유저의 역할이 봇보다 높습니다."
             if interaction: await interaction.followup.send(response_msg, ephemeral=True)
@@ -562,13 +803,13 @@ class Moderation(commands.Cog):
 
         try:
             if interaction and not interaction.response.is_done(): await interaction.response.defer(ephemeral=False)
+            # 추방 뒤에는 공통 서버가 없어 DM이 막히므로 큐를 거치지 않고 먼저 보냄
+            await self._send_dm_now(유저, f"🚨 당신은 {target_guild.name} 서버에서 추방당했습니다. 사유: {사유}")
             await 유저.ban(reason=사유, delete_message_days=일수)
             response_msg = f"✅ {유저.display_name}님을 추방했습니다. 사유: {사유}, 메시지 삭제 일수: {일수}일"
             if interaction: await interaction.followup.send(response_msg)
             elif ctx: await ctx.send(response_msg)
             elif channel_to_send: await channel_to_send.send(response_msg)
-            try: await 유저.send(f"🚨 당신은 {target_guild.name} 서버에서 추방당했습니다. 사유: {사유}")
-            except discord.Forbidden: print(f"유저 {유저.display_name}에게 DM을 보낼 수 없습니다.")
         except discord.Forbidden:
             response_msg = "❌ 봇에게 추방 권한이 없거나, 대상 유저의 역할이 봇보다 높습니다."
             if interaction: await interaction.followup.send(response_msg, ephemeral=True)
@@ -655,6 +896,16 @@ class Moderation(commands.Cog):
             elif ctx: await ctx.send(response_msg)
             elif channel_to_send: await channel_to_send.send(response_msg)
 
+    def _send_dm(self, 유저: discord.abc.User, content: str):
+        """DM 큐에 넣어 백그라운드에서 전송합니다 (명령어 응답이 DM 전송을 기다리지 않음)."""
+        dm_cog = self.bot.get_cog("DirectMessages")
+        if dm_cog: dm_cog.send(유저, content)
+
+    async def _send_dm_now(self, 유저: discord.abc.User, content: str):
+        """킥/밴 직전 안내: 큐를 거치지 않고 바로 보냅니다 (처분 뒤에는 DM을 보낼 수 없음). 실패해도 처분은 계속 진행합니다."""
+        dm_cog = self.bot.get_cog("DirectMessages")
+        if dm_cog: await dm_cog.send_now(유저, content)
+
     async def _warn_user(self, 유저: discord.Member, 사유: str, interaction: discord.Interaction = None, ctx: commands.Context = None, channel_to_send=None):
         """유저에게 경고를 부여합니다."""
         target_guild = interaction.guild if interaction else ctx.guild
@@ -714,16 +965,17 @@ class Moderation(commands.Cog):
         elif ctx: await ctx.send(embed=warn_embed)
         elif channel_to_send: await channel_to_send.send(embed=warn_embed)
 
-        try:
-            await 유저.send(f"🚨 당신은 {target_guild.name} 서버에서 경고를 받았습니다. 사유: {사유}\n총 경고 횟수: {warning_count}회")
-        except discord.Forbidden:
-            print(f"유저 {유저.display_name}에게 DM을 보낼 수 없습니다.")
+        warn_dm = f"🚨 당신은 {target_guild.name} 서버에서 경고를 받았습니다. 사유: {사유}\n총 경고 횟수: {warning_count}회"
 
         # 자동 강퇴 경고 횟수 확인 (서버 설정에서 불러오기)
         server_config = self.bot.get_server_config(target_guild.id)
         auto_kick_warn_count = server_config.get('auto_kick_warn_count', 5) # 기본값 5
 
-        if warning_count >= auto_kick_warn_count:
+        if warning_count < auto_kick_warn_count:
+            self._send_dm(유저, warn_dm)
+        else:
+            # 곧 강퇴되므로 경고/강퇴 안내를 큐에 넣지 않고 강퇴 전에 바로 보냄
+            await self._send_dm_now(유저, f"{warn_dm}\n경고 {auto_kick_warn_count}회 누적으로 서버에서 자동 강퇴됩니다.")
             try:
                 await 유저.kick(reason=f"경고 {auto_kick_warn_count}회 누적으로 자동 강퇴")
                 if target_channel: await target_channel.send(f"⚠️ {유저.mention}님이 경고 누적({warning_count}회)으로 서버에서 자동 강퇴되었습니다.")
@@ -1137,6 +1389,144 @@ class Moderation(commands.Cog):
             elif ctx: await ctx.send(response_msg)
             elif channel_to_send: await channel_to_send.send(response_msg)
 
+    async def _scan_blacklist_guild(self, interaction: discord.Interaction = None, ctx: commands.Context = None):
+        """서버 전체 멤버 목록과 블랙리스트를 집합 연산으로 대조하고 결과를 페이지 임베드로 보고합니다."""
+        target_guild = interaction.guild if interaction else ctx.guild
+        target_channel = interaction.channel if interaction else ctx.channel
+        caller_obj = interaction if interaction else ctx.author
+
+        permission_checker = (lambda u: u.guild_permissions.administrator)
+        if not await self._check_authority(caller_obj, target_channel, "Administrator", permission_checker): return
+
+        if interaction and not interaction.response.is_done(): await interaction.response.defer(ephemeral=False)
+
+        await self.blacklist_loaded.wait() # 봇 시작 직후 첫 적재가 끝나기 전이면 기다림
+        started_at = datetime.datetime.now(datetime.UTC)
+        blacklisted_ids = self.blacklist_cache.keys()
+        matched_ids = set()
+        scanned_count = 0
+
+        if blacklisted_ids:
+            # 멤버 캐시가 완성된 서버는 메모리에서 바로, 아니면 게이트웨이에서 멤버를 청크 단위로 받아오며 대조
+            if target_guild.chunked:
+                member_source = target_guild.members
+                for start in range(0, len(member_source), BLACKLIST_SCAN_CHUNK_SIZE):
+                    chunk_ids = {str(m.id) for m in member_source[start:start + BLACKLIST_SCAN_CHUNK_SIZE]}
+                    matched_ids |= chunk_ids & blacklisted_ids
+                    scanned_count += len(chunk_ids)
+            else:
+                chunk_ids = set()
+                async for member in target_guild.fetch_members(limit=None):
+                    chunk_ids.add(str(member.id))
+                    if len(chunk_ids) >= BLACKLIST_SCAN_CHUNK_SIZE:
+                        matched_ids |= chunk_ids & blacklisted_ids
+                        scanned_count += len(chunk_ids)
+                        chunk_ids = set()
+                        await asyncio.sleep(0) # 대형 서버 스캔 중에도 이벤트 루프를 양보
+                matched_ids |= chunk_ids & blacklisted_ids
+                scanned_count += len(chunk_ids)
+        else:
+            scanned_count = target_guild.member_count or 0
+
+        elapsed = (datetime.datetime.now(datetime.UTC) - started_at).total_seconds()
+        summary = f"스캔한 멤버: **{scanned_count:,}명** | 블랙리스트 일치: **{len(matched_ids):,}명** | 소요 시간: {elapsed:.2f}초"
+
+        if not matched_ids:
+            embed = discord.Embed(
+                title="✅ 블랙리스트 전체 스캔 결과",
+                description=f"이 서버에서 글로벌 블랙리스트에 등록된 멤버가 발견되지 않았습니다.\n{summary}",
+                color=discord.Color.green()
+            )
+            if interaction: await interaction.followup.send(embed=embed)
+            else: await ctx.send(embed=embed)
+            return
+
+        # 페이지는 인원 수와 글자 수 중 먼저 차는 쪽 기준으로 나눔
+        page_lines = [[]]
+        page_chars = 0
+        for user_id in sorted(matched_ids, key=int):
+            member = target_guild.get_member(int(user_id))
+            name = member.mention if member else f"`{user_id}`"
+            reason = " ".join((self.blacklist_cache.get(user_id) or '사유 없음').split())
+            if len(reason) > BLACKLIST_SCAN_REASON_LIMIT:
+                reason = reason[:BLACKLIST_SCAN_REASON_LIMIT - 1] + "…"
+            line = f"🚨 {name} - 사유: {reason}"
+            if page_lines[-1] and (len(page_lines[-1]) >= BLACKLIST_SCAN_PAGE_SIZE or page_chars + len(line) + 1 > BLACKLIST_SCAN_PAGE_CHARS):
+                page_lines.append([])
+                page_chars = 0
+            page_lines[-1].append(line)
+            page_chars += len(line) + 1
+        pages = []
+        for page_index, lines in enumerate(page_lines):
+            embed = discord.Embed(
+                title="⚠️ 블랙리스트 전체 스캔 결과",
+                description=f"{summary}\n\n" + "\n".join(lines),
+                color=discord.Color.red()
+            )
+            embed.set_footer(text=f"페이지 {page_index + 1}/{len(page_lines)}")
+            pages.append(embed)
+
+        author_id = interaction.user.id if interaction else ctx.author.id
+        view = self.BlacklistScanPages(pages, author_id) if len(pages) > 1 else None
+        if interaction:
+            message = await interaction.followup.send(embed=pages[0], view=view, wait=True) if view else await interaction.followup.send(embed=pages[0], wait=True)
+        else:
+            message = await ctx.send(embed=pages[0], view=view) if view else await ctx.send(embed=pages[0])
+        if view: view.message = message
+
+    async def _search_records(self, 검색어: str, 대상: str = None, interaction: discord.Interaction = None, ctx: commands.Context = None, channel_to_send=None):
+        """차량/경고/티켓/거래 기록을 전문 검색 색인으로 찾습니다. 이 서버의 기록(경고/거래는 현재 멤버의 기록)만 보여줍니다."""
+        target_guild = interaction.guild if interaction else ctx.guild
+        target_channel = interaction.channel if interaction else ctx.channel if ctx else channel_to_send
+        caller_obj = interaction if interaction else ctx.author
+
+        permission_checker = (lambda u: u.guild_permissions.administrator)
+        if not await self._check_authority(caller_obj, target_channel, "Administrator", permission_checker): return
+
+        if interaction:
+            await interaction.response.defer(ephemeral=True)
+
+        def run_search():
+            conn = self.get_db_connection()
+            try:
+                # 경고/거래는 서버 구분 없이 저장되므로 guild_members에 저장된 이 서버 멤버의 기록으로 범위를 좁힘
+                return search_index.search(conn, 검색어, sources=[대상] if 대상 else None, guild_id=target_guild.id, limit=SEARCH_RESULT_LIMIT, members_of=target_guild.id)
+            finally:
+                conn.close()
+
+        try:
+            results = await asyncio.to_thread(run_search)
+        except sqlite3.Error as e:
+            print(f"검색 중 오류 발생: {e}")
+            response_msg = "❌ 검색 중 오류가 발생했습니다. 검색어를 바꿔서 다시 시도해주세요."
+            if interaction: await interaction.followup.send(response_msg, ephemeral=True)
+            elif ctx: await ctx.send(response_msg)
+            elif channel_to_send: await channel_to_send.send(response_msg)
+            return
+
+        embed = discord.Embed(
+            title=f"🔎 '{검색어}' 검색 결과",
+            color=discord.Color.blue()
+        )
+        found = 0
+        for name, rows in results.items():
+            source = search_index.SEARCH_SOURCES[name]
+            if not rows:
+                continue
+            found += len(rows)
+            lines = []
+            for row in rows:
+                date = (row[source["time_column"]] or "").split('T')[0]
+                text = row[source["column"]] or ""
+                lines.append(f"#{row['id']} {row['username']}: {text[:80]} ({date})")
+            embed.add_field(name=f"{name} ({len(rows)}건)", value="\n".join(lines)[:1024], inline=False)
+
+        if not found:
+            embed.description = "일치하는 기록이 없습니다."
+        if interaction: await interaction.followup.send(embed=embed, ephemeral=True)
+        elif ctx: await ctx.send(embed=embed)
+        elif channel_to_send: await channel_to_send.send(embed=embed)
+
     async def _security_report(self, interaction: discord.Interaction = None, ctx: commands.Context = None, channel_to_send=None):
         """이 서버의 보안 설정 상태에 대한 리포트를 제공합니다."""
         target_guild = interaction.guild if interaction else ctx.guild
@@ -1219,7 +1609,7 @@ class Moderation(commands.Cog):
             status_icon = "✅" if enabled else "❌"
 
             # 채널 제한 확인
-            is_bank_command = cmd_name in ["통장개설", "잔액", "입금", "출금", "송금", "대출", "상환", "거래내역", "통장"]
+            is_bank_command = cmd_name in ["통장개설", "잔액", "입금", "출금", "송금", "대출", "상환", "거래내역", "거래내역내보내기", "부자순위", "급여지급", "통장"]
 
             command_info = {
                 "name": display_name,
@@ -1235,15 +1625,15 @@ class Moderation(commands.Cog):
                     commands_categorized["은행 명령어"].append(command_info)
             elif cmd_name in ["차량등록"]:
                 commands_categorized["차량 명령어"].append(command_info)
-            elif cmd_name in ["킥", "밴", "청소", "역할부여", "역할삭제", "경고", "경고조회", "경고삭제"]:
+            elif cmd_name in ["킥", "밴", "청소", "역할부여", "역할삭제", "경고", "경고조회", "경고삭제", "검색"]:
                 commands_categorized["관리 명령어"].append(command_info)
             elif cmd_name in ["오픈", "닫기"] and "티켓" in cmd_name: # 티켓 그룹 명령어
                  commands_categorized["티켓 명령어"].append(command_info)
-            elif cmd_name in ["들어와", "나가", "재생", "정지"]:
+            elif cmd_name in ["들어와", "나가", "재생", "검색재생", "정지", "스킵", "대기열", "대기열삭제", "셔플", "반복"]:
                 commands_categorized["음악 명령어"].append(command_info)
             elif cmd_name in ["주사위", "가위바위보"]:
                 commands_categorized["게임 명령어"].append(command_info)
-            elif cmd_name in ["스캔블랙리스트", "보안리포트"]:
+            elif cmd_name in ["스캔블랙리스트", "블랙리스트전체스캔", "보안리포트", "잠금해제"]:
                 commands_categorized["보안 명령어"].append(command_info)
             elif cmd_name in ["설정", "명령어"]: # 설정 그룹 명령어는 설정 코그에서 처리되므로 단순화
                 commands_categorized["설정 명령어"].append(command_info)
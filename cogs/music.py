@@ -1,9 +1,19 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
-import yt_dlp as youtube_dl 
 import asyncio
+import collections
+import itertools
 import datetime # datetime 모듈 임포트 (utcnow() DeprecationWarning 회피)
+import os
+import random
+import re
+import time
+import unicodedata
+import urllib.parse
+import extraction_pool
+import audio_pipeline
+import audio_cache
 
 # yt-dlp 설정 (음악 스트리밍 최적화)
 # yt-dlp의 기본 동작은 버그 리포트 메시지를 자동으로 비활성화합니다.
@@ -13,7 +23,7 @@ ytdl_format_options = {
     'format': 'bestaudio/best',
     'outtmpl': '%(extractor)s-%(id)s-%(title)s.%(ext)s',
     'restrictfilenames': True,
-    'noplaylist': True, # 재생목록 다운로드 방지 (개별 곡 재생)
+    'noplaylist': True, # 재생목록 다운로드 방지 (개별 곡 재생, 재생목록 URL은 아래 playlist 옵션으로 따로 처리)
     'nocheckcertificate': True, # SSL 인증서 검증 무시 (가끔 발생하는 오류 회피)
     'ignoreerrors': False, # 오류 발생 시 무시하지 않음
     'logtostderr': False, # 로그를 표준 에러로 출력하지 않음
@@ -23,38 +33,617 @@ ytdl_format_options = {
     'source_address': '0.0.0.0'  # 모든 네트워크 인터페이스에 바인딩
 }
 
-ffmpeg_options = {
-    'options': '-vn' # 비디오 트랙 제외 (오디오만 스트리밍)
+# 재생목록 URL: 평면 추출로 항목 목록만 가져오고, 각 곡은 재생 직전에 추출
+ytdl_playlist_options = {
+    **ytdl_format_options,
+    'noplaylist': False,
+    'extract_flat': 'in_playlist',
+    'playlistend': 1000, # MUSIC_QUEUE_LIMIT과 같음
 }
 
-# youtube_dl.YoutubeDL 객체 생성
-ytdl = youtube_dl.YoutubeDL(ytdl_format_options)
+# 검색어: 상위 결과의 ID/제목/길이만 평면 추출 (스트림 URL은 고른 곡만 재생 직전에 추출)
+ytdl_search_options = {
+    **ytdl_format_options,
+    'noplaylist': False,
+    'extract_flat': 'in_playlist',
+}
+
+# FFmpeg 옵션(재연결 플래그, 음량 필터)은 audio_pipeline에서 재생 방식에 맞게 만듦
+
+# 서버별 대기열 최대 곡 수 (재생목록 한 번에 들어올 수 있는 곡 수와 같음)
+MUSIC_QUEUE_LIMIT = 1000
+# 대기열 조회 시 표시할 곡 수
+MUSIC_QUEUE_PAGE_SIZE = 10
+# 스트림 URL에서 만료 시각을 읽을 수 없을 때 유효하다고 볼 시간 (초)
+STREAM_URL_DEFAULT_TTL = 60 * 60
+# 만료 직전 URL로 재생을 시작하지 않도록 곡 길이에 더해 남겨 둘 여유 시간 (초)
+STREAM_URL_EXPIRY_MARGIN = 60 * 5
+# 추출 결과 캐시에 보관할 최대 곡 수 (가장 오래 쓰이지 않은 곡부터 제거)
+EXTRACTION_CACHE_SIZE = 512
+# 캐시 지표를 DB(bot_metrics)에 기록하는 주기 (초)
+MUSIC_METRICS_INTERVAL = 60
+# 유튜브 URL에서 영상 ID를 뽑아 캐시 키로 사용 (같은 영상의 다른 URL 형식도 같은 키)
+YOUTUBE_ID_PATTERN = re.compile(r'(?:youtube\.com/(?:watch\?(?:.*&)?v=|shorts/|embed/|live/)|youtu\.be/)([A-Za-z0-9_-]{11})')
+# 다음 곡의 FFmpeg 프로세스를 현재 곡이 끝나기 몇 초 전에 미리 띄울지 (너무 일찍 열면 스트림 연결이 끊길 수 있음)
+PREBUFFER_SECONDS = 10
+# 재생이 끝난 뒤 음성 채널에 머무는 최대 시간 (초, 지나면 자동으로 나감)
+VOICE_IDLE_TIMEOUT = int(os.getenv("MUSIC_IDLE_TIMEOUT", "300"))
+# 음성 채널에 봇만 남았을 때 나가기까지 기다리는 시간 (초)
+VOICE_EMPTY_GRACE = 30
+# 이 프로세스가 동시에 유지하는 음성 연결 수 상한 (연결마다 소켓, FFmpeg 프로세스, 인코더 스레드를 차지)
+MAX_VOICE_SESSIONS = int(os.getenv("MUSIC_MAX_VOICE_SESSIONS", "50"))
+# 유휴/빈 채널 음성 연결을 확인하는 주기 (초)
+VOICE_REAPER_INTERVAL = 15
+# 재생할 차례인 곡의 추출이 바쁨/시간 초과로 실패했을 때 다시 시도하기 전 대기 시간 (초, 순서대로)
+RESOLVE_RETRY_DELAYS = (2, 5, 10)
+# 재시도도 모두 실패하면 곡을 대기열 맨 앞에 되돌리고 이 시간 뒤에 다시 재생을 시도 (초)
+RESOLVE_PAUSE_SECONDS = 30
+# 건너뛴 곡 안내에 제목을 보여줄 최대 곡 수
+SKIPPED_REPORT_LIMIT = 5
+# /검색재생에서 보여줄 검색 결과 수
+SEARCH_RESULT_COUNT = 5
+# 검색 결과 캐시: 같은 검색어(정규화 후)는 이 시간 동안 yt-dlp 검색 없이 재사용 (초)
+SEARCH_CACHE_TTL = 60 * 60 * 6
+SEARCH_CACHE_SIZE = 256
+# 검색 결과 선택 메뉴를 기다리는 시간 (초)
+SEARCH_SELECT_TIMEOUT = 120
+# 반복 모드
+LOOP_OFF, LOOP_ONE, LOOP_ALL = "끔", "한곡", "전체"
+
+
+def cache_key(url: str) -> str:
+    """추출 캐시 키: 유튜브는 영상 ID, 그 외(검색어 등)는 입력 그대로"""
+    match = YOUTUBE_ID_PATTERN.search(url)
+    return f"youtube:{match.group(1)}" if match else url.strip()
+
+def normalize_query(query: str) -> str:
+    """검색 캐시 키: 전각/반각, 대소문자, 연속 공백 차이를 없앤 검색어"""
+    return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+
+def is_playlist_url(url: str) -> bool:
+    """영상 없이 재생목록만 가리키는 URL인지 (watch?v=...&list=... 는 영상 한 곡으로 재생)"""
+    query = urllib.parse.parse_qs(urllib.parse.urlparse(url).query)
+    return 'list' in query and 'v' not in query
+
+def stream_expires_at(stream_url: str) -> float:
+    """서명된 스트림 URL의 만료 시각(유닉스 시간). googlevideo URL은 expire 파라미터(또는 /expire/ 경로)에 들어 있습니다."""
+    parsed = urllib.parse.urlparse(stream_url)
+    expire = urllib.parse.parse_qs(parsed.query).get('expire', [None])[0]
+    if expire is None:
+        match = re.search(r'/expire/(\d+)', parsed.path)
+        expire = match.group(1) if match else None
+    try:
+        return float(expire)
+    except (TypeError, ValueError):
+        return time.time() + STREAM_URL_DEFAULT_TTL
+
+class Track:
+    """대기열의 곡 한 개. 추출 결과 전체(포맷 목록 등) 대신 재생에 필요한 값만 보관합니다."""
+    __slots__ = ('url', 'title', 'duration', 'requester_id', 'stream_url', 'expires_at', 'codec', 'local_path')
+
+    def __init__(self, url: str, requester_id: int, title: str = None, duration: int = None):
+        self.url = url
+        self.requester_id = requester_id
+        self.title = title or url
+        self.duration = duration # 초 (라이브 등 알 수 없으면 None)
+        self.stream_url = None
+        self.expires_at = 0.0
+        self.codec = None # 원본 오디오 코덱 (예: 'opus' - 패스스루 가능 여부 판단)
+        self.local_path = None # 디스크 캐시에 있는 오디오 파일 (있으면 스트리밍 대신 사용)
+
+    def apply(self, info: dict):
+        """추출 결과(ExtractionCache.resolve 반환값)로 제목/길이/스트림 URL을 채웁니다."""
+        self.title = info['title'] or self.title
+        self.duration = info['duration']
+        self.stream_url = info['url'] # 스트리밍 가능한 최종 URL
+        self.expires_at = info['expires_at']
+        self.codec = info.get('codec')
+        self.url = info.get('webpage_url') or self.url # 검색어로 추가한 곡도 이후에는 영상 URL로 찾음
+
+    def playable_path(self):
+        """FFmpeg 입력: 디스크 캐시 파일이 있으면 그 경로, 없으면 스트림 URL"""
+        if self.local_path and os.path.exists(self.local_path):
+            return self.local_path
+        return self.stream_url
+
+    def needs_resolve(self) -> bool:
+        if self.local_path and os.path.exists(self.local_path):
+            return False
+        return not self.stream_url or not stream_is_fresh(self.expires_at, self.duration)
+
+def _consume_exception(task: asyncio.Task):
+    """기다리던 요청이 모두 취소된 뒤 실패한 공유 태스크도 'exception was never retrieved' 경고가 남지 않게 합니다."""
+    if not task.cancelled():
+        task.exception()
+
+def stream_is_fresh(expires_at: float, duration) -> bool:
+    """곡을 끝까지 재생할 동안 스트림 URL이 유효한지"""
+    return expires_at - time.time() > (duration or 0) + STREAM_URL_EXPIRY_MARGIN
+
+class ExtractionCache:
+    """영상별 추출 결과 LRU 캐시. 여러 서버에서 같은 곡을 틀어도 스트림 URL이 유효한 동안에는 yt-dlp를 다시 호출하지 않습니다.
+
+    제목/길이는 music_tracks 테이블에도 저장해 두고, 봇을 다시 켠 뒤에도 대기열 표시에 사용합니다.
+    """
+
+    def __init__(self, get_db_connection, pool: extraction_pool.ExtractionPool, max_entries: int = EXTRACTION_CACHE_SIZE):
+        self.get_db_connection = get_db_connection
+        self.pool = pool # 캐시에 없을 때만 추출 풀에 요청
+        self.max_entries = max_entries
+        self.entries = collections.OrderedDict() # key -> {'title', 'duration', 'url', 'expires_at', 'webpage_url'}
+        self.inflight = {} # key -> 진행 중인 추출 Task (같은 곡 동시 요청은 한 번만 추출)
+        self.counters = collections.Counter() # hits, misses, expired, joined, metadata_hits, evictions, errors
+        self.extract_seconds = 0.0
+
+    def _remember(self, key: str, info: dict):
+        self.entries[key] = info
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.counters['evictions'] += 1
+
+    def peek(self, url: str):
+        """스트림 URL이 아직 유효한 캐시 항목 (없으면 None, yt-dlp 호출 안 함)"""
+        key = cache_key(url)
+        info = self.entries.get(key)
+        if info and stream_is_fresh(info['expires_at'], info['duration']):
+            self.entries.move_to_end(key)
+            return info
+        return None
+
+    async def lookup_metadata(self, url: str):
+        """제목/길이만 필요할 때: 메모리 캐시 -> music_tracks 테이블 순으로 찾습니다. 반환값: (제목, 길이) 또는 None"""
+        key = cache_key(url)
+        info = self.entries.get(key)
+        if info:
+            self.counters['metadata_hits'] += 1
+            return info['title'], info['duration']
+        row = await asyncio.to_thread(self._load_metadata, key)
+        if row:
+            self.counters['metadata_hits'] += 1
+            return row['title'], row['duration']
+        return None
+
+    def _load_metadata(self, key: str):
+        conn = self.get_db_connection()
+        try:
+            return conn.execute("SELECT title, duration FROM music_tracks WHERE video_id = ?", (key,)).fetchone()
+        finally:
+            conn.close()
+
+    async def resolve(self, url: str, guild_id: int) -> dict:
+        """스트림 URL이 유효한 캐시가 있으면 그대로, 없으면 추출 풀에서 yt-dlp로 추출해서 캐시에 넣고 반환합니다.
+
+        추출 풀이 가득 차면 extraction_pool.ExtractionBusy, 시간이 초과되면 asyncio.TimeoutError가 발생합니다.
+        """
+        key = cache_key(url)
+        info = self.peek(url)
+        if info:
+            self.counters['hits'] += 1
+            return info
+        if key in self.inflight:
+            self.counters['joined'] += 1 # 진행 중인 추출을 같이 기다림 (캐시 적중은 아니므로 적중률에서 제외)
+            return await asyncio.shield(self.inflight[key])
+
+        self.counters['expired' if key in self.entries else 'misses'] += 1
+        task = asyncio.get_running_loop().create_task(self._extract(key, url, guild_id))
+        task.add_done_callback(_consume_exception)
+        self.inflight[key] = task
+        # 추출은 별도 태스크로 돌리고 shield로 기다림 - 요청한 쪽이 취소되어도(미리 준비 취소 등) 같이 기다리는 요청은 결과를 받음
+        return await asyncio.shield(task)
+
+    async def _extract(self, key: str, url: str, guild_id: int) -> dict:
+        started = time.perf_counter()
+        try:
+            data = await self.pool.submit(guild_id, url, ytdl_format_options)
+            info = {
+                'title': data.get('title'),
+                'duration': int(data['duration']) if data.get('duration') else None,
+                'url': data['url'],
+                'expires_at': stream_expires_at(data['url']),
+                'webpage_url': data.get('webpage_url') or url,
+                'codec': data.get('acodec'),
+            }
+            self._remember(key, info)
+            # 검색어로 찾은 곡도 영상 URL 키로 찾을 수 있도록 같이 저장
+            canonical_key = cache_key(info['webpage_url'])
+            if canonical_key != key:
+                self._remember(canonical_key, info)
+            await asyncio.to_thread(self._store_metadata, canonical_key, info)
+            return info
+        except Exception:
+            self.counters['errors'] += 1
+            raise
+        finally:
+            self.extract_seconds += time.perf_counter() - started
+            del self.inflight[key]
+
+    def remember_metadata(self, entries: list):
+        """재생목록 평면 추출로 얻은 제목/길이를 music_tracks에 한 번에 저장합니다. (스트림 URL은 없으므로 메모리 캐시에는 넣지 않음)"""
+        now = datetime.datetime.now().isoformat()
+        rows = [(cache_key(entry['url']), entry['title'], int(entry['duration']) if entry['duration'] else None, entry['url'], now)
+                for entry in entries if entry['title']]
+        conn = self.get_db_connection()
+        try:
+            conn.executemany("""
+                INSERT INTO music_tracks (video_id, title, duration, webpage_url, updated_at) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(video_id) DO UPDATE SET title = excluded.title, duration = COALESCE(excluded.duration, music_tracks.duration),
+                    updated_at = excluded.updated_at
+            """, rows)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _store_metadata(self, key: str, info: dict):
+        conn = self.get_db_connection()
+        try:
+            conn.execute("""
+                INSERT INTO music_tracks (video_id, title, duration, webpage_url, updated_at) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(video_id) DO UPDATE SET title = excluded.title, duration = excluded.duration,
+                    webpage_url = excluded.webpage_url, updated_at = excluded.updated_at
+            """, (key, info['title'] or key, info['duration'], info['webpage_url'], datetime.datetime.now().isoformat()))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def metrics(self) -> dict:
+        lookups = self.counters['hits'] + self.counters['misses'] + self.counters['expired']
+        extractions = self.counters['misses'] + self.counters['expired']
+        return {
+            'music_cache_hits': self.counters['hits'],
+            'music_cache_misses': self.counters['misses'],
+            'music_cache_expired': self.counters['expired'],
+            'music_cache_joined': self.counters['joined'],
+            'music_cache_metadata_hits': self.counters['metadata_hits'],
+            'music_cache_evictions': self.counters['evictions'],
+            'music_cache_errors': self.counters['errors'],
+            'music_cache_entries': len(self.entries),
+            'music_cache_hit_ratio': round(self.counters['hits'] / lookups, 3) if lookups else 0.0,
+            'music_extract_avg_ms': round(self.extract_seconds / extractions * 1000) if extractions else 0,
+        }
+
+class SearchCache:
+    """검색어별 상위 결과(ID/제목/길이) 캐시. 같은 검색어는 TTL 동안 yt-dlp 검색을 다시 하지 않습니다.
+
+    결과의 제목/길이는 music_tracks에도 저장해서, 고른 곡을 대기열에 넣을 때 곡 정보를 다시 추출하지 않습니다.
+    """
+
+    def __init__(self, get_db_connection, pool: extraction_pool.ExtractionPool, cache: ExtractionCache,
+                 ttl: float = SEARCH_CACHE_TTL, max_entries: int = SEARCH_CACHE_SIZE):
+        self.get_db_connection = get_db_connection
+        self.pool = pool
+        self.cache = cache
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = collections.OrderedDict() # 정규화한 검색어 -> (만료 시각, 결과 목록)
+        self.inflight = {} # 정규화한 검색어 -> 진행 중인 검색 Task
+        self.counters = collections.Counter() # hits, misses, expired, joined, evictions, errors
+
+    async def search(self, query: str, guild_id: int) -> list:
+        """검색 결과 [{'id', 'title', 'duration', 'url'}, ...]를 반환합니다. 예외는 ExtractionCache.resolve와 같습니다."""
+        key = normalize_query(query)
+        entry = self.entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            self.entries.move_to_end(key)
+            self.counters['hits'] += 1
+            return entry[1]
+        if key in self.inflight:
+            self.counters['joined'] += 1 # 진행 중인 검색을 같이 기다림 (캐시 적중은 아니므로 적중률에서 제외)
+            return await asyncio.shield(self.inflight[key])
+
+        self.counters['expired' if entry else 'misses'] += 1
+        task = asyncio.get_running_loop().create_task(self._search(key, guild_id))
+        task.add_done_callback(_consume_exception)
+        self.inflight[key] = task
+        # ExtractionCache.resolve와 같이 검색은 별도 태스크로 - 요청한 쪽이 취소되어도 같이 기다리는 요청은 결과를 받음
+        return await asyncio.shield(task)
+
+    async def _search(self, key: str, guild_id: int) -> list:
+        try:
+            data = await self.pool.submit(guild_id, f"ytsearch{SEARCH_RESULT_COUNT}:{key}", ytdl_search_options)
+            results = [entry for entry in data['entries'] if entry['url'] and entry['title']]
+            for result in results:
+                result['duration'] = int(result['duration']) if result['duration'] else None
+            self.entries[key] = (time.monotonic() + self.ttl, results)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.counters['evictions'] += 1
+            if results:
+                try:
+                    await asyncio.to_thread(self.cache.remember_metadata, results)
+                except Exception as e:
+                    print(f"검색 결과 곡 정보 저장 중 오류 발생: {e}") # 표시용 정보라 실패해도 검색에는 영향 없음
+            return results
+        except Exception:
+            self.counters['errors'] += 1
+            raise
+        finally:
+            del self.inflight[key]
+
+    def metrics(self) -> dict:
+        lookups = self.counters['hits'] + self.counters['misses'] + self.counters['expired']
+        return {
+            'music_search_hits': self.counters['hits'],
+            'music_search_misses': self.counters['misses'],
+            'music_search_expired': self.counters['expired'],
+            'music_search_joined': self.counters['joined'],
+            'music_search_evictions': self.counters['evictions'],
+            'music_search_errors': self.counters['errors'],
+            'music_search_entries': len(self.entries),
+            'music_search_hit_ratio': round(self.counters['hits'] / lookups, 3) if lookups else 0.0,
+        }
 
 class YTDLSource(discord.PCMVolumeTransformer):
-    def __init__(self, source, *, data, volume=0.5):
+    """기존 재생 방식: FFmpeg가 PCM으로 디코딩하고 파이썬에서 음량 조절 후 Opus로 인코딩 (MUSIC_OPUS_PASSTHROUGH=0일 때)"""
+    def __init__(self, source, *, track: Track, volume=audio_pipeline.MUSIC_VOLUME):
         super().__init__(source, volume)
-        self.data = data
-        self.title = data.get('title')
-        self.url = data.get('url') # 스트리밍 가능한 최종 URL
+        self.track = track
+        self.title = track.title
+        self.url = track.stream_url
 
     @classmethod
-    async def from_url(cls, url, *, loop=None, stream=False):
-        """URL로부터 음악 정보를 추출하고 오디오 소스를 반환합니다."""
-        loop = loop or asyncio.get_event_loop()
-        # 블로킹 호출인 extract_info를 별도의 스레드에서 비동기적으로 실행
-        data = await loop.run_in_executor(None, lambda: ytdl.extract_info(url, download=not stream))
+    def from_track(cls, track: Track):
+        """디스크 캐시 파일 또는 추출해 둔 스트림 URL로 오디오 소스를 만듭니다. (FFmpeg 프로세스가 바로 시작됨)"""
+        path = track.playable_path()
+        return cls(discord.FFmpegPCMAudio(path, **audio_pipeline.pcm_source_options(local=path != track.stream_url)), track=track)
 
-        # 재생목록의 경우 첫 번째 항목을 가져옴 (재생목록 지원을 확장하려면 큐 로직 필요)
-        if 'entries' in data:
-            data = data['entries'][0]
+async def create_source(track: Track):
+    """곡의 오디오 소스를 만듭니다. (FFmpeg 프로세스가 바로 시작됨)
 
-        # FFmpegPCMAudio는 로컬 파일 경로 또는 스트리밍 URL을 받을 수 있음
-        filename = data['url'] if stream else ytdl.prepare_filename(data)
-        return cls(discord.FFmpegPCMAudio(filename, **ffmpeg_options), data=data)
+    기본은 Opus 소스: 음량은 FFmpeg 필터로 적용하고 Opus 패킷을 그대로 음성 연결에 넘겨서 파이썬에서 PCM 처리/인코딩을 하지 않습니다.
+    코덱을 추출 결과로 알 수 없으면 ffprobe로 확인합니다.
+    """
+    if not audio_pipeline.OPUS_PASSTHROUGH:
+        return YTDLSource.from_track(track)
+    path = track.playable_path()
+    if not track.codec:
+        track.codec, _ = await discord.FFmpegOpusAudio.probe(path, method='fallback')
+    return discord.FFmpegOpusAudio(path, **audio_pipeline.opus_source_options(track.codec, local=path != track.stream_url))
+
+class GuildMusicState:
+    """서버 하나의 재생 상태. 대기열은 deque로 두고, 다음 곡은 현재 곡이 재생되는 동안 미리 준비합니다."""
+    __slots__ = ('guild_id', 'queue', 'current', 'loop_mode', 'text_channel', 'started_at', 'skip_requested',
+                 'next_track', 'next_source', 'prefetch_task')
+
+    def __init__(self, guild_id: int):
+        self.guild_id = guild_id
+        self.queue = collections.deque()
+        self.current = None # 재생 중인 Track
+        self.loop_mode = LOOP_OFF
+        self.text_channel = None # 곡이 바뀔 때 안내를 보낼 채널 (마지막으로 곡을 추가한 채널)
+        self.started_at = 0.0
+        self.skip_requested = False
+        self.next_track = None # 미리 준비한 다음 곡과 오디오 소스
+        self.next_source = None
+        self.prefetch_task = None
+
+    def upcoming(self):
+        """현재 곡이 끝나면 재생될 곡 (반복 모드 반영)"""
+        if self.current and self.loop_mode == LOOP_ONE and not self.skip_requested:
+            return self.current
+        if self.queue:
+            return self.queue[0]
+        if self.current and self.loop_mode == LOOP_ALL:
+            return self.current
+        return None
+
+    def discard_prefetched(self):
+        """미리 띄워 둔 FFmpeg 프로세스를 정리합니다."""
+        if self.next_source:
+            self.next_source.cleanup()
+        self.next_track = None
+        self.next_source = None
+
+    def reset(self):
+        if self.prefetch_task:
+            self.prefetch_task.cancel()
+            self.prefetch_task = None
+        self.discard_prefetched()
+        self.queue.clear()
+        self.current = None
+        self.skip_requested = False
+
+class VoiceSession:
+    """서버 하나의 음성 연결 자원 사용량"""
+    __slots__ = ('guild_id', 'connected_at', 'last_active', 'empty_since', 'bytes_streamed', 'tracks_played', 'ffmpeg_pid')
+
+    def __init__(self, guild_id: int):
+        self.guild_id = guild_id
+        self.connected_at = time.monotonic()
+        self.last_active = self.connected_at # 마지막으로 재생 중이었던 시각
+        self.empty_since = None # 채널에 봇만 남은 시각
+        self.bytes_streamed = 0
+        self.tracks_played = 0
+        self.ffmpeg_pid = None # 현재 곡의 FFmpeg 프로세스
+
+class CountingSource(discord.AudioSource):
+    """음성 연결로 보낸 바이트 수를 세는 오디오 소스 래퍼"""
+    def __init__(self, original: discord.AudioSource, session: VoiceSession):
+        self.original = original
+        self.session = session
+
+    def read(self) -> bytes:
+        data = self.original.read()
+        self.session.bytes_streamed += len(data)
+        return data
+
+    def is_opus(self) -> bool:
+        return self.original.is_opus()
+
+    def cleanup(self):
+        self.original.cleanup()
+
+def format_duration(seconds) -> str:
+    if not seconds:
+        return "알 수 없음"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
 
 class Music(commands.Cog):
+    class SearchResultSelect(discord.ui.View):
+        """검색 결과 선택 메뉴. 고른 곡은 검색 때 받아 둔 제목/길이로 바로 대기열에 넣습니다."""
+        def __init__(self, cog, user: discord.User, results: list, ephemeral: bool):
+            super().__init__(timeout=SEARCH_SELECT_TIMEOUT)
+            self.cog = cog
+            self.user = user
+            self.results = results
+            self.ephemeral = ephemeral
+            self.message = None
+            self.select = discord.ui.Select(placeholder="재생할 곡을 고르세요", options=[
+                discord.SelectOption(label=f"{index}. {result['title']}"[:100], description=format_duration(result['duration']), value=str(index - 1))
+                for index, result in enumerate(results, start=1)
+            ])
+            self.select.callback = self.on_select
+            self.add_item(self.select)
+
+        async def interaction_check(self, interaction: discord.Interaction) -> bool:
+            if interaction.user.id != self.user.id:
+                await interaction.response.send_message("❌ 검색한 사람만 곡을 고를 수 있습니다.", ephemeral=True)
+                return False
+            return True
+
+        async def on_select(self, interaction: discord.Interaction):
+            result = self.results[int(self.select.values[0])]
+            self.select.disabled = True
+            self.stop()
+            await interaction.response.edit_message(view=self)
+            await self.cog._play_search_result(interaction.user, interaction.guild, result, interaction.followup.send, self.ephemeral, interaction.channel)
+
+        async def on_timeout(self):
+            self.select.disabled = True
+            if self.message:
+                try: await self.message.edit(view=self)
+                except discord.HTTPException: pass
+
     def __init__(self, bot):
         self.bot = bot
+        self.states = {} # key: guild_id, value: GuildMusicState
+        self.pool = extraction_pool.ExtractionPool() # yt-dlp 전용 작업자 풀 (봇 기본 executor와 분리)
+        self.cache = ExtractionCache(bot.get_db_connection, self.pool)
+        self.search_cache = SearchCache(bot.get_db_connection, self.pool, self.cache)
+        # 자주 재생되는 곡의 디스크 캐시 (MUSIC_DISK_CACHE=1일 때만)
+        self.disk_cache = audio_cache.AudioDiskCache(bot.get_db_connection, ytdl_format_options) if audio_cache.DISK_CACHE_ENABLED else None
+        self.sessions = {} # key: guild_id, value: VoiceSession
+        self.session_counters = collections.Counter() # opened, rejected, reaped_idle, reaped_empty, closed_bytes
+        self.connecting_guilds = set() # 접속 중인 길드 (연결이 끝나기 전에도 상한 계산에 포함해 동시 접속으로 상한을 넘지 않게)
+        self.record_music_metrics.start()
+        self.reap_voice_sessions.start()
+
+    def cog_unload(self):
+        self.record_music_metrics.cancel()
+        self.reap_voice_sessions.cancel()
+        self.pool.shutdown()
+        if self.disk_cache:
+            self.disk_cache.shutdown()
+        for state in self.states.values():
+            state.reset()
+
+    # --- 주기 작업: 추출 캐시 지표 기록 (대시보드에서 조회) ---
+    @tasks.loop(seconds=MUSIC_METRICS_INTERVAL)
+    async def record_music_metrics(self):
+        try:
+            await asyncio.to_thread(self.bot.record_metrics, {**self.cache.metrics(), **self.search_cache.metrics(), **self.pool.metrics(),
+                                                                  **self.session_metrics(), **(self.disk_cache.metrics() if self.disk_cache else {})})
+        except Exception as e:
+            print(f"음악 지표 기록 중 오류 발생: {e}")
+
+    @record_music_metrics.before_loop
+    async def before_record_music_metrics(self):
+        await self.bot.wait_until_ready()
+
+    # --- 음성 연결 관리: 연결 수 상한, 유휴/빈 채널 자동 퇴장, 자원 사용량 ---
+    def session_metrics(self) -> dict:
+        playing = sum(1 for vc in self.bot.voice_clients if vc.is_playing())
+        return {
+            'voice_sessions_active': len(self.bot.voice_clients),
+            'voice_sessions_playing': playing,
+            'voice_sessions_idle': len(self.bot.voice_clients) - playing,
+            'voice_sessions_opened': self.session_counters['opened'],
+            'voice_sessions_rejected': self.session_counters['rejected'],
+            'voice_sessions_reaped_idle': self.session_counters['reaped_idle'],
+            'voice_sessions_reaped_empty': self.session_counters['reaped_empty'],
+            'voice_bytes_streamed': self.session_counters['closed_bytes'] + sum(session.bytes_streamed for session in self.sessions.values()),
+            'voice_session_max_uptime_s': round(max((time.monotonic() - session.connected_at for session in self.sessions.values()), default=0)),
+            # 재생 중인 곡 + 미리 띄워 둔 다음 곡의 FFmpeg 프로세스
+            'voice_ffmpeg_processes': sum(1 for session in self.sessions.values() if session.ffmpeg_pid) + sum(1 for state in self.states.values() if state.next_source),
+        }
+
+    def _get_session(self, guild_id: int) -> VoiceSession:
+        session = self.sessions.get(guild_id)
+        if session is None:
+            session = self.sessions[guild_id] = VoiceSession(guild_id)
+        return session
+
+    def _close_session(self, guild_id: int):
+        """서버의 재생 상태와 세션 기록을 정리합니다. (음성 연결 자체는 호출한 쪽에서 끊음)"""
+        state = self.states.pop(guild_id, None)
+        if state:
+            state.reset()
+        session = self.sessions.pop(guild_id, None)
+        if session:
+            self.session_counters['closed_bytes'] += session.bytes_streamed
+
+    async def _connect(self, channel: discord.VoiceChannel):
+        """음성 채널에 접속합니다. 프로세스 전체 연결 수가 상한이면 None을 반환합니다."""
+        guild_id = channel.guild.id
+        # 접속을 기다리는 동안 다른 길드의 접속이 같은 자리를 쓰지 않도록 먼저 자리를 잡아 둠 (같은 길드는 한 번만 셈)
+        if len({vc.guild.id for vc in self.bot.voice_clients} | self.connecting_guilds | {guild_id}) > MAX_VOICE_SESSIONS:
+            self.session_counters['rejected'] += 1
+            return None
+        self.connecting_guilds.add(guild_id)
+        try:
+            voice_client = await channel.connect()
+        finally:
+            self.connecting_guilds.discard(guild_id)
+        self.session_counters['opened'] += 1
+        self.sessions[channel.guild.id] = VoiceSession(channel.guild.id)
+        return voice_client
+
+    async def _disconnect(self, guild: discord.Guild, reason: str = None):
+        self._close_session(guild.id)
+        if guild.voice_client:
+            await guild.voice_client.disconnect()
+        if reason:
+            print(f"음성 연결 종료 ({guild.name}): {reason}")
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+        # 봇이 강제로 연결 해제(추방/채널 삭제)된 경우 상태 정리
+        if member.id == self.bot.user.id and before.channel and after.channel is None:
+            self._close_session(member.guild.id)
+
+    # --- 주기 작업: 유휴 / 빈 채널 음성 연결 정리 ---
+    @tasks.loop(seconds=VOICE_REAPER_INTERVAL)
+    async def reap_voice_sessions(self):
+        now = time.monotonic()
+        for voice_client in list(self.bot.voice_clients):
+            guild = voice_client.guild
+            session = self._get_session(guild.id)
+            if voice_client.is_playing():
+                session.last_active = now
+            listeners = [m for m in voice_client.channel.members if not m.bot] if voice_client.channel else []
+            session.empty_since = None if listeners else (session.empty_since or now)
+            try:
+                if session.empty_since and now - session.empty_since >= VOICE_EMPTY_GRACE:
+                    self.session_counters['reaped_empty'] += 1
+                    await self._disconnect(guild, "음성 채널에 아무도 없음")
+                elif not voice_client.is_playing() and now - session.last_active >= VOICE_IDLE_TIMEOUT:
+                    self.session_counters['reaped_idle'] += 1
+                    await self._disconnect(guild, f"{VOICE_IDLE_TIMEOUT}초 동안 재생 없음")
+            except Exception as e:
+                print(f"음성 연결 정리 중 오류 발생 ({guild.name}): {e}")
+
+    @reap_voice_sessions.before_loop
+    async def before_reap_voice_sessions(self):
+        await self.bot.wait_until_ready()
+
+    def _get_state(self, guild_id: int) -> GuildMusicState:
+        state = self.states.get(guild_id)
+        if state is None:
+            state = self.states[guild_id] = GuildMusicState(guild_id)
+        return state
 
     # --- 메시지 리스너 (모든 메시지 처리의 시작점) ---
     @commands.Cog.listener()
@@ -74,17 +663,51 @@ class Music(commands.Cog):
     async def leave_slash(self, interaction: discord.Interaction): # 이름 변경하여 메시지 기반과 구분
         await self._leave_voice_channel(interaction=interaction)
 
-    @app_commands.command(name="재생", description="유튜브 URL로 음악을 재생합니다.")
-    @app_commands.describe(url="재생할 유튜브 동영상 또는 재생목록 URL")
+    @app_commands.command(name="재생", description="유튜브 URL로 음악을 재생합니다. 재생 중이면 대기열에 추가합니다.")
+    @app_commands.describe(url="재생할 유튜브 동영상 또는 재생목록 URL (재생목록은 전체를 대기열에 추가)")
     @app_commands.guild_only()
     async def play_slash(self, interaction: discord.Interaction, url: str): # 이름 변경하여 메시지 기반과 구분
         await self._play_music(interaction.user, url, interaction=interaction)
 
-    @app_commands.command(name="정지", description="현재 재생 중인 음악을 정지합니다.")
+    @app_commands.command(name="검색재생", description="유튜브에서 검색어로 곡을 찾아 고른 곡을 재생합니다. 재생 중이면 대기열에 추가합니다.")
+    @app_commands.describe(검색어="찾을 곡의 제목, 가수 등")
+    @app_commands.guild_only()
+    async def search_play_slash(self, interaction: discord.Interaction, 검색어: str):
+        await self._search_play(interaction.user, 검색어, interaction=interaction)
+
+    @app_commands.command(name="정지", description="현재 재생 중인 음악을 정지하고 대기열을 비웁니다.")
     @app_commands.guild_only()
     async def stop_slash(self, interaction: discord.Interaction): # 이름 변경하여 메시지 기반과 구분
         await self._stop_music(interaction=interaction)
 
+    @app_commands.command(name="스킵", description="현재 곡을 건너뛰고 대기열의 다음 곡을 재생합니다.")
+    @app_commands.guild_only()
+    async def skip_slash(self, interaction: discord.Interaction):
+        await self._skip_music(interaction=interaction)
+
+    @app_commands.command(name="대기열", description="재생 중인 곡과 대기열을 보여줍니다.")
+    @app_commands.guild_only()
+    async def queue_slash(self, interaction: discord.Interaction):
+        await self._show_queue(interaction=interaction)
+
+    @app_commands.command(name="대기열삭제", description="대기열에서 곡을 삭제합니다.")
+    @app_commands.describe(번호="삭제할 곡의 대기열 번호")
+    @app_commands.guild_only()
+    async def remove_queue_slash(self, interaction: discord.Interaction, 번호: int):
+        await self._remove_from_queue(번호, interaction=interaction)
+
+    @app_commands.command(name="셔플", description="대기열의 곡 순서를 무작위로 섞습니다.")
+    @app_commands.guild_only()
+    async def shuffle_slash(self, interaction: discord.Interaction):
+        await self._shuffle_queue(interaction=interaction)
+
+    @app_commands.command(name="반복", description="반복 재생 모드를 설정합니다.")
+    @app_commands.describe(모드="끔 / 한곡 (현재 곡 반복) / 전체 (대기열 반복)")
+    @app_commands.choices(모드=[app_commands.Choice(name=mode, value=mode) for mode in (LOOP_OFF, LOOP_ONE, LOOP_ALL)])
+    @app_commands.guild_only()
+    async def loop_slash(self, interaction: discord.Interaction, 모드: app_commands.Choice[str]):
+        await self._set_loop(모드.value, interaction=interaction)
+
     # --- 메시지 기반 명령어 ---
     @commands.command(name="들어와", help="음성 채널에 봇을 초대합니다. (예: 저스트 들어와)")
     async def msg_join(self, ctx: commands.Context):
@@ -100,20 +723,257 @@ class Music(commands.Cog):
              await ctx.send(f"❌ 명령어 `{self.bot.command_prefix}나가`는 현재 이 서버에서 비활성화되어 있습니다."); return
         await self._leave_voice_channel(ctx=ctx)
 
-    @commands.command(name="재생", help="유튜브 URL로 음악을 재생합니다. (예: 저스트 재생 [유튜브URL])")
+    @commands.command(name="재생", help="유튜브 URL로 음악을 재생합니다. 재생 중이면 대기열에 추가합니다. (예: 저스트 재생 [유튜브URL])")
     async def msg_play(self, ctx: commands.Context, url: str):
         if not ctx.guild: await ctx.send("이 명령어는 서버에서만 사용할 수 있습니다.") ; return
         if not self.bot.is_command_enabled(ctx.guild.id, "재생"): # 명령어 활성화 상태 확인
              await ctx.send(f"❌ 명령어 `{self.bot.command_prefix}재생`은 현재 이 서버에서 비활성화되어 있습니다."); return
         await self._play_music(ctx.author, url, ctx=ctx)
 
-    @commands.command(name="정지", help="현재 재생 중인 음악을 정지합니다. (예: 저스트 정지)")
+    @commands.command(name="검색재생", help="유튜브에서 검색어로 곡을 찾아 고른 곡을 재생합니다. 재생 중이면 대기열에 추가합니다. (예: 저스트 검색재생 아이유 밤편지)")
+    async def msg_search_play(self, ctx: commands.Context, *, 검색어: str):
+        if not ctx.guild: await ctx.send("이 명령어는 서버에서만 사용할 수 있습니다.") ; return
+        if not self.bot.is_command_enabled(ctx.guild.id, "검색재생"): # 명령어 활성화 상태 확인
+             await ctx.send(f"❌ 명령어 `{self.bot.command_prefix}검색재생`은 현재 이 서버에서 비활성화되어 있습니다."); return
+        await self._search_play(ctx.author, 검색어, ctx=ctx)
+
+    @commands.command(name="정지", help="현재 재생 중인 음악을 정지하고 대기열을 비웁니다. (예: 저스트 정지)")
     async def msg_stop(self, ctx: commands.Context):
         if not ctx.guild: await ctx.send("이 명령어는 서버에서만 사용할 수 있습니다.") ; return
         if not self.bot.is_command_enabled(ctx.guild.id, "정지"): # 명령어 활성화 상태 확인
              await ctx.send(f"❌ 명령어 `{self.bot.command_prefix}정지`는 현재 이 서버에서 비활성화되어 있습니다."); return
         await self._stop_music(ctx=ctx)
 
+    @commands.command(name="스킵", help="현재 곡을 건너뛰고 대기열의 다음 곡을 재생합니다. (예: 저스트 스킵)")
+    async def msg_skip(self, ctx: commands.Context):
+        if not ctx.guild: await ctx.send("이 명령어는 서버에서만 사용할 수 있습니다.") ; return
+        if not self.bot.is_command_enabled(ctx.guild.id, "스킵"): # 명령어 활성화 상태 확인
+             await ctx.send(f"❌ 명령어 `{self.bot.command_prefix}스킵`은 현재 이 서버에서 비활성화되어 있습니다."); return
+        await self._skip_music(ctx=ctx)
+
+    @commands.command(name="대기열", help="재생 중인 곡과 대기열을 보여줍니다. (예: 저스트 대기열)")
+    async def msg_queue(self, ctx: commands.Context):
+        if not ctx.guild: await ctx.send("이 명령어는 서버에서만 사용할 수 있습니다.") ; return
+        if not self.bot.is_command_enabled(ctx.guild.id, "대기열"): # 명령어 활성화 상태 확인
+             await ctx.send(f"❌ 명령어 `{self.bot.command_prefix}대기열`은 현재 이 서버에서 비활성화되어 있습니다."); return
+        await self._show_queue(ctx=ctx)
+
+    @commands.command(name="대기열삭제", help="대기열에서 곡을 삭제합니다. (예: 저스트 대기열삭제 2)")
+    async def msg_remove_queue(self, ctx: commands.Context, 번호: int):
+        if not ctx.guild: await ctx.send("이 명령어는 서버에서만 사용할 수 있습니다.") ; return
+        if not self.bot.is_command_enabled(ctx.guild.id, "대기열삭제"): # 명령어 활성화 상태 확인
+             await ctx.send(f"❌ 명령어 `{self.bot.command_prefix}대기열삭제`는 현재 이 서버에서 비활성화되어 있습니다."); return
+        await self._remove_from_queue(번호, ctx=ctx)
+
+    @commands.command(name="셔플", help="대기열의 곡 순서를 무작위로 섞습니다. (예: 저스트 셔플)")
+    async def msg_shuffle(self, ctx: commands.Context):
+        if not ctx.guild: await ctx.send("이 명령어는 서버에서만 사용할 수 있습니다.") ; return
+        if not self.bot.is_command_enabled(ctx.guild.id, "셔플"): # 명령어 활성화 상태 확인
+             await ctx.send(f"❌ 명령어 `{self.bot.command_prefix}셔플`은 현재 이 서버에서 비활성화되어 있습니다."); return
+        await self._shuffle_queue(ctx=ctx)
+
+    @commands.command(name="반복", help="반복 재생 모드를 설정합니다. (예: 저스트 반복 한곡 / 저스트 반복 전체 / 저스트 반복 끔)")
+    async def msg_loop(self, ctx: commands.Context, 모드: str):
+        if not ctx.guild: await ctx.send("이 명령어는 서버에서만 사용할 수 있습니다.") ; return
+        if not self.bot.is_command_enabled(ctx.guild.id, "반복"): # 명령어 활성화 상태 확인
+             await ctx.send(f"❌ 명령어 `{self.bot.command_prefix}반복`은 현재 이 서버에서 비활성화되어 있습니다."); return
+        if 모드 not in (LOOP_OFF, LOOP_ONE, LOOP_ALL):
+            await ctx.send(f"❌ 반복 모드는 `{LOOP_OFF}`, `{LOOP_ONE}`, `{LOOP_ALL}` 중 하나여야 합니다."); return
+        await self._set_loop(모드, ctx=ctx)
+
+    # --- 재생 엔진: 대기열 진행과 다음 곡 미리 준비 ---
+    async def _start_track(self, guild: discord.Guild, state: GuildMusicState, track: Track, source=None) -> bool:
+        """곡 재생을 시작하고 다음 곡 준비를 예약합니다. track은 스트림 URL이 추출된 상태여야 합니다.
+
+        소스를 만드는 사이 정지되었거나 봇이 나갔으면 False를 반환합니다.
+        """
+        state.current = track
+        state.skip_requested = False
+        if source is None:
+            source = await create_source(track)
+            if state.current is not track or not guild.voice_client:
+                source.cleanup()
+                return False
+        guild_id = guild.id
+
+        def after(error):
+            # 재생 스레드에서 호출되므로 이벤트 루프로 넘겨서 처리
+            if error:
+                print(f'플레이어 오류: {error}')
+            self.bot.loop.call_soon_threadsafe(lambda: self.bot.loop.create_task(self._play_next(guild_id)))
+
+        session = self._get_session(guild_id)
+        session.tracks_played += 1
+        session.last_active = time.monotonic()
+        process = getattr(getattr(source, 'original', source), '_process', None) # PCMVolumeTransformer는 원본 소스를 감쌈
+        session.ffmpeg_pid = process.pid if process else None
+        guild.voice_client.play(CountingSource(source, session), after=after)
+        state.started_at = time.monotonic()
+        if self.disk_cache:
+            self.bot.loop.create_task(self._record_play(track))
+        self._schedule_prefetch(state)
+        return True
+
+    async def _resolve_track(self, track: Track, guild_id: int):
+        """곡을 재생할 수 있게 준비합니다: 디스크 캐시 -> 추출 캐시 -> yt-dlp 순"""
+        if self.disk_cache:
+            path = self.disk_cache.lookup(cache_key(track.url))
+            if path:
+                track.local_path = path
+                if track.title == track.url:
+                    metadata = await self.cache.lookup_metadata(track.url)
+                    if metadata:
+                        track.title, track.duration = metadata
+                return
+        track.apply(await self.cache.resolve(track.url, guild_id))
+
+    async def _record_play(self, track: Track):
+        """재생 횟수를 기록하고, 자주 재생되는 곡이면 디스크 캐시 다운로드를 백그라운드로 시작합니다."""
+        key = cache_key(track.url)
+        if not key.startswith("youtube:"):
+            return
+        try:
+            if await asyncio.to_thread(self.disk_cache.record_play, key, track.url, track.duration):
+                print(f"자주 재생되는 곡 '{track.title}'을(를) 디스크 캐시에 내려받습니다.")
+        except Exception as e:
+            print(f"재생 기록 중 오류 발생: {e}")
+
+    async def _play_next(self, guild_id: int):
+        """현재 곡이 끝났을 때 반복 모드에 따라 다음 곡으로 넘어갑니다. 불러올 수 없는 곡은 건너뛰고 한 번에 모아서 알립니다."""
+        state = self.states.get(guild_id)
+        guild = self.bot.get_guild(guild_id)
+        if not state or not guild or not guild.voice_client or guild.voice_client.is_playing():
+            return
+        session = self.sessions.get(guild_id)
+        if session:
+            session.last_active = time.monotonic() # 유휴 시간은 곡이 끝난 시점부터
+            session.ffmpeg_pid = None
+
+        finished = state.current
+        if finished and not state.skip_requested and state.loop_mode == LOOP_ONE:
+            state.queue.appendleft(finished)
+        elif finished and state.loop_mode == LOOP_ALL:
+            state.queue.append(finished)
+        state.current = None
+        state.skip_requested = False
+
+        skipped = [] # 불러오지 못해 건너뛴 곡 (재생목록에 지역 제한/연령 제한 곡이 많아도 안내는 한 번만)
+        try:
+            while state.queue and guild.voice_client:
+                track = state.queue.popleft()
+                source = None
+                if state.next_track is track and state.next_source:
+                    source = state.next_source # 미리 띄워 둔 FFmpeg 프로세스를 그대로 사용 (곡 사이 공백 없음)
+                    state.next_source = None
+                state.discard_prefetched()
+                if source is None:
+                    state.current = track # 추출을 기다리는 동안 다른 곡이 먼저 시작되지 않도록 자리 차지
+                    if state.prefetch_task:
+                        state.prefetch_task.cancel()
+                    if track.needs_resolve():
+                        try:
+                            await self._resolve_with_retry(state, track)
+                        except (extraction_pool.ExtractionBusy, asyncio.TimeoutError):
+                            if state.current is track:
+                                # 곡 문제가 아니라 추출 풀이 바쁜 것이므로 버리지 않고 맨 앞에 되돌린 뒤 잠시 후 다시 시도
+                                state.current = None
+                                state.queue.appendleft(track)
+                                self.bot.loop.call_later(RESOLVE_PAUSE_SECONDS, lambda: self.bot.loop.create_task(self._resume_playback(guild_id)))
+                                if state.text_channel:
+                                    await state.text_channel.send(f"⏳ 곡 정보 요청이 많아 **{track.title}** 재생을 잠시 미룹니다. {RESOLVE_PAUSE_SECONDS}초 뒤 다시 시도합니다.")
+                            return
+                        except Exception as e:
+                            print(f"Music resolve error: {e}")
+                            if state.current is not track:
+                                return
+                            state.current = None
+                            skipped.append(track)
+                            continue
+                    if not guild.voice_client or state.current is not track:
+                        return # 기다리는 사이 정지되었거나 봇이 나감
+
+                try:
+                    if not await self._start_track(guild, state, track, source):
+                        return
+                except discord.ClientException as e:
+                    print(f"Music play error: {e}") # 다른 곡이 먼저 재생을 시작했거나 연결이 끊김
+                    if state.current is track:
+                        state.current = None
+                    return
+                except Exception as e:
+                    print(f"Music play error: {e}")
+                    state.current = None
+                    skipped.append(track)
+                    continue
+                if state.text_channel and state.loop_mode != LOOP_ONE:
+                    await state.text_channel.send(f"🎶 **{track.title}** ({format_duration(track.duration)})을(를) 재생합니다!")
+                return
+            state.discard_prefetched()
+        finally:
+            if skipped and state.text_channel:
+                names = ", ".join(f"**{track.title}**" for track in skipped[:SKIPPED_REPORT_LIMIT])
+                more = f" 외 {len(skipped) - SKIPPED_REPORT_LIMIT}곡" if len(skipped) > SKIPPED_REPORT_LIMIT else ""
+                try:
+                    await state.text_channel.send(f"❌ 불러오지 못한 곡 {len(skipped)}개를 건너뛰었습니다: {names}{more}")
+                except discord.HTTPException as e:
+                    print(f"건너뛴 곡 안내 중 오류 발생: {e}")
+
+    async def _resume_playback(self, guild_id: int):
+        """미뤄 둔 재생을 다시 시도합니다. 그 사이 다른 곡이 재생을 시작했거나 준비 중이면 아무것도 하지 않습니다."""
+        state = self.states.get(guild_id)
+        if state and state.current is None:
+            await self._play_next(guild_id)
+
+    async def _resolve_with_retry(self, state: GuildMusicState, track: Track):
+        """재생 직전 추출. 추출 풀이 바쁘거나 시간이 초과되면 간격을 늘려 가며 다시 시도합니다. (그 사이 정지/퇴장하면 그만둠)"""
+        for delay in RESOLVE_RETRY_DELAYS:
+            try:
+                await self._resolve_track(track, state.guild_id)
+                return
+            except (extraction_pool.ExtractionBusy, asyncio.TimeoutError) as e:
+                print(f"곡 정보 추출 재시도 대기 ({track.url}, {delay}초): {type(e).__name__}")
+                await asyncio.sleep(delay)
+                if state.current is not track:
+                    raise
+        await self._resolve_track(track, state.guild_id)
+
+    def _schedule_prefetch(self, state: GuildMusicState):
+        """다음에 재생될 곡의 스트림 정보를 백그라운드에서 준비합니다. 대기열이 바뀌면 다시 호출해서 대상을 갱신합니다."""
+        if state.prefetch_task:
+            state.prefetch_task.cancel()
+            state.prefetch_task = None
+        track = state.upcoming()
+        if state.next_track is not track:
+            state.discard_prefetched()
+        if track is None or state.next_source:
+            return
+        state.prefetch_task = self.bot.loop.create_task(self._prefetch(state, track))
+
+    async def _prefetch(self, state: GuildMusicState, track: Track):
+        try:
+            if track.needs_resolve():
+                await self._resolve_track(track, state.guild_id)
+            # FFmpeg는 현재 곡이 끝나기 직전에 띄움 (길이를 모르는 곡은 추출만 해 둠)
+            if not (state.current and state.current.duration):
+                return
+            remaining = state.current.duration - (time.monotonic() - state.started_at) - PREBUFFER_SECONDS
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+            if state.upcoming() is track and state.next_source is None:
+                if track.needs_resolve():
+                    await self._resolve_track(track, state.guild_id)
+                source = await create_source(track)
+                if state.upcoming() is track and state.next_source is None:
+                    state.next_track = track
+                    state.next_source = source
+                else:
+                    source.cleanup() # 준비하는 사이 대기열이 바뀜
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # 실패해도 곡이 끝날 때 다시 추출하므로 기록만 남김
+            print(f"다음 곡 미리 준비 중 오류 발생 ({track.url}): {e}")
+
     # --- 내부 함수 (슬래시 및 메시지 기반 명령어에서 공통 사용) ---
     async def _join_voice_channel(self, user: discord.User, interaction: discord.Interaction = None, ctx: commands.Context = None):
         """음성 채널에 봇을 초대합니다."""
@@ -133,9 +993,10 @@ class Music(commands.Cog):
         if target_guild.voice_client:
             await target_guild.voice_client.move_to(channel)
             await send_response(f"✅ {channel.mention}으로 이동했습니다.", ephemeral=ephemeral)
-        else:
-            await channel.connect()
+        elif await self._connect(channel):
             await send_response(f"✅ {channel.mention}에 접속했습니다.", ephemeral=ephemeral)
+        else:
+            await send_response("❌ 지금은 음악을 재생 중인 서버가 너무 많아 접속할 수 없습니다. 잠시 후 다시 시도해주세요.", ephemeral=ephemeral)
 
     async def _leave_voice_channel(self, interaction: discord.Interaction = None, ctx: commands.Context = None):
         """음성 채널에서 봇을 내보냅니다."""
@@ -148,7 +1009,7 @@ class Music(commands.Cog):
             ephemeral = False
 
         if target_guild.voice_client:
-            await target_guild.voice_client.disconnect()
+            await self._disconnect(target_guild)
             await send_response("✅ 음성 채널에서 나갑니다.", ephemeral=ephemeral)
         else:
             await send_response("❌ 봇이 음성 채널에 연결되어 있지 않습니다.", ephemeral=ephemeral)
@@ -169,16 +1030,8 @@ class Music(commands.Cog):
             final_send_response = ctx.send
             ephemeral = False
 
-        if not target_guild.voice_client:
-            if user.voice:
-                try:
-                    await user.voice.channel.connect()
-                except discord.ClientException as e:
-                    await send_response(f"❌ 음성 채널에 접속할 수 없습니다: {e}", ephemeral=ephemeral)
-                    return
-            else:
-                await send_response("❌ 음성 채널에 먼저 들어와 있거나, 음성 채널에 봇을 초대해야 합니다.", ephemeral=ephemeral)
-                return
+        if not await self._ensure_voice(user, target_guild, send_response, ephemeral):
+            return
 
         # defer_response는 Interaction에만 defer()가 있으므로 확인 후 호출
         if interaction:
@@ -186,21 +1039,185 @@ class Music(commands.Cog):
         else:
             await defer_response() # ctx.typing()
 
-        try:
-            player = await YTDLSource.from_url(url, loop=self.bot.loop, stream=True)
+        state = self._get_state(target_guild.id)
+        if len(state.queue) >= MUSIC_QUEUE_LIMIT:
+            await final_send_response(f"❌ 대기열이 가득 찼습니다. (최대 {MUSIC_QUEUE_LIMIT}곡)", ephemeral=ephemeral)
+            return
 
-            if target_guild.voice_client.is_playing():
-                await final_send_response("🎶 현재 다른 음악이 재생 중입니다. 요청하신 곡은 큐에 추가되지 않습니다.", ephemeral=ephemeral)
-                # 실제 봇에서는 큐 로직을 여기에 구현해야 합니다.
-            else:
-                target_guild.voice_client.play(player, after=lambda e: print(f'플레이어 오류: {e}') if e else None)
-                await final_send_response(f'🎶 **{player.title}**을(를) 재생합니다!', ephemeral=ephemeral)
+        if is_playlist_url(url):
+            await self._enqueue_playlist(target_guild, state, user, url, final_send_response, ephemeral, interaction.channel if interaction else ctx.channel)
+            return
 
+        try:
+            track = Track(url, user.id)
+            metadata = None
+            if state.current is not None and self.cache.peek(url) is None:
+                # 바로 재생하지 않는 곡은 저장된 제목/길이만 표시하고, 스트림 URL은 차례가 가까워지면 미리 준비에서 추출
+                metadata = await self.cache.lookup_metadata(url)
+            if metadata:
+                track.title, track.duration = metadata
+            else:
+                await self._resolve_track(track, target_guild.id) # 디스크/추출 캐시에 있으면 yt-dlp 호출 없음
+        except extraction_pool.ExtractionBusy:
+            await final_send_response("⏳ 지금은 곡 정보 요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.", ephemeral=ephemeral)
+            return
+        except asyncio.TimeoutError:
+            await final_send_response("⏳ 곡 정보를 가져오는 데 시간이 너무 오래 걸립니다. 잠시 후 다시 시도해주세요.", ephemeral=ephemeral)
+            return
         except Exception as e:
             print(f"Music play error: {e}") 
             await final_send_response(f'❌ 음악 재생 중 오류 발생: {e}\n유효한 유튜브 URL인지 확인해주세요.', ephemeral=ephemeral)
             return
 
+        await self._add_track(target_guild, state, track, final_send_response, ephemeral, interaction.channel if interaction else ctx.channel)
+
+    async def _ensure_voice(self, user: discord.User, guild: discord.Guild, send, ephemeral: bool) -> bool:
+        """봇이 음성 채널에 없으면 사용자가 있는 채널에 접속합니다. 접속할 수 없으면 안내를 보내고 False를 반환합니다."""
+        if guild.voice_client:
+            return True
+        if not user.voice:
+            await send("❌ 음성 채널에 먼저 들어와 있거나, 음성 채널에 봇을 초대해야 합니다.", ephemeral=ephemeral)
+            return False
+        try:
+            if not await self._connect(user.voice.channel):
+                await send("❌ 지금은 음악을 재생 중인 서버가 너무 많아 접속할 수 없습니다. 잠시 후 다시 시도해주세요.", ephemeral=ephemeral)
+                return False
+        except discord.ClientException as e:
+            await send(f"❌ 음성 채널에 접속할 수 없습니다: {e}", ephemeral=ephemeral)
+            return False
+        return True
+
+    async def _add_track(self, guild: discord.Guild, state: GuildMusicState, track: Track, send, ephemeral: bool, channel):
+        """재생 중인 곡이 없으면 바로 재생하고(스트림 URL이 없으면 이때 추출), 있으면 대기열 끝에 추가합니다."""
+        state.text_channel = channel
+        if not guild.voice_client:
+            await send("❌ 봇이 음성 채널에 연결되어 있지 않습니다.", ephemeral=ephemeral)
+            return
+        if state.current is None and not guild.voice_client.is_playing():
+            state.current = track # 추출을 기다리는 동안 다른 곡이 먼저 시작되지 않도록 자리 차지
+            try:
+                if track.needs_resolve():
+                    await self._resolve_track(track, guild.id)
+                if state.current is not track or not guild.voice_client or not await self._start_track(guild, state, track):
+                    await send("❌ 재생을 준비하는 사이 음악이 정지되었습니다.", ephemeral=ephemeral)
+                    return
+            except extraction_pool.ExtractionBusy:
+                state.current = None
+                await send("⏳ 지금은 곡 정보 요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.", ephemeral=ephemeral)
+                return
+            except asyncio.TimeoutError:
+                state.current = None
+                await send("⏳ 곡 정보를 가져오는 데 시간이 너무 오래 걸립니다. 잠시 후 다시 시도해주세요.", ephemeral=ephemeral)
+                return
+            except Exception as e:
+                print(f"Music play error: {e}")
+                state.current = None
+                await send(f'❌ 음악 재생 중 오류 발생: {e}', ephemeral=ephemeral)
+                return
+            await send(f'🎶 **{track.title}** ({format_duration(track.duration)})을(를) 재생합니다!', ephemeral=ephemeral)
+        else:
+            state.queue.append(track)
+            self._schedule_prefetch(state) # 바로 다음 곡이 되었으면 미리 준비 시작
+            await send(f'➕ **{track.title}** ({format_duration(track.duration)})을(를) 대기열 {len(state.queue)}번에 추가했습니다.', ephemeral=ephemeral)
+
+    async def _search_play(self, user: discord.User, 검색어: str, interaction: discord.Interaction = None, ctx: commands.Context = None):
+        """검색어로 유튜브를 검색하고 상위 결과를 선택 메뉴로 보여줍니다. (같은 검색어는 캐시된 결과 사용)"""
+        target_guild = interaction.guild if interaction else ctx.guild
+        if interaction:
+            send_response = interaction.response.send_message
+            final_send_response = interaction.followup.send
+            ephemeral = True
+        else:
+            send_response = ctx.send
+            final_send_response = ctx.send
+            ephemeral = False
+
+        if not target_guild.voice_client and not user.voice:
+            await send_response("❌ 음성 채널에 먼저 들어와 있거나, 음성 채널에 봇을 초대해야 합니다.", ephemeral=ephemeral)
+            return
+        if not normalize_query(검색어):
+            await send_response("❌ 검색어를 입력해주세요.", ephemeral=ephemeral)
+            return
+
+        if interaction:
+            await interaction.response.defer(ephemeral=ephemeral)
+        else:
+            await ctx.typing()
+
+        try:
+            results = await self.search_cache.search(검색어, target_guild.id)
+        except extraction_pool.ExtractionBusy:
+            await final_send_response("⏳ 지금은 곡 정보 요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.", ephemeral=ephemeral)
+            return
+        except asyncio.TimeoutError:
+            await final_send_response("⏳ 검색하는 데 시간이 너무 오래 걸립니다. 잠시 후 다시 시도해주세요.", ephemeral=ephemeral)
+            return
+        except Exception as e:
+            print(f"Music search error: {e}")
+            await final_send_response(f"❌ 검색 중 오류 발생: {e}", ephemeral=ephemeral)
+            return
+
+        if not results:
+            await final_send_response(f"❌ '{검색어}'에 대한 검색 결과가 없습니다.", ephemeral=ephemeral)
+            return
+
+        embed = discord.Embed(
+            title=f"🔎 '{검색어}' 검색 결과",
+            description="\n".join(f"**{index}.** {result['title']} ({format_duration(result['duration'])})" for index, result in enumerate(results, start=1)),
+            color=discord.Color.purple()
+        )
+        embed.set_footer(text=f"{SEARCH_SELECT_TIMEOUT // 60}분 안에 아래 메뉴에서 재생할 곡을 고르세요.")
+        view = self.SearchResultSelect(self, user, results, ephemeral)
+        view.message = await final_send_response(embed=embed, view=view, ephemeral=ephemeral)
+
+    async def _play_search_result(self, user: discord.User, guild: discord.Guild, result: dict, send, ephemeral: bool, channel):
+        """선택한 검색 결과를 재생하거나 대기열에 추가합니다. 제목/길이는 검색 결과를 그대로 쓰고, 스트림 URL은 재생 직전에만 추출합니다."""
+        state = self._get_state(guild.id)
+        if len(state.queue) >= MUSIC_QUEUE_LIMIT:
+            await send(f"❌ 대기열이 가득 찼습니다. (최대 {MUSIC_QUEUE_LIMIT}곡)", ephemeral=ephemeral)
+            return
+        if not await self._ensure_voice(user, guild, send, ephemeral):
+            return
+        await self._add_track(guild, state, Track(result['url'], user.id, result['title'], result['duration']), send, ephemeral, channel)
+
+    async def _enqueue_playlist(self, guild: discord.Guild, state: GuildMusicState, user: discord.User, url: str, send, ephemeral: bool, channel):
+        """재생목록의 항목(ID/제목/길이)만 평면 추출해서 대기열에 넣습니다. 각 곡의 스트림 URL은 차례가 오기 직전에 추출합니다."""
+        try:
+            playlist = await self.pool.submit(guild.id, url, ytdl_playlist_options)
+        except extraction_pool.ExtractionBusy:
+            await send("⏳ 지금은 곡 정보 요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.", ephemeral=ephemeral)
+            return
+        except asyncio.TimeoutError:
+            await send("⏳ 재생목록을 가져오는 데 시간이 너무 오래 걸립니다. 잠시 후 다시 시도해주세요.", ephemeral=ephemeral)
+            return
+        except Exception as e:
+            print(f"Music playlist error: {e}")
+            await send(f'❌ 재생목록을 불러오는 중 오류 발생: {e}\n유효한 유튜브 재생목록 URL인지 확인해주세요.', ephemeral=ephemeral)
+            return
+
+        entries = [entry for entry in playlist['entries'] if entry['url']]
+        capacity = MUSIC_QUEUE_LIMIT - len(state.queue)
+        added = entries[:capacity]
+        if not added:
+            await send("❌ 재생목록에 재생할 수 있는 곡이 없거나 대기열이 가득 찼습니다.", ephemeral=ephemeral)
+            return
+        state.queue.extend(Track(entry['url'], user.id, entry['title'], int(entry['duration']) if entry['duration'] else None) for entry in added)
+        state.text_channel = channel
+        try:
+            await asyncio.to_thread(self.cache.remember_metadata, added)
+        except Exception as e:
+            print(f"재생목록 곡 정보 저장 중 오류 발생: {e}") # 표시용 정보라 실패해도 재생에는 영향 없음
+
+        message = f"📃 재생목록 **{playlist['title'] or url}**에서 {len(added)}곡을 대기열에 추가했습니다."
+        if len(entries) > len(added):
+            message += f" (대기열 한도 {MUSIC_QUEUE_LIMIT}곡을 넘어 {len(entries) - len(added)}곡은 제외)"
+        await send(message, ephemeral=ephemeral)
+
+        if state.current is None and guild.voice_client and not guild.voice_client.is_playing():
+            await self._play_next(guild.id) # 첫 곡을 추출해서 바로 재생
+        else:
+            self._schedule_prefetch(state)
+
     async def _stop_music(self, interaction: discord.Interaction = None, ctx: commands.Context = None):
         """현재 재생 중인 음악을 정지합니다."""
         target_guild = interaction.guild if interaction else ctx.guild
@@ -211,12 +1228,102 @@ class Music(commands.Cog):
             send_response = ctx.send
             ephemeral = False
 
-        if target_guild.voice_client and target_guild.voice_client.is_playing():
+        state = self.states.get(target_guild.id)
+        if target_guild.voice_client and (target_guild.voice_client.is_playing() or (state and state.current)):
+            if state:
+                state.reset() # 대기열도 비움 (현재 곡이 끝나도 다음 곡으로 넘어가지 않음)
             target_guild.voice_client.stop()
-            await send_response("✅ 음악을 정지합니다.", ephemeral=ephemeral)
+            await send_response("✅ 음악을 정지하고 대기열을 비웠습니다.", ephemeral=ephemeral)
         else:
             await send_response("❌ 현재 재생 중인 음악이 없습니다.", ephemeral=ephemeral)
 
+    async def _skip_music(self, interaction: discord.Interaction = None, ctx: commands.Context = None):
+        """현재 곡을 건너뜁니다. (한곡 반복 중이어도 다음 곡으로 넘어감)"""
+        target_guild = interaction.guild if interaction else ctx.guild
+        send_response = interaction.response.send_message if interaction else ctx.send
+        ephemeral = bool(interaction)
+
+        state = self.states.get(target_guild.id)
+        if not target_guild.voice_client or not target_guild.voice_client.is_playing() or not state or not state.current:
+            await send_response("❌ 현재 재생 중인 음악이 없습니다.", ephemeral=ephemeral)
+            return
+
+        skipped = state.current
+        state.skip_requested = True
+        self._schedule_prefetch(state) # 한곡 반복용으로 준비해 둔 소스 대신 대기열 다음 곡을 준비
+        target_guild.voice_client.stop() # after 콜백에서 다음 곡 재생
+        await send_response(f"⏭️ **{skipped.title}**을(를) 건너뜁니다.", ephemeral=ephemeral)
+
+    async def _show_queue(self, interaction: discord.Interaction = None, ctx: commands.Context = None):
+        """재생 중인 곡과 대기열을 보여줍니다."""
+        target_guild = interaction.guild if interaction else ctx.guild
+        send_response = interaction.response.send_message if interaction else ctx.send
+        ephemeral = bool(interaction)
+
+        state = self.states.get(target_guild.id)
+        if not state or (not state.current and not state.queue):
+            await send_response("📭 대기열이 비어 있습니다.", ephemeral=ephemeral)
+            return
+
+        embed = discord.Embed(title="🎶 음악 대기열", color=discord.Color.purple())
+        if state.current:
+            embed.add_field(name="재생 중", value=f"**{state.current.title}** ({format_duration(state.current.duration)}) - <@{state.current.requester_id}>", inline=False)
+        if state.queue:
+            lines = [f"{i}. {track.title} ({format_duration(track.duration)}) - <@{track.requester_id}>"
+                     for i, track in enumerate(itertools.islice(state.queue, MUSIC_QUEUE_PAGE_SIZE), 1)]
+            if len(state.queue) > MUSIC_QUEUE_PAGE_SIZE:
+                lines.append(f"... 외 {len(state.queue) - MUSIC_QUEUE_PAGE_SIZE}곡")
+            embed.add_field(name=f"대기열 ({len(state.queue)}곡)", value="\n".join(lines)[:1024], inline=False)
+        total = sum(track.duration or 0 for track in state.queue)
+        footer = f"반복: {state.loop_mode} | 대기열 총 길이: {format_duration(total)}"
+        session = self.sessions.get(target_guild.id)
+        if session:
+            footer += f" | 연결 {format_duration(time.monotonic() - session.connected_at)}, 전송 {session.bytes_streamed / 1024 / 1024:.1f}MB"
+        embed.set_footer(text=footer)
+        await send_response(embed=embed, ephemeral=ephemeral)
+
+    async def _remove_from_queue(self, 번호: int, interaction: discord.Interaction = None, ctx: commands.Context = None):
+        """대기열에서 곡을 삭제합니다."""
+        target_guild = interaction.guild if interaction else ctx.guild
+        send_response = interaction.response.send_message if interaction else ctx.send
+        ephemeral = bool(interaction)
+
+        state = self.states.get(target_guild.id)
+        if not state or not 1 <= 번호 <= len(state.queue):
+            await send_response(f"❌ 대기열에 {번호}번 곡이 없습니다.", ephemeral=ephemeral)
+            return
+        removed = state.queue[번호 - 1]
+        del state.queue[번호 - 1]
+        self._schedule_prefetch(state)
+        await send_response(f"🗑️ 대기열에서 **{removed.title}**을(를) 삭제했습니다.", ephemeral=ephemeral)
+
+    async def _shuffle_queue(self, interaction: discord.Interaction = None, ctx: commands.Context = None):
+        """대기열의 곡 순서를 섞습니다."""
+        target_guild = interaction.guild if interaction else ctx.guild
+        send_response = interaction.response.send_message if interaction else ctx.send
+        ephemeral = bool(interaction)
+
+        state = self.states.get(target_guild.id)
+        if not state or len(state.queue) < 2:
+            await send_response("❌ 섞을 곡이 부족합니다. (대기열에 2곡 이상 필요)", ephemeral=ephemeral)
+            return
+        tracks = list(state.queue)
+        random.shuffle(tracks)
+        state.queue = collections.deque(tracks)
+        self._schedule_prefetch(state)
+        await send_response(f"🔀 대기열 {len(tracks)}곡을 섞었습니다.", ephemeral=ephemeral)
+
+    async def _set_loop(self, 모드: str, interaction: discord.Interaction = None, ctx: commands.Context = None):
+        """반복 재생 모드를 설정합니다."""
+        target_guild = interaction.guild if interaction else ctx.guild
+        send_response = interaction.response.send_message if interaction else ctx.send
+        ephemeral = bool(interaction)
+
+        state = self._get_state(target_guild.id)
+        state.loop_mode = 모드
+        self._schedule_prefetch(state)
+        await send_response(f"🔁 반복 모드를 `{모드}`(으)로 설정했습니다.", ephemeral=ephemeral)
+
 async def setup(bot):
     await bot.add_cog(Music(bot))
     # 각 명령어는 bot.add_cog() 호출 시 @app_commands.command 데코레이터에 의해 자동으로 등록됩니다.
\ No newline at end of file
@@ -0,0 +1,278 @@
+import discord
+from discord.ext import commands, tasks
+from discord import app_commands
+import collections
+import datetime
+import string
+import time
+
+# 로그 채널 알림을 모아서 보내는 주기 (초) - 레이드 중에도 채널당 이 주기에 메시지 1개만 전송
+NOTIFY_FLUSH_INTERVAL = 15
+# 로그 임베드 하나에 표시할 최대 줄 수 (나머지는 개수만 표시)
+NOTIFY_MAX_LINES = 20
+# 서버별 입장 설정 캐시 유지 시간 (초)
+JOIN_SETTINGS_CACHE_TTL = 60
+
+class CompiledTemplate:
+    """환영/퇴장 메시지 템플릿을 한 번만 파싱해 두고, 입장할 때마다 값만 채워 넣습니다.
+
+    사용 가능한 치환자: {user} {mention} {server} {member_count}
+    """
+    FIELDS = ("user", "mention", "server", "member_count")
+
+    def __init__(self, source: str):
+        self.source = source
+        self.parts = [] # (치환자 여부, 텍스트 또는 치환자 이름)
+        try:
+            for literal, field_name, _format_spec, _conversion in string.Formatter().parse(source):
+                if literal:
+                    self.parts.append((False, literal))
+                if field_name is not None:
+                    if field_name in self.FIELDS:
+                        self.parts.append((True, field_name))
+                    else: # 알 수 없는 치환자는 그대로 출력
+                        self.parts.append((False, "{" + field_name + "}"))
+        except ValueError: # 중괄호 짝이 맞지 않는 템플릿은 원문 그대로 사용
+            self.parts = [(False, source)]
+
+    def render(self, member: discord.Member) -> str:
+        values = {
+            "user": member.display_name,
+            "mention": member.mention,
+            "server": member.guild.name,
+            "member_count": str(member.guild.member_count or 0),
+        }
+        return "".join(values[text] if is_field else text for is_field, text in self.parts)
+
+class Welcome(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.get_db_connection = bot.get_db_connection
+        self.get_server_config = bot.get_server_config
+        # key: guild_id, value: (불러온 시각, 설정 딕셔너리) - 입장마다 DB를 조회하지 않도록 캐시
+        self.join_settings_cache = {}
+        # key: guild_id, value: deque[(입장 시각, member_id)] - 슬라이딩 윈도우 입장 기록
+        self.recent_joins = collections.defaultdict(collections.deque)
+        # key: guild_id, value: {'until', 'previous_verification_level', 'started_at', 'quarantined'}
+        self.lockdowns = {}
+        # key: guild_id, value: [로그 줄] - 주기적으로 한 번에 로그 채널에 전송
+        self.pending_notifications = collections.defaultdict(list)
+        self.flush_join_notifications.start()
+
+    def cog_unload(self):
+        self.flush_join_notifications.cancel()
+
+    # --- 메시지 리스너 (모든 메시지 처리의 시작점) ---
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        pass # 이 코그에서는 특별히 on_message 필터링이 없으므로 pass
+
+    # --- 슬래시 커맨드 ---
+    @app_commands.command(name="잠금해제", description="레이드 감지로 시작된 서버 잠금 모드를 해제합니다.")
+    @app_commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def end_lockdown_slash(self, interaction: discord.Interaction):
+        await self._end_lockdown_command(interaction.guild, interaction.user, interaction=interaction)
+
+    # --- 메시지 기반 명령어 ---
+    @commands.command(name="잠금해제", help="레이드 감지로 시작된 서버 잠금 모드를 해제합니다. (예: 저스트 잠금해제)")
+    @commands.has_permissions(administrator=True)
+    async def end_lockdown_msg(self, ctx: commands.Context):
+        if not ctx.guild:
+            await ctx.send("이 명령어는 서버에서만 사용할 수 있습니다.")
+            return
+        await self._end_lockdown_command(ctx.guild, ctx.author, ctx=ctx)
+
+    # --- 멤버 입장/퇴장 리스너 ---
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        if member.bot:
+            return
+        guild = member.guild
+        settings = self._get_join_settings(guild.id)
+        now = time.monotonic()
+
+        if settings['raid_protection_enabled']:
+            joins = self.recent_joins[guild.id]
+            joins.append((now, member.id))
+            while joins and now - joins[0][0] > settings['raid_join_window']:
+                joins.popleft()
+
+            if guild.id in self.lockdowns:
+                # 잠금 중 추가 입장이 있으면 잠금 시간을 연장
+                self.lockdowns[guild.id]['until'] = now + settings['raid_lockdown_duration']
+            elif len(joins) >= settings['raid_join_threshold']:
+                await self._start_lockdown(guild, settings, [member_id for _, member_id in joins])
+                return # 방금 입장한 멤버는 _start_lockdown에서 함께 격리됨
+
+        if guild.id in self.lockdowns:
+            await self._quarantine_member(member, settings)
+            return # 잠금 중에는 환영 메시지 일시 중지
+
+        if settings['welcome_template']:
+            await self._send_member_message(guild, settings['welcome_template'].render(member))
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        if member.bot:
+            return
+        guild = member.guild
+        if guild.id in self.lockdowns:
+            return # 잠금 중에는 퇴장 메시지도 일시 중지
+        settings = self._get_join_settings(guild.id)
+        if settings['leave_template']:
+            await self._send_member_message(guild, settings['leave_template'].render(member))
+
+    # --- 주기 작업: 알림 일괄 전송 및 잠금 만료 처리 ---
+    @tasks.loop(seconds=NOTIFY_FLUSH_INTERVAL)
+    async def flush_join_notifications(self):
+        now = time.monotonic()
+        for guild_id, lockdown in list(self.lockdowns.items()):
+            if now >= lockdown['until']:
+                guild = self.bot.get_guild(guild_id)
+                if guild:
+                    await self._end_lockdown(guild, "잠금 시간이 만료되었습니다.")
+                else:
+                    self.lockdowns.pop(guild_id, None)
+
+        for guild_id in list(self.pending_notifications.keys()):
+            lines = self.pending_notifications.pop(guild_id)
+            if not lines:
+                continue
+            settings = self._get_join_settings(guild_id)
+            log_channel = self.bot.get_channel(int(settings['log_channel_id'])) if settings['log_channel_id'] else None
+            if not log_channel:
+                continue
+
+            description = "\n".join(lines[:NOTIFY_MAX_LINES])
+            if len(lines) > NOTIFY_MAX_LINES:
+                description += f"\n...외 {len(lines) - NOTIFY_MAX_LINES}건"
+            embed = discord.Embed(
+                title="🛡️ 입장 보안 로그",
+                description=description[:4096],
+                color=discord.Color.red() if guild_id in self.lockdowns else discord.Color.dark_teal()
+            )
+            embed.set_footer(text=f"{datetime.datetime.now(datetime.UTC).strftime('%Y-%m-%d %H:%M:%S')} (UTC)")
+            try:
+                await log_channel.send(embed=embed)
+            except discord.HTTPException as e:
+                print(f"입장 보안 로그 전송 실패 (서버 {guild_id}): {e}")
+
+    @flush_join_notifications.before_loop
+    async def before_flush_join_notifications(self):
+        await self.bot.wait_until_ready()
+
+    # --- 내부 함수 ---
+    def _get_join_settings(self, guild_id: int) -> dict:
+        """서버의 입장 관련 설정을 불러오고 템플릿을 미리 컴파일해 캐시합니다."""
+        cached = self.join_settings_cache.get(guild_id)
+        if cached and time.monotonic() - cached[0] < JOIN_SETTINGS_CACHE_TTL:
+            return cached[1]
+
+        server_config = self.get_server_config(guild_id)
+        def config_value(key, default=None):
+            if not server_config or server_config[key] is None:
+                return default
+            return server_config[key]
+
+        welcome_text = config_value('welcome_message_text')
+        leave_text = config_value('leave_message_text')
+        settings = {
+            'welcome_template': CompiledTemplate(welcome_text) if config_value('welcome_message_enabled', 0) == 1 and welcome_text else None,
+            'leave_template': CompiledTemplate(leave_text) if config_value('leave_message_enabled', 0) == 1 and leave_text else None,
+            'log_channel_id': config_value('log_channel_id'),
+            'raid_protection_enabled': config_value('raid_protection_enabled', 0) == 1,
+            'raid_join_threshold': max(2, int(config_value('raid_join_threshold', 10))),
+            'raid_join_window': max(1, int(config_value('raid_join_window', 10))),
+            'raid_lockdown_duration': max(30, int(config_value('raid_lockdown_duration', 300))),
+            'quarantine_role_id': config_value('quarantine_role_id'),
+        }
+        self.join_settings_cache[guild_id] = (time.monotonic(), settings)
+        return settings
+
+    async def _send_member_message(self, guild: discord.Guild, text: str):
+        """환영/퇴장 메시지를 서버의 시스템 채널로 보냅니다."""
+        channel = guild.system_channel
+        if not channel:
+            return
+        try:
+            await channel.send(text[:2000], allowed_mentions=discord.AllowedMentions(users=True, roles=False, everyone=False))
+        except discord.HTTPException as e:
+            print(f"환영/퇴장 메시지 전송 실패 (서버 {guild.id}): {e}")
+
+    async def _start_lockdown(self, guild: discord.Guild, settings: dict, spike_member_ids: list):
+        """입장 급증이 감지되면 인증 수준을 올리고, 급증 구간에 입장한 멤버를 격리합니다."""
+        previous_level = guild.verification_level
+        self.lockdowns[guild.id] = {
+            'until': time.monotonic() + settings['raid_lockdown_duration'],
+            'previous_verification_level': previous_level,
+            'started_at': datetime.datetime.now(datetime.UTC),
+            'quarantined': 0,
+        }
+        self.pending_notifications[guild.id].append(
+            f"🚨 **잠금 모드 시작**: {settings['raid_join_window']}초 안에 {len(spike_member_ids)}명이 입장했습니다. "
+            f"환영 메시지를 멈추고 신규 멤버를 격리합니다."
+        )
+        print(f"🚨 서버 {guild.name}({guild.id}) 레이드 감지 - 잠금 모드 시작")
+
+        if previous_level < discord.VerificationLevel.highest:
+            try:
+                await guild.edit(verification_level=discord.VerificationLevel.highest, reason="레이드 감지: 잠금 모드")
+            except discord.HTTPException as e:
+                self.pending_notifications[guild.id].append(f"⚠️ 인증 수준을 올리지 못했습니다: {e}")
+
+        for member_id in spike_member_ids:
+            member = guild.get_member(member_id)
+            if member:
+                await self._quarantine_member(member, settings)
+
+    async def _quarantine_member(self, member: discord.Member, settings: dict):
+        """격리 역할이 설정되어 있으면 역할을 부여하고, 없으면 잠금 시간 동안 타임아웃합니다."""
+        lockdown = self.lockdowns.get(member.guild.id)
+        try:
+            role = member.guild.get_role(int(settings['quarantine_role_id'])) if settings['quarantine_role_id'] else None
+            if role:
+                await member.add_roles(role, reason="레이드 감지: 잠금 모드 중 입장")
+            else:
+                await member.timeout(datetime.timedelta(seconds=settings['raid_lockdown_duration']), reason="레이드 감지: 잠금 모드 중 입장")
+            if lockdown: lockdown['quarantined'] += 1
+            self.pending_notifications[member.guild.id].append(f"🔒 격리: {member.mention} (`{member.id}`)")
+        except discord.HTTPException as e:
+            self.pending_notifications[member.guild.id].append(f"⚠️ 격리 실패: {member.mention} (`{member.id}`) - {e}")
+
+    async def _end_lockdown(self, guild: discord.Guild, reason: str):
+        """잠금 모드를 끝내고 인증 수준을 원래대로 되돌립니다."""
+        lockdown = self.lockdowns.pop(guild.id, None)
+        if not lockdown:
+            return False
+        self.recent_joins[guild.id].clear()
+        previous_level = lockdown['previous_verification_level']
+        if guild.verification_level != previous_level:
+            try:
+                await guild.edit(verification_level=previous_level, reason=f"잠금 모드 해제: {reason}")
+            except discord.HTTPException as e:
+                self.pending_notifications[guild.id].append(f"⚠️ 인증 수준을 되돌리지 못했습니다: {e}")
+        self.pending_notifications[guild.id].append(
+            f"✅ **잠금 모드 해제**: {reason} (격리된 멤버 {lockdown['quarantined']}명, 격리 해제는 관리자가 직접 확인해주세요)"
+        )
+        print(f"✅ 서버 {guild.name}({guild.id}) 잠금 모드 해제: {reason}")
+        return True
+
+    async def _end_lockdown_command(self, guild: discord.Guild, user: discord.Member, interaction: discord.Interaction = None, ctx: commands.Context = None):
+        if not user.guild_permissions.administrator:
+            response_msg = "❌ 이 명령어를 사용할 권한이 없습니다. `Administrator` 권한이 필요합니다."
+            if interaction: await interaction.response.send_message(response_msg, ephemeral=True)
+            elif ctx: await ctx.send(response_msg)
+            return
+
+        if interaction: await interaction.response.defer(ephemeral=True)
+        if await self._end_lockdown(guild, f"{user.display_name}님이 수동으로 해제했습니다."):
+            response_msg = "✅ 서버 잠금 모드를 해제했습니다."
+        else:
+            response_msg = "❌ 현재 잠금 모드가 아닙니다."
+        if interaction: await interaction.followup.send(response_msg, ephemeral=True)
+        elif ctx: await ctx.send(response_msg)
+
+async def setup(bot):
+    await bot.add_cog(Welcome(bot))
+    # 각 명령어는 bot.add_cog() 호출 시 @app_commands.command 데코레이터에 의해 자동으로 등록됩니다.
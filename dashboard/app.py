@@ -1,4 +1,4 @@
-from flask import Flask, render_template, redirect, url_for, request, flash, session
+from flask import Flask, render_template, redirect, url_for, request, flash, session, Response
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 import os
@@ -7,6 +7,14 @@ import sqlite3
 import datetime
 import requests # Discord OAuth2 통신용
 import json # JSON 처리용 (managed_guild_ids_json)
+import io
+import sys
+
+# 프로젝트 루트의 공용 도구 모듈(blacklist_tool 등)을 불러오기 위해 경로 추가
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import blacklist_tool
+import bank_ledger
+import search_index
 
 load_dotenv()
 
@@ -308,6 +316,8 @@ def dashboard(guild_id):
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM bot_status")
     raw_bot_statuses = cursor.fetchall()
+    cursor.execute("SELECT name, value, updated_at FROM bot_metrics ORDER BY name")
+    bot_metrics = cursor.fetchall()
     conn.close()
 
     bot_statuses = []
@@ -327,6 +337,7 @@ def dashboard(guild_id):
         guild_id=guild_id, 
         guild_name=guild_name, 
         bot_statuses=bot_statuses,
+        bot_metrics=bot_metrics,
         dashboard_admin_username=dashboard_admin_username # os.getenv 오류 수정
     )
 
@@ -388,11 +399,47 @@ def bank_data(guild_id):
     cursor = conn.cursor()
     cursor.execute("SELECT guild_name FROM server_configs WHERE guild_id = ?", (guild_id,))
     guild_data = cursor.fetchone()
+    # 봇이 증분 갱신해서 저장해 둔 부자 순위 (bank_accounts 전체를 정렬하지 않음)
+    try:
+        cursor.execute("SELECT rank, user_id, username, balance, updated_at FROM guild_leaderboards WHERE guild_id = ? ORDER BY position", (guild_id,))
+        leaderboard = cursor.fetchall()
+    except sqlite3.OperationalError: # 봇이 아직 테이블을 만들지 않은 경우
+        leaderboard = []
     conn.close()
     guild_name = guild_data['guild_name'] if guild_data else f"서버 ID: {guild_id}"
 
 
-    return render_template('bank.html', guild_id=guild_id, guild_name=guild_name, bank_accounts=bank_accounts, loans=loans, timedelta=datetime.datetime, dashboard_admin_username=dashboard_admin_username)
+    return render_template('bank.html', guild_id=guild_id, guild_name=guild_name, bank_accounts=bank_accounts, loans=loans, leaderboard=leaderboard, timedelta=datetime.datetime, dashboard_admin_username=dashboard_admin_username)
+
+@app.route('/dashboard/<guild_id>/bank/<user_id>/statement')
+@login_required
+def bank_statement(guild_id, user_id):
+    dashboard_admin_username = os.getenv("DASHBOARD_ADMIN_USERNAME")
+    if current_user.username != dashboard_admin_username:
+        if current_user.is_discord_user and guild_id not in current_user.managed_guild_ids:
+            return {"error": "권한이 없습니다."}, 403
+        # 은행 페이지와 같은 기준: 슈퍼 관리자가 아니면 본인 계좌 명세서만 받을 수 있음
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT discord_user_id FROM dashboard_users WHERE id = ? AND is_discord_user = 1", (current_user.id,))
+        result = cursor.fetchone()
+        conn.close()
+        if not result or result['discord_user_id'] != user_id:
+            return {"error": "권한이 없습니다."}, 403
+
+    statement_format = request.args.get('format', 'csv')
+    if statement_format not in bank_ledger.STATEMENT_FORMATS:
+        return {"error": "지원하지 않는 형식입니다."}, 400
+
+    def generate():
+        conn = get_db_connection()
+        try:
+            yield from bank_ledger.iter_gzip_chunks(bank_ledger.iter_statement_lines(conn, user_id, statement_format))
+        finally:
+            conn.close()
+
+    return Response(generate(), mimetype='application/gzip',
+                    headers={'Content-Disposition': f'attachment; filename=statement_{user_id}.{statement_format}.gz'})
 
 @app.route('/dashboard/<guild_id>/moderation')
 @login_required
@@ -440,6 +487,10 @@ def moderation_data(guild_id):
 
     return render_template('moderation.html', guild_id=guild_id, guild_name=guild_name, warnings=warnings_list, tickets=processed_tickets, timedelta=datetime.datetime, dashboard_admin_username=dashboard_admin_username)
 
+# 차량 신청 검토 대기열 (봇의 cogs/car.py 상태 값과 같음)
+CAR_REVIEW_STATUSES = ["검토중", "승인됨", "거부됨", "검토 시간 초과"]
+CAR_REVIEW_PAGE_SIZE = 50
+
 @app.route('/dashboard/<guild_id>/car')
 @login_required
 def car_data(guild_id):
@@ -449,16 +500,139 @@ def car_data(guild_id):
             flash("❌ 이 서버에 대한 관리 권한이 없습니다.", 'error')
             return redirect(url_for('select_server'))
 
-    cars = get_filtered_data('car_registrations', 'requested_at', guild_filter_column='guild_id') # guild_id로 필터링
+    status_filter = request.args.get('status', '검토중')
+    if status_filter not in CAR_REVIEW_STATUSES:
+        status_filter = None # 전체
+    before_id = request.args.get('before', type=int)
+
+    # 최신 신청부터 id 기준 키셋 페이지네이션 (OFFSET 없이 다음 페이지는 마지막 id보다 작은 행부터)
+    sql_query = "SELECT * FROM car_registrations WHERE guild_id = ?"
+    sql_params = [guild_id]
+    if status_filter:
+        sql_query += " AND status = ?"
+        sql_params.append(status_filter)
+    if before_id:
+        sql_query += " AND id < ?"
+        sql_params.append(before_id)
+    sql_query += " ORDER BY id DESC LIMIT ?"
+    sql_params.append(CAR_REVIEW_PAGE_SIZE + 1)
 
     conn = get_db_connection()
     cursor = conn.cursor()
+    cursor.execute(sql_query, sql_params)
+    cars = cursor.fetchall()
+    cursor.execute("SELECT COUNT(*) FROM car_registrations WHERE guild_id = ? AND status = '검토중'", (guild_id,))
+    pending_count = cursor.fetchone()[0]
     cursor.execute("SELECT guild_name FROM server_configs WHERE guild_id = ?", (guild_id,))
     guild_data = cursor.fetchone()
     conn.close()
     guild_name = guild_data['guild_name'] if guild_data else f"서버 ID: {guild_id}"
 
-    return render_template('car.html', guild_id=guild_id, guild_name=guild_name, cars=cars, timedelta=datetime.datetime, dashboard_admin_username=dashboard_admin_username)
+    next_before = cars[CAR_REVIEW_PAGE_SIZE - 1]['id'] if len(cars) > CAR_REVIEW_PAGE_SIZE else None
+    return render_template('car.html', guild_id=guild_id, guild_name=guild_name, cars=cars[:CAR_REVIEW_PAGE_SIZE], statuses=CAR_REVIEW_STATUSES,
+                           status_filter=status_filter, next_before=next_before, pending_count=pending_count,
+                           timedelta=datetime.datetime, dashboard_admin_username=dashboard_admin_username)
+
+@app.route('/dashboard/<guild_id>/car/review', methods=['POST'])
+@login_required
+def car_bulk_review(guild_id):
+    dashboard_admin_username = os.getenv("DASHBOARD_ADMIN_USERNAME")
+    if current_user.username != dashboard_admin_username:
+        if current_user.is_discord_user and guild_id not in current_user.managed_guild_ids:
+            flash("❌ 이 서버에 대한 관리 권한이 없습니다.", 'error')
+            return redirect(url_for('select_server'))
+
+    action = request.form.get('action')
+    registration_ids = [int(value) for value in request.form.getlist('registration_ids') if value.isdigit()]
+    reason = request.form.get('reason', '').strip() or "대시보드에서 일괄 거부"
+    refund = request.form.get('refund') == 'on'
+    redirect_to = url_for('car_data', guild_id=guild_id, status=request.form.get('status_filter', '검토중'))
+    if action not in ('approve', 'reject') or not registration_ids:
+        flash("❌ 처리할 신청을 선택해주세요.", 'error')
+        return redirect(redirect_to)
+
+    now = datetime.datetime.now(datetime.UTC).isoformat()
+    reviewer = f"dashboard:{current_user.username}"
+    placeholders = ','.join('?' * len(registration_ids))
+    conn = get_db_connection()
+    try:
+        # 상태 변경, 환불, 봇 알림 대기열 기록을 한 트랜잭션으로 처리 (검토중인 신청만 바뀌므로 버튼으로 먼저 처리된 건은 건너뜀)
+        with bank_ledger.transaction(conn):
+            if action == 'approve':
+                processed = conn.execute(f"""
+                    UPDATE car_registrations SET status = '승인됨', approved_by = ?, approved_at = ?
+                    WHERE guild_id = ? AND status = '검토중' AND id IN ({placeholders})
+                    RETURNING id, user_id, username, car_name, registration_tax
+                """, [reviewer, now, guild_id] + registration_ids).fetchall()
+                refunded = []
+            else:
+                processed = conn.execute(f"""
+                    UPDATE car_registrations SET status = '거부됨', rejected_by = ?, rejected_at = ?, rejection_reason = ?
+                    WHERE guild_id = ? AND status = '검토중' AND id IN ({placeholders})
+                    RETURNING id, user_id, username, car_name, registration_tax
+                """, [reviewer, now, reason, guild_id] + registration_ids).fetchall()
+                refunded = [row for row in processed if refund and row['registration_tax'] > 0]
+                bank_ledger.refund_fees(conn, [
+                    (row['user_id'], row['username'], row['registration_tax'], f"차량 등록세 환불 ({row['car_name']}, 등록 거부)") for row in refunded
+                ])
+            refunded_ids = {row['id'] for row in refunded}
+            conn.executemany("""
+                INSERT OR REPLACE INTO car_review_notifications (registration_id, action, refunded, created_at) VALUES (?, ?, ?, ?)
+            """, [(row['id'], action, 1 if row['id'] in refunded_ids else 0, now) for row in processed])
+            # 봇이 알림 대기열을 확인하도록 버전 증가
+            conn.execute("""
+                INSERT INTO data_versions (name, version) VALUES ('car_reviews', 1)
+                ON CONFLICT(name) DO UPDATE SET version = version + 1
+            """)
+    finally:
+        conn.close()
+
+    skipped = len(registration_ids) - len(processed)
+    label = "승인" if action == 'approve' else "거부"
+    message = f"✅ {len(processed)}건을 {label}했습니다."
+    if refunded:
+        message += f" (등록세 {sum(row['registration_tax'] for row in refunded):,}원 환불)"
+    if skipped:
+        message += f" 이미 처리되었거나 다른 서버의 신청 {skipped}건은 건너뛰었습니다."
+    flash(message, 'success')
+    return redirect(redirect_to)
+
+# 검색 페이지에서 대상별로 보여줄 최대 결과 수
+SEARCH_PAGE_LIMIT = 20
+
+@app.route('/dashboard/<guild_id>/search')
+@login_required
+def search_records(guild_id):
+    dashboard_admin_username = os.getenv("DASHBOARD_ADMIN_USERNAME") # os.getenv 호출
+    is_super_admin = current_user.username == dashboard_admin_username
+    if not is_super_admin:
+        if current_user.is_discord_user and guild_id not in current_user.managed_guild_ids:
+            flash("❌ 이 서버에 대한 관리 권한이 없습니다.", 'error')
+            return redirect(url_for('select_server'))
+
+    # 경고/거래는 서버 구분 없이 저장되므로 슈퍼 관리자만 검색 가능, 서버 관리자는 이 서버의 차량/티켓만
+    allowed_sources = [name for name, source in search_index.SEARCH_SOURCES.items() if is_super_admin or source['guild_column']]
+    query = request.args.get('q', '').strip()
+    source_filter = request.args.get('source')
+    sources = [source_filter] if source_filter in allowed_sources else allowed_sources
+
+    conn = get_db_connection()
+    results = {}
+    if query:
+        try:
+            results = search_index.search(conn, query, sources=sources, guild_id=guild_id, limit=SEARCH_PAGE_LIMIT)
+        except sqlite3.Error as e:
+            print(f"대시보드 검색 중 오류 발생: {e}")
+            flash("❌ 검색 중 오류가 발생했습니다. 검색어를 바꿔서 다시 시도해주세요.", 'error')
+    cursor = conn.cursor()
+    cursor.execute("SELECT guild_name FROM server_configs WHERE guild_id = ?", (guild_id,))
+    guild_data = cursor.fetchone()
+    conn.close()
+    guild_name = guild_data['guild_name'] if guild_data else f"서버 ID: {guild_id}"
+
+    return render_template('search.html', guild_id=guild_id, guild_name=guild_name, query=query, source_filter=source_filter,
+                           allowed_sources=allowed_sources, search_sources=search_index.SEARCH_SOURCES, results=results,
+                           timedelta=datetime.datetime, dashboard_admin_username=dashboard_admin_username)
 
 @app.route('/dashboard/<guild_id>/insurance')
 @login_required
@@ -538,6 +712,109 @@ def bot_presence_api():
             return {"error": "필수 필드가 누락되었습니다."}, 400
 
 
+# --- 글로벌 블랙리스트 일괄 가져오기/내보내기 (슈퍼 관리자만 접근 가능) ---
+@app.route('/admin/blacklist', methods=['GET', 'POST'])
+@login_required
+def blacklist_admin():
+    dashboard_admin_username = os.getenv("DASHBOARD_ADMIN_USERNAME")
+    if current_user.username != dashboard_admin_username:
+        flash("❌ 블랙리스트 관리는 슈퍼 관리자만 사용할 수 있습니다.", 'error')
+        return redirect(url_for('select_server'))
+
+    conn = get_db_connection()
+    try:
+        if request.method == 'POST':
+            feed_file = request.files.get('feed_file')
+            if not feed_file or not feed_file.filename:
+                flash("가져올 파일을 선택해주세요.", 'warning')
+                return redirect(url_for('blacklist_admin'))
+
+            feed_format = request.form.get('feed_format') or blacklist_tool.detect_format(feed_file.filename)
+            if feed_format not in blacklist_tool.FEED_FORMATS:
+                flash("지원하지 않는 파일 형식입니다.", 'error')
+                return redirect(url_for('blacklist_admin'))
+
+            # 업로드 스트림을 줄 단위로 읽어 파싱 (파일 전체를 문자열로 올리지 않음)
+            lines = io.TextIOWrapper(feed_file.stream, encoding='utf-8', newline='')
+            result = blacklist_tool.import_blacklist(
+                conn,
+                blacklist_tool.parse_feed(lines, feed_format),
+                replace=request.form.get('replace') == 'on',
+                added_by=f"dashboard:{current_user.username}",
+                dry_run=request.form.get('dry_run') == 'on'
+            )
+            prefix = "🔍 (미리보기) " if result['dry_run'] else "✅ "
+            flash(f"{prefix}수신 {result['received']:,}개, 추가 {result['added']:,}개, 갱신 {result['updated']:,}개, 삭제 {result['removed']:,}개 ({result['elapsed']:.2f}초)", 'success')
+            return redirect(url_for('blacklist_admin'))
+
+        blacklist_tool.ensure_tables(conn)
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM global_blacklist")
+        total_count = cursor.fetchone()[0]
+        cursor.execute("SELECT user_id, username, reason, added_by, added_at FROM global_blacklist ORDER BY added_at DESC LIMIT 20")
+        recent_entries = cursor.fetchall()
+    finally:
+        conn.close()
+
+    return render_template('blacklist.html', total_count=total_count, recent_entries=recent_entries, feed_formats=blacklist_tool.FEED_FORMATS, dashboard_admin_username=dashboard_admin_username)
+
+@app.route('/admin/blacklist/export')
+@login_required
+def blacklist_export():
+    dashboard_admin_username = os.getenv("DASHBOARD_ADMIN_USERNAME")
+    if current_user.username != dashboard_admin_username:
+        return {"error": "권한이 없습니다."}, 403
+
+    feed_format = request.args.get('format', 'csv')
+    if feed_format not in blacklist_tool.FEED_FORMATS:
+        return {"error": "지원하지 않는 형식입니다."}, 400
+
+    def generate():
+        conn = get_db_connection()
+        try:
+            yield from blacklist_tool.iter_export_lines(conn, feed_format)
+        finally:
+            conn.close()
+
+    extension = {'csv': 'csv', 'ndjson': 'ndjson', 'ids': 'txt'}[feed_format]
+    return Response(generate(), mimetype='text/plain; charset=utf-8',
+                    headers={'Content-Disposition': f'attachment; filename=global_blacklist.{extension}'})
+
+@app.route('/admin/ledger', methods=['GET', 'POST'])
+@login_required
+def ledger_admin():
+    dashboard_admin_username = os.getenv("DASHBOARD_ADMIN_USERNAME")
+    if current_user.username != dashboard_admin_username:
+        flash("❌ 원장 검증은 슈퍼 관리자만 사용할 수 있습니다.", 'error')
+        return redirect(url_for('select_server'))
+
+    conn = get_db_connection()
+    try:
+        bank_ledger.ensure_ledger_tables(conn)
+        if request.method == 'POST':
+            if request.form.get('action') == 'compact':
+                result = bank_ledger.compact_ledger(conn)
+                flash(f"✅ 원장 압축 완료: {result['archived']:,}행 보관", 'success')
+            else:
+                with bank_ledger.transaction(conn):
+                    updated = bank_ledger.take_snapshots(conn)
+                flash(f"✅ 스냅샷 완료: {updated:,}개 계정 갱신", 'success')
+            return redirect(url_for('ledger_admin'))
+
+        verification = bank_ledger.verify_balances(conn)
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM ledger_entries")
+        entry_count = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*), MAX(taken_at) FROM balance_snapshots")
+        snapshot_count, last_snapshot_at = cursor.fetchone()
+    finally:
+        conn.close()
+
+    last_snapshot = datetime.datetime.fromtimestamp(last_snapshot_at, datetime.UTC).strftime('%Y-%m-%d %H:%M') if last_snapshot_at else None
+    return render_template('ledger.html', verification=verification, entry_count=entry_count, snapshot_count=snapshot_count,
+                           last_snapshot=last_snapshot, retention_days=bank_ledger.LEDGER_RETENTION_DAYS, dashboard_admin_username=dashboard_admin_username)
+
+
 # --- 새로운 설정 페이지 라우트 ---
 @app.route('/dashboard/<guild_id>/settings')
 @login_required
@@ -573,6 +850,7 @@ def settings_list(guild_id):
         {'name': 'car_admin_channel_id', 'type': 'text', 'label': '차량 관리 채널 ID', 'section': 'car'},
         {'name': 'car_admin_role_id', 'type': 'text', 'label': '차량 관리 역할 ID', 'section': 'car'},
         {'name': 'approved_cars_channel_id', 'type': 'text', 'label': '승인 차량 채널 ID', 'section': 'car'},
+        {'name': 'car_timeout_refund_enabled', 'type': 'checkbox', 'label': '검토 시간 초과 시 등록세 환불', 'section': 'car'},
         # Bank Bot Settings
         {'name': 'bank_loan_enabled', 'type': 'checkbox', 'label': '은행 대출 기능 활성화', 'section': 'bank'},
         {'name': 'bank_max_loan_amount', 'type': 'number', 'label': '은행 최대 대출 금액', 'section': 'bank'},
@@ -586,6 +864,11 @@ def settings_list(guild_id):
         {'name': 'spam_filter_enabled', 'type': 'checkbox', 'label': '도배 감지 활성화', 'section': 'security'},
         {'name': 'spam_threshold', 'type': 'number', 'label': '도배 기준 (메시지 개수)', 'section': 'security'},
         {'name': 'spam_time_window', 'type': 'number', 'label': '도배 시간 범위 (초)', 'section': 'security'},
+        {'name': 'raid_protection_enabled', 'type': 'checkbox', 'label': '레이드 감지 (입장 급증 시 잠금 모드) 활성화', 'section': 'security'},
+        {'name': 'raid_join_threshold', 'type': 'number', 'label': '레이드 기준 (입장 인원)', 'section': 'security'},
+        {'name': 'raid_join_window', 'type': 'number', 'label': '레이드 감지 시간 범위 (초)', 'section': 'security'},
+        {'name': 'raid_lockdown_duration', 'type': 'number', 'label': '잠금 모드 유지 시간 (초)', 'section': 'security'},
+        {'name': 'quarantine_role_id', 'type': 'text', 'label': '격리 역할 ID', 'section': 'security'},
         # Ticket Settings
         {'name': 'ticket_open_channel_id', 'type': 'text', 'label': '티켓 개설 채널 ID', 'section': 'ticket'},
         {'name': 'ticket_category_id', 'type': 'text', 'label': '티켓 카테고리 ID', 'section': 'ticket'},
@@ -594,13 +877,13 @@ def settings_list(guild_id):
 
     # 모든 앱 명령어 목록 (슬래시 커맨드 이름 기준)
     all_commands = [
-        "통장개설", "잔액", "입금", "출금", "송금", "대출", "상환", "거래내역",
+        "통장개설", "잔액", "입금", "출금", "송금", "대출", "상환", "거래내역", "거래내역내보내기", "부자순위", "급여지급",
         "차량등록",
-        "킥", "밴", "청소", "역할부여", "역할삭제", "경고", "경고조회", "경고삭제",
+        "킥", "밴", "청소", "역할부여", "역할삭제", "경고", "경고조회", "경고삭제", "검색",
         "티켓 오픈", "티켓 닫기",
-        "들어와", "나가", "재생", "정지",
+        "들어와", "나가", "재생", "검색재생", "정지", "스킵", "대기열", "대기열삭제", "셔플", "반복",
         "주사위", "가위바위보",
-        "채널명변경", "스캔블랙리스트", "보안리포트", "명령어리스트" # 새 명령어
+        "채널명변경", "스캔블랙리스트", "블랙리스트전체스캔", "보안리포트", "잠금해제", "명령어리스트" # 새 명령어
     ]
 
     # 봇 상태 설정 불러오기 (슈퍼 관리자용)
@@ -678,6 +961,7 @@ def edit_settings(guild_id):
         {'name': 'car_admin_channel_id', 'type': 'text', 'label': '차량 관리 채널 ID', 'section': 'car'},
         {'name': 'car_admin_role_id', 'type': 'text', 'label': '차량 관리 역할 ID', 'section': 'car'},
         {'name': 'approved_cars_channel_id', 'type': 'text', 'label': '승인 차량 채널 ID', 'section': 'car'},
+        {'name': 'car_timeout_refund_enabled', 'type': 'checkbox', 'label': '검토 시간 초과 시 등록세 환불', 'section': 'car'},
         # Bank Bot Settings
         {'name': 'bank_loan_enabled', 'type': 'checkbox', 'label': '은행 대출 기능 활성화', 'section': 'bank'},
         {'name': 'bank_max_loan_amount', 'type': 'number', 'label': '은행 최대 대출 금액', 'section': 'bank'},
@@ -691,6 +975,11 @@ def edit_settings(guild_id):
         {'name': 'spam_filter_enabled', 'type': 'checkbox', 'label': '도배 감지 활성화', 'section': 'security'},
         {'name': 'spam_threshold', 'type': 'number', 'label': '도배 기준 (메시지 개수)', 'section': 'security'},
         {'name': 'spam_time_window', 'type': 'number', 'label': '도배 시간 범위 (초)', 'section': 'security'},
+        {'name': 'raid_protection_enabled', 'type': 'checkbox', 'label': '레이드 감지 (입장 급증 시 잠금 모드) 활성화', 'section': 'security'},
+        {'name': 'raid_join_threshold', 'type': 'number', 'label': '레이드 기준 (입장 인원)', 'section': 'security'},
+        {'name': 'raid_join_window', 'type': 'number', 'label': '레이드 감지 시간 범위 (초)', 'section': 'security'},
+        {'name': 'raid_lockdown_duration', 'type': 'number', 'label': '잠금 모드 유지 시간 (초)', 'section': 'security'},
+        {'name': 'quarantine_role_id', 'type': 'text', 'label': '격리 역할 ID', 'section': 'security'},
         # Ticket Settings
         {'name': 'ticket_open_channel_id', 'type': 'text', 'label': '티켓 개설 채널 ID', 'section': 'ticket'},
         {'name': 'ticket_category_id', 'type': 'text', 'label': '티켓 카테고리 ID', 'section': 'ticket'},
@@ -699,13 +988,13 @@ def edit_settings(guild_id):
 
     # 모든 앱 명령어 목록 (슬래시 커맨드 이름 기준) - GET 요청과 동일하게 유지
     all_commands = [
-        "통장개설", "잔액", "입금", "출금", "송금", "대출", "상환", "거래내역",
+        "통장개설", "잔액", "입금", "출금", "송금", "대출", "상환", "거래내역", "거래내역내보내기", "부자순위", "급여지급",
         "차량등록",
-        "킥", "밴", "청소", "역할부여", "역할삭제", "경고", "경고조회", "경고삭제",
+        "킥", "밴", "청소", "역할부여", "역할삭제", "경고", "경고조회", "경고삭제", "검색",
         "티켓 오픈", "티켓 닫기",
-        "들어와", "나가", "재생", "정지",
+        "들어와", "나가", "재생", "검색재생", "정지", "스킵", "대기열", "대기열삭제", "셔플", "반복",
         "주사위", "가위바위보",
-        "채널명변경", "스캔블랙리스트", "보안리포트", "명령어리스트" # 새 명령어
+        "채널명변경", "스캔블랙리스트", "블랙리스트전체스캔", "보안리포트", "잠금해제", "명령어리스트" # 새 명령어
     ]
 
 
@@ -0,0 +1,232 @@
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import multiprocessing
+import os
+import random
+import threading
+import time
+
+# 추출 작업자 수와 방식 (MUSIC_EXTRACT_PROCESSES=1이면 프로세스 풀 - GIL을 나눠 쓰지 않아 봇 이벤트 루프가 덜 막힘)
+EXTRACT_WORKERS = int(os.getenv("MUSIC_EXTRACT_WORKERS", "4"))
+EXTRACT_USE_PROCESSES = os.getenv("MUSIC_EXTRACT_PROCESSES", "0") == "1"
+# 추출 요청 하나를 기다리는 최대 시간 (대기열에서 기다린 시간 포함, 초)
+EXTRACT_TIMEOUT = float(os.getenv("MUSIC_EXTRACT_TIMEOUT", "30"))
+# 서버 하나 / 전체에서 동시에 기다릴 수 있는 추출 요청 수 (넘으면 ExtractionBusy)
+MAX_PENDING_PER_GUILD = 5
+MAX_PENDING_TOTAL = 200
+
+# 재생목록 평면 추출에서 재생할 수 없는 항목의 제목
+UNAVAILABLE_TITLES = ("[Private video]", "[Deleted video]")
+
+_local = threading.local()
+
+
+class ExtractionBusy(Exception):
+    """추출 대기열이 가득 차서 요청을 받을 수 없음"""
+
+
+def extract_info(url: str, options: dict) -> dict:
+    """작업자(스레드/프로세스)에서 yt-dlp로 정보를 추출하고 재생에 필요한 값만 돌려줍니다. (프로세스 간 전달량 최소화)
+
+    options에 extract_flat이 있으면 {'title', 'entries': [{'id', 'title', 'duration', 'url'}, ...]}를 돌려줍니다.
+    """
+    instances = getattr(_local, "instances", None)
+    if instances is None:
+        instances = _local.instances = {}
+    key = tuple(sorted(options.items()))
+    ytdl = instances.get(key)
+    if ytdl is None:
+        import yt_dlp # 작업자 안에서만 사용 (벤치마크는 yt-dlp 없이도 실행 가능)
+        ytdl = instances[key] = yt_dlp.YoutubeDL(options)
+    data = ytdl.extract_info(url, download=False)
+
+    # 평면 추출(extract_flat)은 재생목록 항목의 ID/제목/길이만 가져옴 - 스트림 URL은 곡마다 재생 직전에 따로 추출
+    if options.get("extract_flat"):
+        entries = []
+        for entry in data.get("entries") or [data]:
+            if not entry or entry.get("title") in UNAVAILABLE_TITLES:
+                continue
+            entries.append({
+                "id": entry.get("id"),
+                "title": entry.get("title"),
+                "duration": entry.get("duration"),
+                "url": entry.get("url") or entry.get("webpage_url"),
+            })
+        return {"title": data.get("title"), "entries": entries}
+
+    # 재생목록의 경우 첫 번째 항목을 가져옴
+    if "entries" in data:
+        data = next(iter(data["entries"]))
+    return {
+        "id": data.get("id"),
+        "title": data.get("title"),
+        "duration": data.get("duration"),
+        "url": data.get("url"),
+        "webpage_url": data.get("webpage_url"),
+        "acodec": data.get("acodec"), # Opus 패스스루 여부 판단용 (예: 'opus')
+    }
+
+
+class ExtractionPool:
+    """yt-dlp 전용 작업자 풀. 봇의 기본 executor와 분리하고, 서버별 대기열을 돌아가며 처리해 한 서버가 풀을 독차지하지 못하게 합니다."""
+
+    def __init__(self, workers: int = EXTRACT_WORKERS, use_processes: bool = EXTRACT_USE_PROCESSES, timeout: float = EXTRACT_TIMEOUT,
+                 max_pending_per_guild: int = MAX_PENDING_PER_GUILD, max_pending_total: int = MAX_PENDING_TOTAL, func=extract_info):
+        self.workers = workers
+        self.timeout = timeout
+        self.max_pending_per_guild = max_pending_per_guild
+        self.max_pending_total = max_pending_total
+        self.func = func
+        if use_processes:
+            # spawn: 작업자 프로세스가 discord/봇 상태를 물려받지 않고 이 모듈만 불러옴
+            self.executor = concurrent.futures.ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            self.executor = concurrent.futures.ThreadPoolExecutor(workers, thread_name_prefix="ytdl")
+        self.queues = collections.OrderedDict() # guild_id -> deque[(args, future, queued_at)] - 앞에 있는 서버부터 한 건씩 차례로
+        self.pending = collections.Counter() # guild_id -> 응답을 기다리는 요청 수 (대기 + 실행 중)
+        self.running = 0
+        self.counters = collections.Counter() # submitted, completed, errors, timeouts, busy
+        self.wait_seconds = 0.0
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def submit(self, guild_id, *args):
+        """추출을 요청하고 결과를 기다립니다. 대기열이 가득 차면 ExtractionBusy, 시간이 초과되면 asyncio.TimeoutError."""
+        if self.pending[guild_id] >= self.max_pending_per_guild or sum(self.pending.values()) >= self.max_pending_total:
+            self.counters["busy"] += 1
+            raise ExtractionBusy()
+
+        future = asyncio.get_running_loop().create_future()
+        self.queues.setdefault(guild_id, collections.deque()).append((args, future, time.monotonic()))
+        self.pending[guild_id] += 1
+        self.counters["submitted"] += 1
+        self._dispatch()
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.counters["timeouts"] += 1
+            future.cancel() # 아직 대기열에 있으면 실행하지 않음 (이미 실행 중인 작업은 끝까지 돌지만 결과는 버림)
+            raise
+        finally:
+            self.pending[guild_id] -= 1
+            if self.pending[guild_id] <= 0:
+                del self.pending[guild_id]
+
+    def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while self.running < self.workers and self.queues:
+            guild_id, jobs = next(iter(self.queues.items()))
+            args, future, queued_at = jobs.popleft()
+            if jobs:
+                self.queues.move_to_end(guild_id) # 이 서버의 다음 요청은 다른 서버들 뒤로
+            else:
+                del self.queues[guild_id]
+            if future.done():
+                continue # 기다리다 시간 초과된 요청
+            self.wait_seconds += time.monotonic() - queued_at
+            self.running += 1
+            work = loop.run_in_executor(self.executor, self.func, *args)
+            work.add_done_callback(lambda done, future=future: self._finished(done, future))
+
+    def _finished(self, done, future):
+        self.running -= 1
+        if done.exception() is not None:
+            self.counters["errors"] += 1
+            if not future.done():
+                future.set_exception(done.exception())
+        else:
+            self.counters["completed"] += 1
+            if not future.done():
+                future.set_result(done.result())
+        self._dispatch()
+
+    def metrics(self) -> dict:
+        started = self.counters["submitted"] - sum(len(jobs) for jobs in self.queues.values())
+        return {
+            "music_extract_submitted": self.counters["submitted"],
+            "music_extract_completed": self.counters["completed"],
+            "music_extract_errors": self.counters["errors"],
+            "music_extract_timeouts": self.counters["timeouts"],
+            "music_extract_busy": self.counters["busy"],
+            "music_extract_queued": sum(len(jobs) for jobs in self.queues.values()),
+            "music_extract_running": self.running,
+            "music_extract_avg_wait_ms": round(self.wait_seconds / started * 1000) if started > 0 else 0,
+        }
+
+
+def _fake_extract(url: str, options: dict) -> dict:
+    """벤치마크용: yt-dlp 대신 정해진 시간 동안 블로킹합니다."""
+    time.sleep(options["delay"])
+    return {"id": url, "title": url, "duration": 180, "url": url, "webpage_url": url}
+
+
+async def _run_benchmark_async(guilds: int, flood: int, workers: int, use_processes: bool, seed: int):
+    """서버 하나가 flood건을 한꺼번에 요청하고 나머지 서버들이 한두 건씩 요청할 때, 기본 executor(FIFO)와 전용 풀의 지연 시간을 비교합니다."""
+    rng = random.Random(seed)
+    requests = [(0, f"flood-{i}") for i in range(flood)]
+    requests += [(guild_id, f"g{guild_id}-{i}") for guild_id in range(1, guilds) for i in range(rng.randint(1, 2))]
+    delays = {url: rng.uniform(0.05, 0.2) for _, url in requests}
+
+    async def measure(label, run):
+        latencies = collections.defaultdict(list)
+        busy = 0
+
+        async def one(guild_id, url):
+            nonlocal busy
+            started = time.perf_counter()
+            try:
+                await run(guild_id, url)
+            except ExtractionBusy:
+                busy += 1
+                return
+            latencies["flood" if guild_id == 0 else "others"].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(guild_id, url) for guild_id, url in requests))
+        elapsed = time.perf_counter() - started
+        for group in ("others", "flood"):
+            values = sorted(latencies[group])
+            if values:
+                print(f"{label:<12} {group:<6} {len(values):>4}건: p50 {values[len(values) // 2]:.2f}초, "
+                      f"p95 {values[min(len(values) - 1, int(len(values) * 0.95))]:.2f}초")
+        print(f"{label:<12} 전체 {elapsed:.2f}초, 바쁨 응답 {busy}건")
+
+    fifo = concurrent.futures.ThreadPoolExecutor(workers)
+    loop = asyncio.get_running_loop()
+    await measure("FIFO executor", lambda guild_id, url: loop.run_in_executor(fifo, _fake_extract, url, {"delay": delays[url]}))
+    fifo.shutdown()
+
+    pool = ExtractionPool(workers=workers, use_processes=use_processes, timeout=60, max_pending_per_guild=flood, func=_fake_extract)
+    await measure("공정 풀", lambda guild_id, url: pool.submit(guild_id, url, {"delay": delays[url]}))
+    pool.shutdown()
+
+    limited = ExtractionPool(workers=workers, use_processes=use_processes, timeout=60, func=_fake_extract)
+    await measure(f"공정 풀+한도{MAX_PENDING_PER_GUILD}", lambda guild_id, url: limited.submit(guild_id, url, {"delay": delays[url]}))
+    limited.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="저스트봇 음악 정보 추출 풀 도구")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    extract_parser = subparsers.add_parser("extract", help="URL 하나를 추출해 봅니다.")
+    extract_parser.add_argument("url", help="유튜브 URL 또는 검색어")
+    bench_parser = subparsers.add_parser("benchmark", help="여러 서버의 동시 /재생 요청을 흉내 내어 대기 시간을 측정합니다.")
+    bench_parser.add_argument("--guilds", type=int, default=50, help="서버 수 (기본 50)")
+    bench_parser.add_argument("--flood", type=int, default=60, help="한 서버가 한꺼번에 보내는 요청 수 (기본 60)")
+    bench_parser.add_argument("--workers", type=int, default=EXTRACT_WORKERS, help="작업자 수")
+    bench_parser.add_argument("--processes", action="store_true", help="프로세스 풀 사용")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "benchmark":
+        asyncio.run(_run_benchmark_async(args.guilds, args.flood, args.workers, args.processes, seed=1))
+    else:
+        print(extract_info(args.url, {"format": "bestaudio/best", "quiet": True, "no_warnings": True, "default_search": "auto"}))
+
+
+if __name__ == "__main__":
+    main()
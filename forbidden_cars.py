@@ -0,0 +1,257 @@
+import argparse
+import collections
+import json
+import random
+import time
+import unicodedata
+
+# 서버 설정이 없을 때 쓰는 기본 금지 차량 목록 (server_configs.car_forbidden_cars_json 기본값과 같음)
+DEFAULT_FORBIDDEN_CARS = ["탱크", "전투기", "핵잠수함", "우주선"]
+
+# 숫자/기호로 글자를 바꿔 쓰는 경우 (예: t4nk, 5pace)
+LOOKALIKE_CHARS = str.maketrans({"0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "@": "a", "$": "s"})
+
+# 퍼지 검색에 쓰는 n-gram 길이 (한글은 자모 단위로 분해한 뒤 계산)
+NGRAM_SIZE = 3
+
+# 같은 차량을 가리키는 다른 표기 (영어 이름 등). 묶음의 한 이름이 금지 목록에 있으면 나머지 표기도 함께 잡습니다.
+CAR_ALIASES = [
+    ["탱크", "tank"],
+    ["전투기", "fighter jet", "jet fighter", "fighter"],
+    ["핵잠수함", "nuclear submarine", "nuclear sub"],
+    ["우주선", "spaceship", "spacecraft", "space shuttle"],
+]
+
+# 한글 음절의 로마자 표기 (국어의 로마자 표기법 기준, 자음 동화 등 발음 변화는 반영하지 않음)
+ROMAN_INITIALS = ("g", "kk", "n", "d", "tt", "r", "m", "b", "pp", "s", "ss", "", "j", "jj", "ch", "k", "t", "p", "h")
+ROMAN_MEDIALS = ("a", "ae", "ya", "yae", "eo", "e", "yeo", "ye", "o", "wa", "wae", "oe", "yo", "u", "wo", "we", "wi", "yu", "eu", "ui", "i")
+ROMAN_FINALS = ("", "k", "k", "k", "n", "n", "n", "t", "l", "k", "m", "l", "l", "l", "p", "l", "m", "p", "p", "t", "t", "ng", "t", "t", "k", "t", "p", "t")
+
+
+def normalize(name: str) -> str:
+    """비교용 키: 대소문자/전각/공백/기호를 없애고 한글은 자모로 분해합니다. ("탱 크", "탱크!" -> 같은 키)"""
+    text = unicodedata.normalize("NFKC", name).lower().translate(LOOKALIKE_CHARS)
+    text = "".join(ch for ch in text if ch.isalnum())
+    return "".join(ch for ch in unicodedata.normalize("NFD", text) if not unicodedata.combining(ch))
+
+
+def romanize(name: str) -> str:
+    """한글 음절을 로마자로 바꿉니다. ("탱크" -> "taengkeu") 한글이 아닌 글자는 그대로 둡니다."""
+    romanized = []
+    for ch in unicodedata.normalize("NFKC", name):
+        code = ord(ch) - 0xAC00
+        if 0 <= code < 11172:
+            romanized.append(ROMAN_INITIALS[code // 588] + ROMAN_MEDIALS[code // 28 % 21] + ROMAN_FINALS[code % 28])
+        else:
+            romanized.append(ch)
+    return "".join(romanized)
+
+
+def _is_hangul_key(key: str) -> bool:
+    return any("\u1100" <= ch <= "\u11ff" for ch in key)
+
+
+def max_distance(key: str) -> int:
+    """금지어 길이에 따라 허용하는 편집 거리. 짧은 단어는 오탐이 많아 정규화 후 정확히 일치할 때만 잡습니다.
+
+    한글은 끝 글자 모음 하나만 다른 별개의 단어("탱크"/"탱커")가 많아 6자모(대략 두 글자)까지는 정확히 일치해야 하고,
+    더 긴 단어도 마지막 음절의 모음만 바뀐 경우는 잡지 않습니다. (_final_vowel_changed)
+    """
+    if _is_hangul_key(key):
+        if len(key) <= 6:
+            return 0
+        return 1 if len(key) <= 12 else 2
+    if len(key) <= 4:
+        return 0
+    if len(key) <= 8:
+        return 1
+    return 2
+
+
+def _final_vowel_changed(a: str, b: str) -> bool:
+    """두 자모 키가 마지막 음절의 모음 하나만 다른지 ("전투기"/"전투가") - 오타보다 다른 단어일 가능성이 높아 퍼지 일치에서 제외"""
+    if len(a) != len(b):
+        return False
+    diffs = [i for i, (char_a, char_b) in enumerate(zip(a, b)) if char_a != char_b]
+    if len(diffs) != 1 or not "\u1161" <= a[diffs[0]] <= "\u1175":
+        return False
+    return not any("\u1161" <= ch <= "\u1175" for ch in a[diffs[0] + 1:])
+
+
+def _alias_groups() -> dict:
+    """정규화 키 -> 같은 차량의 다른 표기 키 목록"""
+    groups = {}
+    for aliases in CAR_ALIASES:
+        keys = [normalize(alias) for alias in aliases]
+        for key in keys:
+            groups[key] = keys
+    return groups
+
+
+def _ngrams(key: str) -> set:
+    padded = f"^{key}$"
+    return {padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)}
+
+
+def _within_distance(a: str, b: str, limit: int) -> bool:
+    """편집 거리가 limit 이하인지 확인합니다. 대각선 주변 limit 폭만 계산하고 넘는 순간 멈춥니다."""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    if limit == 0:
+        return a == b
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        low, high = max(1, i - limit), min(len(b), i + limit)
+        current = [i] + [limit + 1] * len(b)
+        for j in range(low, high + 1):
+            cost = 0 if char_a == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+        if min(current[low - 1:high + 1]) > limit:
+            return False
+        previous = current
+    return previous[len(b)] <= limit
+
+
+class ForbiddenCarMatcher:
+    """서버의 금지 차량 목록을 한 번만 컴파일해 두고 신청마다 재사용합니다.
+
+    금지어마다 정규화 키, 로마자 표기 키(한글 금지어), 같은 차량의 다른 표기(CAR_ALIASES) 키를 함께 색인해서
+    "TANK", "t4nk"도 "탱크"로 잡습니다. 정규화한 키의 해시 집합으로 정확히 일치하는 경우를 먼저 찾고, 없으면
+    n-gram 역색인으로 후보를 좁힌 뒤 후보만 편집 거리를 계산해 띄어쓰기/오타 변형("탱 크", "핵잠슈함")을 잡습니다.
+    """
+
+    def __init__(self, names):
+        self.exact = {} # 정규화 키 -> 원래 금지어
+        self.terms = [] # (정규화 키, 원래 금지어, 허용 편집 거리) - 퍼지 검색 대상만
+        self.index = collections.defaultdict(list) # n-gram -> terms 인덱스 목록
+        aliases = _alias_groups()
+        for name in names:
+            key = normalize(str(name))
+            if not key or key in self.exact:
+                continue
+            keys = [key] + aliases.get(key, [])
+            if _is_hangul_key(key):
+                keys.append(normalize(romanize(str(name))))
+            for variant in keys:
+                if variant in self.exact:
+                    continue
+                self.exact[variant] = name
+                distance = max_distance(variant)
+                if distance:
+                    term_id = len(self.terms)
+                    self.terms.append((variant, name, distance))
+                    for gram in _ngrams(variant):
+                        self.index[gram].append(term_id)
+
+    def __len__(self):
+        return len(set(self.exact.values()))
+
+    def match(self, car_name: str):
+        """금지 차량에 해당하면 걸린 금지어를, 아니면 None을 반환합니다."""
+        key = normalize(car_name)
+        if not key:
+            return None
+        hit = self.exact.get(key)
+        if hit is not None:
+            return hit
+
+        # 편집 한 번은 n-gram을 최대 NGRAM_SIZE개까지만 깨뜨리므로, 공유 n-gram 수가 모자란 금지어는 계산하지 않음
+        query_grams = _ngrams(key)
+        shared = collections.Counter()
+        for gram in query_grams:
+            for term_id in self.index.get(gram, ()):
+                shared[term_id] += 1
+        for term_id, count in shared.items():
+            term_key, name, distance = self.terms[term_id]
+            if count < len(query_grams) - NGRAM_SIZE * distance:
+                continue
+            if _within_distance(key, term_key, distance) and not _final_vowel_changed(key, term_key):
+                return name
+        return None
+
+
+def parse_forbidden_json(raw) -> list:
+    """server_configs.car_forbidden_cars_json 값을 목록으로 바꿉니다. 비어 있거나 잘못된 값이면 기본 목록을 씁니다."""
+    if not raw:
+        return list(DEFAULT_FORBIDDEN_CARS)
+    try:
+        names = json.loads(raw)
+    except (TypeError, ValueError):
+        print(f"⚠️ 금지 차량 목록 JSON을 읽을 수 없어 기본 목록을 사용합니다: {raw!r}")
+        return list(DEFAULT_FORBIDDEN_CARS)
+    if not isinstance(names, list):
+        return list(DEFAULT_FORBIDDEN_CARS)
+    return [str(name) for name in names if str(name).strip()]
+
+
+def _random_name(rng: random.Random) -> str:
+    if rng.random() < 0.5:
+        return "".join(chr(0xAC00 + rng.randrange(11172)) for _ in range(rng.randint(2, 6)))
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 12)))
+
+
+def _mutate(name: str, rng: random.Random) -> str:
+    """띄어쓰기를 넣거나 한 글자를 바꾼 변형을 만듭니다."""
+    if rng.random() < 0.5 or len(name) < 2:
+        position = rng.randrange(1, max(2, len(name)))
+        return name[:position] + " " + name[position:]
+    position = rng.randrange(len(name))
+    replacement = chr(0xAC00 + rng.randrange(11172)) if "가" <= name[position] <= "힣" else rng.choice("abcdefghijklmnopqrstuvwxyz")
+    return name[:position] + replacement + name[position + 1:]
+
+
+def run_benchmark(names: int, queries: int, seed: int = 1):
+    """금지어 names개로 매처를 만들고 정확/변형/무관한 이름 queries개를 검사해, 기존 방식(매번 소문자 목록 생성 후 비교)과 비교합니다."""
+    rng = random.Random(seed)
+    forbidden = list(dict.fromkeys(_random_name(rng) for _ in range(names)))
+    raw_json = json.dumps(forbidden, ensure_ascii=False)
+    samples = [rng.choice(forbidden) for _ in range(queries // 3)]
+    samples += [_mutate(rng.choice(forbidden), rng) for _ in range(queries // 3)]
+    samples += [_random_name(rng) for _ in range(queries - len(samples))]
+    rng.shuffle(samples)
+
+    started = time.perf_counter()
+    matcher = ForbiddenCarMatcher(parse_forbidden_json(raw_json))
+    build_elapsed = time.perf_counter() - started
+    print(f"금지어 {len(matcher):,}개 컴파일: {build_elapsed * 1000:.1f}ms (퍼지 대상 {len(matcher.terms):,}개, n-gram {len(matcher.index):,}개)")
+
+    started = time.perf_counter()
+    hits = sum(1 for sample in samples if matcher.match(sample) is not None)
+    elapsed = time.perf_counter() - started
+    print(f"매처 검사 {len(samples):,}건: {elapsed:.2f}초 ({elapsed / len(samples) * 1e6:.0f}µs/건), 금지 판정 {hits:,}건")
+
+    legacy_samples = samples[:min(len(samples), 200)]
+    started = time.perf_counter()
+    legacy_hits = sum(1 for sample in legacy_samples if sample.lower() in [c.lower() for c in json.loads(raw_json)])
+    legacy_elapsed = time.perf_counter() - started
+    print(f"기존 방식 검사 {len(legacy_samples):,}건: {legacy_elapsed:.2f}초 ({legacy_elapsed / len(legacy_samples) * 1e6:.0f}µs/건), 금지 판정 {legacy_hits:,}건 (정확히 일치만)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="저스트봇 금지 차량 매처 도구")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    check_parser = subparsers.add_parser("check", help="차량 이름이 금지 목록에 걸리는지 확인합니다.")
+    check_parser.add_argument("name", help="검사할 차량 이름")
+    check_parser.add_argument("--forbidden-json", help="금지 차량 JSON 배열 (생략 시 기본 목록)")
+
+    bench_parser = subparsers.add_parser("benchmark", help="큰 금지 목록으로 매처 성능을 측정합니다.")
+    bench_parser.add_argument("--names", type=int, default=100000, help="금지어 개수 (기본 100,000)")
+    bench_parser.add_argument("--queries", type=int, default=30000, help="검사할 이름 개수 (기본 30,000)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "benchmark":
+        run_benchmark(args.names, args.queries)
+        return
+
+    matcher = ForbiddenCarMatcher(parse_forbidden_json(args.forbidden_json))
+    hit = matcher.match(args.name)
+    if hit is None:
+        print(f"✅ '{args.name}'은(는) 금지 차량이 아닙니다.")
+    else:
+        print(f"🚫 '{args.name}'은(는) 금지 차량 '{hit}'에 해당합니다.")
+
+
+if __name__ == "__main__":
+    main()
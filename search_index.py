@@ -0,0 +1,267 @@
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+# 봇과 같은 DB 파일을 사용 (이 스크립트가 있는 프로젝트 루트 기준)
+DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rp_server_data.db")
+
+# 검색 대상: 표시 이름 -> 원본 테이블/검색 컬럼/FTS 테이블 (guild_column이 없는 테이블은 서버 구분 없이 저장되고 user_column으로 주인을 구분함)
+# batched: 쓰기가 잦은 테이블은 트리거 대신 index_pending()이 새 행을 모아서 색인함 (은행 작업의 쓰기 잠금 시간에 색인 비용이 더해지지 않게)
+SEARCH_SOURCES = {
+    "차량": {"table": "car_registrations", "column": "car_name", "fts": "car_registrations_fts", "guild_column": "guild_id", "user_column": None, "time_column": "requested_at", "batched": False},
+    "경고": {"table": "user_warnings", "column": "reason", "fts": "user_warnings_fts", "guild_column": None, "user_column": "user_id", "time_column": "timestamp", "batched": False},
+    "티켓": {"table": "tickets", "column": "reason", "fts": "tickets_fts", "guild_column": "guild_id", "user_column": None, "time_column": "opened_at", "batched": False},
+    "거래": {"table": "bank_transactions", "column": "description", "fts": "bank_transactions_fts", "guild_column": None, "user_column": "user_id", "time_column": "timestamp", "batched": True},
+}
+
+# trigram 토크나이저는 3글자 이상 검색어만 색인으로 찾을 수 있음 (더 짧은 검색어는 원본 테이블을 LIKE로 훑음)
+MIN_INDEXED_TERM = 3
+
+# index_pending()이 한 트랜잭션에서 색인하는 최대 행 수 (쓰기 잠금을 짧게 잡도록)
+INDEX_BATCH_SIZE = 5000
+
+
+def ensure_search_tables(conn) -> list:
+    """검색 대상마다 FTS5(trigram) 외부 콘텐츠 테이블과 동기화 트리거를 만듭니다. 새로 만든 색인은 기존 행으로 채웁니다.
+
+    batched 대상은 트리거를 두지 않고 search_index_state에 색인한 마지막 id를 기록합니다.
+    반환값: 새로 만들어 채운 FTS 테이블 이름 목록
+    """
+    conn.execute("CREATE TABLE IF NOT EXISTS search_index_state (fts TEXT PRIMARY KEY, indexed_id INTEGER NOT NULL)")
+    created = []
+    for source in SEARCH_SOURCES.values():
+        table, column, fts = source["table"], source["column"], source["fts"]
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts,)).fetchone()
+        conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({column}, content='{table}', content_rowid='id', tokenize='trigram')")
+        if source["batched"]:
+            # 예전 버전이 만든 트리거는 지움 (그때까지의 행은 이미 색인되어 있으므로 현재 마지막 id부터 이어서 색인)
+            conn.executescript(f"""
+                DROP TRIGGER IF EXISTS {fts}_ai;
+                DROP TRIGGER IF EXISTS {fts}_ad;
+                DROP TRIGGER IF EXISTS {fts}_au;
+            """)
+        else:
+            conn.executescript(f"""
+                CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+                    INSERT INTO {fts} (rowid, {column}) VALUES (new.id, new.{column});
+                END;
+                CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+                    INSERT INTO {fts} ({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column});
+                END;
+                CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column} ON {table} BEGIN
+                    INSERT INTO {fts} ({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column});
+                    INSERT INTO {fts} (rowid, {column}) VALUES (new.id, new.{column});
+                END;
+            """)
+        if not exists:
+            rebuild(conn, source)
+            created.append(fts)
+        elif source["batched"]:
+            conn.execute(f"INSERT OR IGNORE INTO search_index_state (fts, indexed_id) SELECT ?, COALESCE(MAX(id), 0) FROM {table}", (fts,))
+    conn.commit()
+    return created
+
+
+def rebuild(conn, source: dict):
+    """원본 테이블 전체로 색인을 다시 만듭니다. (batched 대상은 색인한 마지막 id도 함께 기록)"""
+    fts = source["fts"]
+    conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+    if source["batched"]:
+        _set_indexed_id(conn, source, conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {source['table']}").fetchone()[0])
+
+
+def _indexed_id(conn, source: dict) -> int:
+    row = conn.execute("SELECT indexed_id FROM search_index_state WHERE fts = ?", (source["fts"],)).fetchone()
+    return row[0] if row else 0
+
+
+def _set_indexed_id(conn, source: dict, indexed_id: int):
+    conn.execute("""
+        INSERT INTO search_index_state (fts, indexed_id) VALUES (?, ?)
+        ON CONFLICT(fts) DO UPDATE SET indexed_id = excluded.indexed_id
+    """, (source["fts"], indexed_id))
+
+
+def index_pending(conn, batch_size: int = INDEX_BATCH_SIZE) -> int:
+    """batched 대상의 아직 색인되지 않은 새 행을 최대 batch_size개씩 색인하고 커밋합니다. 반환값: 색인한 행 수
+
+    원본 행은 추가만 되고 수정/삭제되지 않으므로 마지막으로 색인한 id 이후의 행만 넣으면 됩니다.
+    """
+    indexed = 0
+    for source in SEARCH_SOURCES.values():
+        if not source["batched"]:
+            continue
+        table, column, fts = source["table"], source["column"], source["fts"]
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            last_id = _indexed_id(conn, source)
+            upto_id = conn.execute(f"SELECT MAX(id) FROM (SELECT id FROM {table} WHERE id > ? ORDER BY id LIMIT ?)", (last_id, batch_size)).fetchone()[0]
+            if upto_id is not None:
+                count = conn.execute(f"INSERT INTO {fts} (rowid, {column}) SELECT id, {column} FROM {table} WHERE id > ? AND id <= ?", (last_id, upto_id)).rowcount
+                _set_indexed_id(conn, source, upto_id)
+                indexed += count
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    return indexed
+
+
+def _match_expression(terms) -> str:
+    """검색어를 FTS5 구문(따옴표로 감싼 구절들의 AND)으로 바꿉니다. 사용자 입력의 연산자/따옴표는 글자로 취급됩니다."""
+    return " AND ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def search(conn, query: str, sources=None, guild_id: str = None, limit: int = 10, members_of: str = None) -> dict:
+    """검색어의 모든 단어를 포함하는 기록을 찾습니다 (부분 일치). 반환값: {표시 이름: [행, ...]}
+
+    guild_id를 주면 서버 컬럼이 있는 대상(차량/티켓)은 그 서버 기록만 찾습니다.
+    members_of를 주면 서버 컬럼이 없는 대상(경고/거래)은 guild_members에 저장된 그 서버 멤버의 기록만 찾습니다.
+    """
+    terms = [term for term in query.split() if term]
+    if not terms:
+        return {}
+    indexed = [term for term in terms if len(term) >= MIN_INDEXED_TERM]
+    short = [term for term in terms if len(term) < MIN_INDEXED_TERM]
+
+    results = {}
+    for name in (sources or SEARCH_SOURCES):
+        source = SEARCH_SOURCES[name]
+        table, column, fts = source["table"], source["column"], source["fts"]
+        filters, filter_params = [], []
+        if guild_id is not None and source["guild_column"]:
+            filters.append(f"t.{source['guild_column']} = ?")
+            filter_params.append(str(guild_id))
+        if members_of is not None and source["user_column"]:
+            filters.append(f"EXISTS (SELECT 1 FROM guild_members m WHERE m.guild_id = ? AND m.user_id = t.{source['user_column']})")
+            filter_params.append(str(members_of))
+
+        clauses, params = [], []
+        if indexed:
+            clauses.append(f"{fts} MATCH ?")
+            params.append(_match_expression(indexed))
+        for term in short:
+            clauses.append(f"t.{column} LIKE ?")
+            params.append(f"%{term}%")
+        # 아직 색인되지 않은 최근 행은 원본 테이블에서 LIKE로 찾음 (index_pending 주기 사이에 쌓인 행뿐이라 적음)
+        # 색인으로 찾을 검색어가 없으면 FTS 테이블을 거쳐도 원본 전체를 훑으므로 원본 테이블만 훑음
+        tail_clauses = [f"t.{column} LIKE ?" for _ in terms] + ["t.id > ?"]
+        tail_params = [f"%{term}%" for term in terms] + [_indexed_id(conn, source) if indexed else 0] if source["batched"] else None
+
+        rows = []
+        if tail_params is not None:
+            rows.extend(conn.execute(f"""
+                SELECT t.* FROM {table} t
+                WHERE {' AND '.join(tail_clauses + filters)}
+                ORDER BY t.id DESC LIMIT ?
+            """, tail_params + filter_params + [limit]).fetchall())
+        if tail_params is None or indexed:
+            # 최신 기록부터 (FTS5가 rowid 역순으로 읽다가 LIMIT에서 멈추므로 일치하는 행이 많아도 빠름)
+            rows.extend(conn.execute(f"""
+                SELECT t.* FROM {fts} JOIN {table} t ON t.id = {fts}.rowid
+                WHERE {' AND '.join(clauses + filters)}
+                ORDER BY {fts}.rowid DESC LIMIT ?
+            """, params + filter_params + [limit - len(rows)]).fetchall())
+        results[name] = rows[:limit]
+    return results
+
+
+def _run_benchmark(rows: int, queries: int, seed: int = 1):
+    """임시 DB의 bank_transactions에 rows행을 넣고 FTS 검색과 LIKE '%...%' 스캔의 지연 시간을 비교합니다."""
+    rng = random.Random(seed)
+    words = ["월급", "차량 등록세", "송금", "이자", "보너스", "환불", "벌금", "상점 구매", "람보르기니", "포르쉐", "택시비", "주유비",
+             "이벤트 상금", "보험료", "수리비", "임대료", "대출 상환", "경매 낙찰", "카지노", "기부"]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        conn = sqlite3.connect(os.path.join(tmp_dir, "bench.db"))
+        conn.row_factory = sqlite3.Row
+        conn.executescript("""
+            CREATE TABLE bank_transactions (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, username TEXT NOT NULL, type TEXT NOT NULL,
+                amount INTEGER NOT NULL, timestamp TEXT NOT NULL, related_user_id TEXT, related_username TEXT, description TEXT);
+            CREATE TABLE car_registrations (id INTEGER PRIMARY KEY AUTOINCREMENT, car_name TEXT, guild_id TEXT, requested_at TEXT);
+            CREATE TABLE user_warnings (id INTEGER PRIMARY KEY AUTOINCREMENT, reason TEXT, timestamp TEXT);
+            CREATE TABLE tickets (id INTEGER PRIMARY KEY AUTOINCREMENT, reason TEXT, guild_id TEXT, opened_at TEXT);
+        """)
+        started = time.perf_counter()
+        conn.executemany(
+            "INSERT INTO bank_transactions (user_id, username, type, amount, timestamp, description) VALUES (?, ?, 'fee', ?, '2025-01-01T00:00:00', ?)",
+            ((str(i % 5000), f"user{i % 5000}", i % 100000, f"{rng.choice(words)} #{i} {rng.choice(words)}") for i in range(rows))
+        )
+        conn.commit()
+        ensure_search_tables(conn) # 기존 행으로 색인 채우기 (rebuild)
+        print(f"{rows:,}행 삽입 + 색인 구축: {time.perf_counter() - started:.1f}초")
+
+        # 색인 주기 사이에 쌓인 새 행을 배치로 색인하는 시간 (은행 작업의 쓰기 잠금 밖에서 실행됨)
+        pending = max(1, rows // 100)
+        conn.executemany(
+            "INSERT INTO bank_transactions (user_id, username, type, amount, timestamp, description) VALUES (?, ?, 'fee', ?, '2025-01-01T00:00:00', ?)",
+            ((str(i % 5000), f"user{i % 5000}", i % 100000, f"{rng.choice(words)} #{rows + i} {rng.choice(words)}") for i in range(pending))
+        )
+        conn.commit()
+        started = time.perf_counter()
+        batches = 0
+        while index_pending(conn):
+            batches += 1
+        elapsed = time.perf_counter() - started
+        print(f"새 거래 {pending:,}행 배치 색인: {elapsed * 1000:.0f}ms ({batches}배치, 배치당 최대 {INDEX_BATCH_SIZE:,}행)")
+
+        # 드문 검색어 / 흔한 단어 조합 / 없는 검색어
+        samples = [f"#{rng.randrange(rows)}", "람보르기니 보험료", "이벤트 상금", "경매 낙찰 주유비", "없는검색어입니다"]
+        for label, run in (
+            ("FTS5", lambda q: search(conn, q, sources=["거래"], limit=10)["거래"]),
+            ("LIKE 스캔", lambda q: conn.execute(
+                "SELECT * FROM bank_transactions WHERE " + " AND ".join("description LIKE ?" for _ in q.split()) + " ORDER BY id DESC LIMIT 10",
+                [f"%{term}%" for term in q.split()]).fetchall()),
+        ):
+            for query in samples:
+                latencies = []
+                for _ in range(max(1, queries // len(samples))):
+                    started = time.perf_counter()
+                    run(query)
+                    latencies.append(time.perf_counter() - started)
+                latencies.sort()
+                print(f"{label:<8} '{query}': p50 {latencies[len(latencies) // 2] * 1000:.2f}ms, 최대 {latencies[-1] * 1000:.2f}ms")
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="저스트봇 전문 검색 색인 도구")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("rebuild", help="검색 색인을 원본 테이블 기준으로 다시 만듭니다.")
+    query_parser = subparsers.add_parser("query", help="검색어로 기록을 찾습니다.")
+    query_parser.add_argument("query", help="검색어")
+    query_parser.add_argument("--source", choices=list(SEARCH_SOURCES), action="append", help="검색 대상 (여러 번 지정 가능)")
+    query_parser.add_argument("--guild", help="서버 ID (차량/티켓만 해당 서버로 제한)")
+    bench_parser = subparsers.add_parser("benchmark", help="임시 DB로 검색 지연 시간을 측정합니다.")
+    bench_parser.add_argument("--rows", type=int, default=1000000, help="거래 내역 행 수 (기본 1,000,000)")
+    bench_parser.add_argument("--queries", type=int, default=200, help="검색 횟수")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "benchmark":
+        _run_benchmark(args.rows, args.queries)
+        return
+
+    conn = sqlite3.connect(DB_FILE)
+    conn.row_factory = sqlite3.Row
+    try:
+        ensure_search_tables(conn)
+        if args.command == "rebuild":
+            for source in SEARCH_SOURCES.values():
+                rebuild(conn, source)
+            conn.commit()
+            print("✅ 검색 색인을 다시 만들었습니다.")
+        else:
+            for name, rows in search(conn, args.query, sources=args.source, guild_id=args.guild).items():
+                print(f"[{name}] {len(rows)}건")
+                for row in rows:
+                    print(f"  #{row['id']} {row[SEARCH_SOURCES[name]['column']]}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import pytest
+
+import forbidden_cars
+from forbidden_cars import DEFAULT_FORBIDDEN_CARS, ForbiddenCarMatcher
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return ForbiddenCarMatcher(DEFAULT_FORBIDDEN_CARS)
+
+
+@pytest.mark.parametrize("name", ["탱크", "탱 크", "탱크!", "ＴＡＮＫ", "tank", "TANK", "Tank", "t4nk", "taengkeu"])
+def test_tank_spellings_match_korean_entry(matcher, name):
+    assert matcher.match(name) == "탱크"
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("fighter jet", "전투기"),
+    ("Space Shuttle", "우주선"),
+    ("nuclear submarine", "핵잠수함"),
+    ("핵잠슈함", "핵잠수함"), # 가운데 음절 오타는 퍼지 일치
+    ("전 투 기", "전투기"),
+])
+def test_aliases_and_typos(matcher, name, expected):
+    assert matcher.match(name) == expected
+
+
+@pytest.mark.parametrize("name", ["탱커", "전투가", "우주산", "소나타", "람보르기니", "thank", ""])
+def test_different_words_are_not_flagged(matcher, name):
+    assert matcher.match(name) is None
+
+
+def test_english_entry_matches_korean_alias():
+    assert ForbiddenCarMatcher(["Tank"]).match("탱크") == "Tank"
+
+
+def test_short_hangul_keys_are_exact_only():
+    assert forbidden_cars.max_distance(forbidden_cars.normalize("탱크")) == 0
+    assert forbidden_cars.max_distance(forbidden_cars.normalize("핵잠수함")) == 1
+
+
+def test_romanize():
+    assert forbidden_cars.romanize("탱크") == "taengkeu"
+    assert forbidden_cars.romanize("핵잠수함") == "haekjamsuham"
+    assert forbidden_cars.romanize("BMW 탱크") == "BMW taengkeu"
+
+
+def test_parse_forbidden_json_falls_back_to_default():
+    assert forbidden_cars.parse_forbidden_json(None) == DEFAULT_FORBIDDEN_CARS
+    assert forbidden_cars.parse_forbidden_json("not json") == DEFAULT_FORBIDDEN_CARS
+    assert forbidden_cars.parse_forbidden_json('["람보르기니", " "]') == ["람보르기니"]